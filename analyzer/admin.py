@@ -8,6 +8,6 @@ from .models import Analysis
 
 @admin.register(Analysis)
 class AnalysisAdmin(admin.ModelAdmin):
-    list_display = ['id', 'job', 'analysis_type', 'created_at', 'completed_at']
-    list_filter = ['analysis_type', 'created_at']
-    readonly_fields = ['created_at', 'completed_at']
+    list_display = ['id', 'job', 'analysis_type', 'analyzer_version', 'created_at', 'completed_at']
+    list_filter = ['analysis_type', 'analyzer_version', 'created_at']
+    readonly_fields = ['created_at', 'completed_at', 'fingerprint']
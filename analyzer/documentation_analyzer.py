@@ -2,17 +2,92 @@
 
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
-from django.db.models import Count, Avg, Q, F, Sum, Min, Max
-from django.db.models.functions import Length
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from django.db import OperationalError, connection, connections
+from django.db.models import F, Sum
 from django.utils import timezone
 from datetime import timedelta
-from collections import Counter, defaultdict
+from collections import defaultdict
 import json
+import logging
 import re
+import time
 from ddtrace import tracer
 
 from core.models import CrawlJob
-from crawler.models import CrawledPage, PageRelationship
+from crawler.models import CrawledPage
+from analyzer.link_graph import LinkGraph
+from analyzer.metrics import EXAMPLE_DOC_TYPES, PageMetrics, missing_meta_description, no_code_blocks
+
+logger = logging.getLogger('analyzer')
+
+# Stored analyses from another version are recomputed; bump when a section's
+# logic or output changes
+ANALYZER_VERSION = '1'
+
+# Analysis sections in report order: detailed_metrics key -> (analyzer method, insight generator)
+SECTIONS = {
+    'content_quality': ('analyze_content_quality', '_generate_content_insights'),
+    'navigation_structure': ('analyze_navigation_structure', '_generate_navigation_insights'),
+    'code_coverage': ('analyze_code_coverage', '_generate_code_insights'),
+    'seo_opportunities': ('analyze_seo_opportunities', '_generate_seo_insights'),
+    'api_completeness': ('analyze_api_completeness', '_generate_api_insights'),
+    'performance': ('analyze_performance_issues', '_generate_performance_insights'),
+}
+
+# Data each section reads (see analyzer.result_cache.data_fingerprint)
+SECTION_INPUTS = {
+    'content_quality': ('pages',),
+    'navigation_structure': ('pages', 'links'),
+    'code_coverage': ('pages',),
+    'seo_opportunities': ('pages',),
+    'api_completeness': ('pages',),
+    'performance': ('pages', 'crawl_errors'),
+}
+
+# Postgres SQLSTATE of a statement cancelled by statement_timeout
+QUERY_CANCELED = '57014'
+
+
+class SectionTimeout(Exception):
+    """A section's queries ran past the analysis time budget."""
+
+
+@contextmanager
+def query_deadline(deadline: Optional[float]):
+    """
+    Stop this thread's queries at a time.monotonic() deadline (None: no limit).
+    
+    Before each query the connection's statement_timeout is set to the time
+    left, so Postgres cancels a query still running at the deadline, and no
+    query is started after it; both raise SectionTimeout. Python work between
+    queries is not interrupted.
+    """
+    if deadline is None or connection.vendor != 'postgresql':
+        yield
+        return
+    
+    def limit_statement(execute, sql, params, many, context):
+        remaining_ms = int((deadline - time.monotonic()) * 1000)
+        if remaining_ms <= 0:
+            raise SectionTimeout()
+        with context['connection'].connection.cursor() as cursor:
+            cursor.execute('SET statement_timeout = %s', [remaining_ms])
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as e:
+            if getattr(e.__cause__, 'pgcode', None) == QUERY_CANCELED:
+                raise SectionTimeout() from e
+            raise
+    
+    try:
+        with connection.execute_wrapper(limit_statement):
+            yield
+    finally:
+        if connection.connection is not None:
+            with connection.connection.cursor() as cursor:
+                cursor.execute('SET statement_timeout = DEFAULT')
 
 @tracer.wrap()
 @dataclass
@@ -67,33 +142,43 @@ class DocumentationAnalyzer:
             'support_ticket_cost': 50,  # Average cost per support ticket
             'developer_hour_cost': 150,  # Cost of developer time per hour
         }
+        
+        # All per-page counts and stats, computed in one aggregate query on first use
+        self.metrics = PageMetrics(self.job, self.pages, self.config)
     
     # ==========================================
     # Main Analysis Methods
     # ==========================================
     
-    def generate_comprehensive_analysis(self) -> Dict[str, Any]:
+    def generate_comprehensive_analysis(self, max_workers: int = 1, time_budget: Optional[float] = None,
+                                        reuse_sections: Optional[Dict[str, Dict]] = None) -> Dict[str, Any]:
         """
         Generate a complete analysis report worth $5k-10k.
         This is your primary deliverable generator.
+        
+        Args:
+            max_workers: Run up to this many sections at once (1: one after another)
+            time_budget: Seconds the sections may take; queries still running
+                after that are cancelled and their sections left out of the
+                report (listed in incomplete_sections)
+            reuse_sections: Earlier results for sections whose input data has
+                not changed ({section: results}); only the others are run
         """
         self.insights = []  # Reset insights
+        start = time.monotonic()
+        reuse_sections = reuse_sections or {}
         
         # Run all analyzers
-        content_quality = self.analyze_content_quality()
-        navigation_structure = self.analyze_navigation_structure()
-        code_coverage = self.analyze_code_coverage()
-        seo_opportunities = self.analyze_seo_opportunities()
-        api_completeness = self.analyze_api_completeness()
-        performance_issues = self.analyze_performance_issues()
+        sections, section_timings = self.run_sections(
+            max_workers, time_budget, only=[name for name in SECTIONS if name not in reuse_sections]
+        )
+        sections.update(reuse_sections)
+        incomplete_sections = [name for name in SECTIONS if name not in sections]
         
         # Generate insights from analysis
-        self._generate_content_insights(content_quality)
-        self._generate_navigation_insights(navigation_structure)
-        self._generate_code_insights(code_coverage)
-        self._generate_seo_insights(seo_opportunities)
-        self._generate_api_insights(api_completeness)
-        self._generate_performance_insights(performance_issues)
+        for name, (_, generate_insights) in SECTIONS.items():
+            if name in sections:
+                getattr(self, generate_insights)(sections[name])
         
         # Sort insights by priority
         self.insights.sort(key=lambda x: x.priority, reverse=True)
@@ -111,18 +196,89 @@ class DocumentationAnalyzer:
             'overall_score': overall_score,
             'executive_summary': executive_summary,
             'insights': [insight.to_dict() for insight in self.insights],
-            'detailed_metrics': {
-                'content_quality': content_quality,
-                'navigation_structure': navigation_structure,
-                'code_coverage': code_coverage,
-                'seo_opportunities': seo_opportunities,
-                'api_completeness': api_completeness,
-                'performance': performance_issues,
-            },
+            'detailed_metrics': {name: sections.get(name, {}) for name in SECTIONS},
             'recommendations': self._generate_recommendations(),
             'roadmap': self._generate_30_60_90_day_plan(),
+            'section_timings': section_timings,
+            'incomplete_sections': incomplete_sections,
+            'reused_sections': [name for name in SECTIONS if name in reuse_sections],
+            'analyzer_version': ANALYZER_VERSION,
+            'analysis_seconds': round(time.monotonic() - start, 3),
         }
     
+    def run_sections(self, max_workers: int = 1, time_budget: Optional[float] = None,
+                     only: Optional[List[str]] = None) -> Tuple[Dict[str, Dict], Dict[str, float]]:
+        """
+        Run the analysis sections (all, or the names in only), concurrently when max_workers > 1.
+        
+        Sections only read from the database, so each runs in its own thread
+        with its own connection. Queries are cut off at time_budget (see
+        query_deadline); returns ({section: results}, {section: seconds}) for
+        the sections that finished within it.
+        """
+        start = time.monotonic()
+        deadline = None if time_budget is None else start + time_budget
+        sections, timings = {}, {}
+        selected = {name: SECTIONS[name] for name in (SECTIONS if only is None else only)}
+        if not selected:
+            return sections, timings
+        
+        try:
+            # Every section reads the shared page metrics; load them once up front
+            with query_deadline(deadline):
+                self.metrics.values
+        except SectionTimeout:
+            selected = {}
+        timings['page_metrics'] = round(time.monotonic() - start, 3)
+        
+        if max_workers <= 1:
+            for name, (method, _) in selected.items():
+                result = self._run_section(method, deadline)
+                if result is None:
+                    break
+                sections[name], timings[name] = result
+        elif selected:
+            pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analyzer')
+            try:
+                futures = {
+                    pool.submit(self._run_section_in_thread, method, deadline): name
+                    for name, (method, _) in selected.items()
+                }
+                for future, name in futures.items():
+                    result = future.result()
+                    if result is not None:
+                        sections[name], timings[name] = result
+            finally:
+                # Sections not started by the deadline stop at their first query
+                pool.shutdown(wait=True, cancel_futures=True)
+        
+        timings.update({name: timings.pop(name) for name in SECTIONS if name in timings})  # Report order
+        
+        skipped = [name for name in selected if name not in sections]
+        if skipped:
+            logger.warning(
+                f"[Analyzer] Job {self.job.id}: time budget of {time_budget}s exceeded, "
+                f"skipped {', '.join(skipped)}"
+            )
+        return sections, timings
+    
+    def _run_section(self, method: str, deadline: Optional[float] = None) -> Optional[Tuple[Dict[str, Any], float]]:
+        """(results, seconds) for a section, or None if it ran past the deadline."""
+        section_start = time.monotonic()
+        try:
+            with query_deadline(deadline):
+                results = getattr(self, method)()
+        except SectionTimeout:
+            return None
+        return results, round(time.monotonic() - section_start, 3)
+    
+    def _run_section_in_thread(self, method: str, deadline: Optional[float] = None) -> Optional[Tuple[Dict[str, Any], float]]:
+        try:
+            return self._run_section(method, deadline)
+        finally:
+            # Connections are per thread; don't leave this worker's open
+            connections.close_all()
+    
     # ==========================================
     # Content Quality Analysis
     # ==========================================
@@ -130,74 +286,31 @@ class DocumentationAnalyzer:
     def analyze_content_quality(self) -> Dict[str, Any]:
         """Analyze the quality of documentation content"""
         
-        # Readability analysis
-        readability_stats = self.pages.aggregate(
-            avg_readability=Avg('readability_score'),
-            min_readability=Min('readability_score'),
-            max_readability=Max('readability_score')
-        )
-        
-        # Find problem pages
-        low_readability = self.pages.filter(
-            readability_score__lt=self.config['min_readability_score']
-        )
-        
-        stub_pages = self.pages.filter(
-            word_count__lt=self.config['min_word_count']
-        )
-        
-        # Pages without examples
-        pages_without_examples = self.pages.filter(
-            has_examples=False,
-            doc_type__in=['tutorial', 'guide', 'api_reference']
-        )
-        
-        # Calculate quality distribution
-        quality_distribution = {
-            'excellent': self.pages.filter(readability_score__gte=70, word_count__gte=300).count(),
-            'good': self.pages.filter(readability_score__gte=50, word_count__gte=200).count(),
-            'needs_work': self.pages.filter(
-                Q(readability_score__lt=50) | Q(word_count__lt=200)
-            ).count(),
-            'critical': self.pages.filter(
-                readability_score__lt=30, word_count__lt=100
-            ).count(),
-        }
+        metrics = self.metrics
         
         return {
-            'readability_stats': readability_stats,
-            'low_readability_pages': low_readability.count(),
-            'stub_pages': stub_pages.count(),
-            'pages_without_examples': pages_without_examples.count(),
-            'quality_distribution': quality_distribution,
-            'estimated_support_impact': self._calculate_support_impact(low_readability),
+            'readability_stats': {
+                'avg_readability': metrics['avg_readability'],
+                'min_readability': metrics['min_readability'],
+                'max_readability': metrics['max_readability'],
+            },
+            'low_readability_pages': metrics['low_readability_pages'],
+            'stub_pages': metrics['stub_pages'],
+            'pages_without_examples': metrics['pages_without_examples'],
+            'quality_distribution': {
+                'excellent': metrics['quality_excellent'],
+                'good': metrics['quality_good'],
+                'needs_work': metrics['quality_needs_work'],
+                'critical': metrics['quality_critical'],
+            },
+            'estimated_support_impact': self._calculate_support_impact(metrics['low_readability_pages']),
         }
     
     def analyze_navigation_structure(self) -> Dict[str, Any]:
         """Analyze the navigation and information architecture"""
         
-        # Find orphaned pages (no incoming links)
-        pages_with_incoming = PageRelationship.objects.filter(
-            to_page__job=self.job
-        ).values_list('to_page_id', flat=True).distinct()
-        
-        orphaned_pages = self.pages.exclude(
-            id__in=pages_with_incoming
-        ).exclude(
-            url=self.job.target_url  # Exclude the home page
-        )
-        
-        # Find dead ends (no outgoing links)
-        dead_ends = self.pages.filter(
-            internal_links__exact=[]
-        ).exclude(
-            doc_type='api_reference'  # API refs often don't have links
-        )
-        
-        # Analyze depth distribution
-        depth_distribution = self.pages.values('depth').annotate(
-            count=Count('id')
-        ).order_by('depth')
+        metrics = self.metrics
+        total_pages = metrics['total_pages']
         
         # Find circular references
         circular_refs = self._find_circular_references()
@@ -206,67 +319,41 @@ class DocumentationAnalyzer:
         nav_health_score = self._calculate_navigation_health()
         
         return {
-            'orphaned_pages': orphaned_pages.count(),
-            'dead_ends': dead_ends.count(),
-            'depth_distribution': list(depth_distribution),
-            'circular_references': len(circular_refs),
+            'orphaned_pages': metrics['orphaned_pages'],
+            'dead_ends': metrics['dead_ends'],
+            'depth_distribution': metrics.depth_distribution,
+            'circular_references': circular_refs['mutual_links'],
+            'link_cycles': circular_refs,
             'navigation_health_score': nav_health_score,
-            'max_depth': self.pages.aggregate(Max('depth'))['depth__max'],
-            # Calculate average links manually since internal_links is a JSON field
-            'avg_links_per_page': sum(
-                len(page.internal_links) if page.internal_links else 0 
-                for page in self.pages.all()
-            ) / self.pages.count() if self.pages.count() > 0 else 0,
+            'max_depth': metrics['max_depth'],
+            'avg_links_per_page': metrics['total_internal_links'] / total_pages if total_pages > 0 else 0,
         }
     
     def analyze_code_coverage(self) -> Dict[str, Any]:
         """Analyze code examples and their quality"""
         
-        # Collect all code blocks
-        all_code_blocks = []
-        pages_with_code = 0
+        metrics = self.metrics
+        total_pages = metrics['total_pages']
         
-        for page in self.pages:
-            if page.code_blocks and len(page.code_blocks) > 0:
-                pages_with_code += 1
-                if isinstance(page.code_blocks, list):
-                    all_code_blocks.extend(page.code_blocks)
-                elif isinstance(page.code_blocks, dict) and 'blocks' in page.code_blocks:
-                    all_code_blocks.extend(page.code_blocks['blocks'])
+        pages_with_code = metrics['pages_with_code']
         
         # Language distribution
-        language_counter = Counter()
-        for block in all_code_blocks:
-            if isinstance(block, dict):
-                lang = block.get('language', 'unknown')
-                language_counter[lang] += 1
-        
-        # Find API pages without code examples
-        api_pages = self.get_api_pages()
-        api_without_examples = api_pages.filter(
-            Q(code_blocks__exact=[]) | Q(code_blocks__exact={})
-        )
-        
-        # Find tutorials without code
-        tutorials = self.get_tutorial_pages()
-        tutorials_without_code = tutorials.filter(
-            Q(code_blocks__exact=[]) | Q(code_blocks__exact={})
-        )
+        language_distribution = metrics.code_languages
         
         # Calculate code quality metrics
         code_quality = {
-            'total_code_blocks': len(all_code_blocks),
+            'total_code_blocks': metrics['total_code_blocks'],
             'pages_with_code': pages_with_code,
-            'pages_without_code': self.pages.count() - pages_with_code,
-            'language_distribution': dict(language_counter),
-            'api_pages_without_examples': api_without_examples.count(),
-            'tutorials_without_code': tutorials_without_code.count(),
-            'code_coverage_percentage': (pages_with_code / self.pages.count() * 100) if self.pages.count() > 0 else 0,
+            'pages_without_code': total_pages - pages_with_code,
+            'language_distribution': language_distribution,
+            'api_pages_without_examples': metrics['api_pages_without_examples'],
+            'tutorials_without_code': metrics['tutorials_without_code'],
+            'code_coverage_percentage': (pages_with_code / total_pages * 100) if total_pages > 0 else 0,
         }
         
         # Identify missing languages based on common requirements
         common_languages = ['python', 'javascript', 'java', 'go', 'ruby', 'php']
-        missing_languages = set(common_languages) - set(language_counter.keys())
+        missing_languages = set(common_languages) - set(language_distribution.keys())
         code_quality['missing_language_support'] = list(missing_languages)
         
         return code_quality
@@ -274,124 +361,61 @@ class DocumentationAnalyzer:
     def analyze_seo_opportunities(self) -> Dict[str, Any]:
         """Analyze SEO and discoverability issues"""
         
-        # Pages missing critical SEO elements
-        missing_title = self.pages.filter(Q(title='') | Q(title__isnull=True))
-        missing_meta = self.pages.filter(Q(meta_description='') | Q(meta_description__isnull=True))
-        
-        # Duplicate titles
-        duplicate_titles = self.pages.values('title').annotate(
-            count=Count('id')
-        ).filter(count__gt=1).exclude(title='')
-        
-        # Pages with very short meta descriptions
-        short_meta = self.pages.filter(
-            meta_description__isnull=False
-        ).exclude(
-            meta_description=''
-        ).annotate(
-            meta_length=Length('meta_description')
-        ).filter(meta_length__lt=50)
+        metrics = self.metrics
         
         # Find keyword opportunities
         keyword_gaps = self._analyze_keyword_gaps()
         
         # Calculate potential traffic impact
-        seo_impact = self._calculate_seo_impact(missing_meta.count() + missing_title.count())
+        seo_impact = self._calculate_seo_impact(metrics['missing_meta_descriptions'] + metrics['missing_titles'])
         
         return {
-            'missing_titles': missing_title.count(),
-            'missing_meta_descriptions': missing_meta.count(),
-            'duplicate_titles': len(duplicate_titles),
-            'short_meta_descriptions': short_meta.count(),
+            'missing_titles': metrics['missing_titles'],
+            'missing_meta_descriptions': metrics['missing_meta_descriptions'],
+            'duplicate_titles': metrics.duplicate_titles,
+            'short_meta_descriptions': metrics['short_meta_descriptions'],
             'keyword_gaps': keyword_gaps,
             'estimated_traffic_loss': seo_impact['traffic_loss'],
             'estimated_revenue_impact': seo_impact['revenue_impact'],
-            'pages_without_og_tags': self.pages.filter(og_tags__exact={}).count(),
+            'pages_without_og_tags': metrics['pages_without_og_tags'],
         }
     
     def analyze_api_completeness(self) -> Dict[str, Any]:
         """Analyze API documentation completeness"""
         
-        api_pages = self.get_api_pages()
-        
-        # Check for API essentials
-        has_auth_docs = api_pages.filter(
-            Q(url__icontains='auth') | 
-            Q(title__icontains='authentication') |
-            Q(main_content__icontains='authentication')
-        ).exists()
-        
-        has_error_docs = api_pages.filter(
-            Q(url__icontains='error') | 
-            Q(title__icontains='error') |
-            Q(main_content__icontains='error handling')
-        ).exists()
-        
-        has_rate_limit_docs = api_pages.filter(
-            Q(main_content__icontains='rate limit') |
-            Q(main_content__icontains='throttl')
-        ).exists()
-        
-        # Find endpoints
-        endpoints_found = []
-        for page in api_pages:
-            if page.api_endpoints:
-                endpoints_found.extend(page.api_endpoints)
-        
-        # Check endpoint documentation quality
-        endpoints_without_examples = 0
-        endpoints_without_parameters = 0
-        
-        for page in api_pages:
-            if page.api_endpoints and not page.has_examples:
-                endpoints_without_examples += len(page.api_endpoints)
-            if page.api_endpoints and not page.parameters:
-                endpoints_without_parameters += len(page.api_endpoints)
+        metrics = self.metrics
         
         return {
-            'total_api_pages': api_pages.count(),
-            'has_authentication_docs': has_auth_docs,
-            'has_error_handling_docs': has_error_docs,
-            'has_rate_limiting_docs': has_rate_limit_docs,
-            'total_endpoints_documented': len(endpoints_found),
-            'endpoints_without_examples': endpoints_without_examples,
-            'endpoints_without_parameters': endpoints_without_parameters,
-            'api_completeness_score': self._calculate_api_completeness_score(api_pages),
+            'total_api_pages': metrics['total_api_pages'],
+            'has_authentication_docs': metrics['api_auth_pages'] > 0,
+            'has_error_handling_docs': metrics['api_error_pages'] > 0,
+            'has_rate_limiting_docs': metrics['api_rate_limit_pages'] > 0,
+            'total_endpoints_documented': metrics['total_endpoints_documented'],
+            'endpoints_without_examples': metrics['endpoints_without_examples'],
+            'endpoints_without_parameters': metrics['endpoints_without_parameters'],
+            'api_completeness_score': self._calculate_api_completeness_score(),
         }
     
     def analyze_performance_issues(self) -> Dict[str, Any]:
         """Analyze page performance and technical issues"""
         
-        # Slow pages
-        slow_pages = self.pages.filter(
-            response_time__gt=self.config['max_response_time']
-        )
-        
-        # Large pages
-        large_pages = self.pages.filter(
-            page_size__gt=500000  # > 500KB
-        )
-        
-        # JavaScript-rendered pages (potential performance issue)
-        js_rendered = self.pages.filter(render_method='javascript')
+        metrics = self.metrics
         
         # Failed pages from crawl errors
-        crawl_errors = self.job.errors.all() if hasattr(self.job, 'errors') else []
-        
-        # Response time statistics
-        response_stats = self.pages.aggregate(
-            avg_response=Avg('response_time'),
-            max_response=Max('response_time'),
-            min_response=Min('response_time')
-        )
+        crawl_errors = self.job.errors.count() if hasattr(self.job, 'errors') else 0
         
         return {
-            'slow_pages': slow_pages.count(),
-            'large_pages': large_pages.count(),
-            'javascript_rendered_pages': js_rendered.count(),
-            'crawl_errors': len(crawl_errors),
-            'response_time_stats': response_stats,
-            'performance_impact': self._calculate_performance_impact(slow_pages),
+            'slow_pages': metrics['slow_pages'],
+            'large_pages': metrics['large_pages'],
+            # JavaScript-rendered pages (potential performance issue)
+            'javascript_rendered_pages': metrics['javascript_rendered_pages'],
+            'crawl_errors': crawl_errors,
+            'response_time_stats': {
+                'avg_response': metrics['avg_response'],
+                'max_response': metrics['max_response'],
+                'min_response': metrics['min_response'],
+            },
+            'performance_impact': self._calculate_performance_impact(metrics['slow_pages']),
         }
     
     # ==========================================
@@ -436,7 +460,7 @@ class DocumentationAnalyzer:
         if content_quality['pages_without_examples'] > 15:
             affected = self.pages.filter(
                 has_examples=False,
-                doc_type__in=['tutorial', 'guide', 'api_reference']
+                doc_type__in=EXAMPLE_DOC_TYPES
             )
             self.insights.append(Insight(
                 type='opportunity',
@@ -447,7 +471,7 @@ class DocumentationAnalyzer:
                 effort='medium',
                 priority=8,
                 affected_pages=list(affected.values_list('url', flat=True)[:10]),
-                estimated_value=affected.count() * 500  # $500 value per improved page
+                estimated_value=content_quality['pages_without_examples'] * 500  # $500 value per improved page
             ))
     
     def _generate_navigation_insights(self, nav_structure: Dict):
@@ -490,9 +514,7 @@ class DocumentationAnalyzer:
         
         # Critical: API pages without examples
         if code_coverage['api_pages_without_examples'] > 10:
-            api_pages_affected = self.get_api_pages().filter(
-                Q(code_blocks__exact=[]) | Q(code_blocks__exact={})
-            )
+            api_pages_affected = self.get_api_pages().filter(no_code_blocks())
             
             self.insights.append(Insight(
                 type='critical',
@@ -534,7 +556,7 @@ class DocumentationAnalyzer:
                 effort='low',
                 priority=9,
                 affected_pages=list(self.pages.filter(
-                    Q(meta_description='') | Q(meta_description__isnull=True)
+                    missing_meta_description()
                 ).values_list('url', flat=True)[:10]),
                 estimated_value=seo_data['estimated_revenue_impact']
             ))
@@ -612,7 +634,7 @@ class DocumentationAnalyzer:
         total_value = sum(i.estimated_value for i in self.insights if i.estimated_value)
         
         return {
-            'total_pages_analyzed': self.pages.count(),
+            'total_pages_analyzed': self.metrics['total_pages'],
             'critical_issues_found': len(critical_issues),
             'quick_wins_available': len(quick_wins),
             'total_insights': len(self.insights),
@@ -718,12 +740,12 @@ class DocumentationAnalyzer:
         # Ensure score stays in bounds
         return max(0, min(100, score))
     
-    def _calculate_support_impact(self, problematic_pages) -> float:
+    def _calculate_support_impact(self, problematic_pages: int) -> float:
         """Calculate estimated support cost impact"""
         
         # Estimate: Each problematic page generates 2 support tickets per month
         # Each ticket costs $50 to resolve
-        monthly_tickets = problematic_pages.count() * 2
+        monthly_tickets = problematic_pages * 2
         annual_cost = monthly_tickets * 12 * self.config['support_ticket_cost']
         
         return annual_cost
@@ -744,11 +766,11 @@ class DocumentationAnalyzer:
             'revenue_impact': revenue_impact
         }
     
-    def _calculate_performance_impact(self, slow_pages) -> str:
+    def _calculate_performance_impact(self, slow_pages: int) -> str:
         """Calculate the impact of slow pages"""
         
         # 40% of users abandon pages that take > 3 seconds
-        affected_pages = slow_pages.count()
+        affected_pages = slow_pages
         estimated_abandonment = affected_pages * 100 * 0.4  # 100 visits per page per month
         
         return f"{estimated_abandonment:.0f} users/month abandoning due to slow load times"
@@ -756,11 +778,11 @@ class DocumentationAnalyzer:
     def _calculate_navigation_health(self) -> int:
         """Calculate navigation health score"""
         
-        total_pages = self.pages.count()
+        total_pages = self.metrics['total_pages']
         if total_pages == 0:
             return 0
         
-        orphaned = self.pages.filter(internal_links__exact=[]).count()
+        orphaned = self.metrics['pages_without_links']
         orphaned_percentage = (orphaned / total_pages) * 100
         
         # Score from 0-100, lower percentage of orphans = higher score
@@ -768,24 +790,20 @@ class DocumentationAnalyzer:
         
         return score
     
-    def _calculate_api_completeness_score(self, api_pages) -> int:
+    def _calculate_api_completeness_score(self) -> int:
         """Calculate API documentation completeness score"""
         
-        if api_pages.count() == 0:
+        total_api_pages = self.metrics['total_api_pages']
+        if total_api_pages == 0:
             return 0
         
         score = 100
         
         # Check for essential documentation
-        has_auth = api_pages.filter(
-            Q(url__icontains='auth') | Q(main_content__icontains='authentication')
-        ).exists()
-        
-        has_errors = api_pages.filter(
-            Q(main_content__icontains='error') | Q(main_content__icontains='status code')
-        ).exists()
+        has_auth = self.metrics['api_score_auth_pages'] > 0
+        has_errors = self.metrics['api_score_error_pages'] > 0
         
-        has_examples = api_pages.filter(has_examples=True).count() / api_pages.count()
+        has_examples = self.metrics['api_pages_with_examples'] / total_api_pages
         
         if not has_auth:
             score -= 30
@@ -797,27 +815,9 @@ class DocumentationAnalyzer:
         
         return max(0, score)
     
-    def _find_circular_references(self) -> List[Tuple[str, str]]:
-        """Find pages that link to each other in circles"""
-        # Simplified implementation - in production you'd want graph traversal
-        circular_refs = []
-        
-        relationships = PageRelationship.objects.filter(
-            from_page__job=self.job,
-            to_page__job=self.job
-        )
-        
-        for rel in relationships[:100]:  # Limit to prevent long processing
-            # Check if there's a reverse relationship
-            reverse_exists = PageRelationship.objects.filter(
-                from_page=rel.to_page,
-                to_page=rel.from_page
-            ).exists()
-            
-            if reverse_exists:
-                circular_refs.append((rel.from_page.url, rel.to_page.url))
-        
-        return circular_refs[:10]  # Return first 10 circular references
+    def _find_circular_references(self) -> Dict[str, Any]:
+        """Find pages that link to each other in circles (mutual links and link cycle clusters)"""
+        return LinkGraph(self.job).circular_reference_report()
     
     def _analyze_keyword_gaps(self) -> Dict[str, Any]:
         """Analyze keyword gaps (simplified version)"""
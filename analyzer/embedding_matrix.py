@@ -0,0 +1,365 @@
+# analyzer/embedding_matrix.py
+
+"""
+On-disk embedding matrices for TaxonomyBuilder.
+
+Building a 1536-d matrix from JSON lists on every ``build_taxonomy`` run
+means fetching and parsing every page's embeddings, which takes minutes on
+100k pages. Instead each client and embedding field keeps two files under
+``TAXONOMY_MATRIX_CACHE_DIR/client_<id>/``:
+
+* ``<field>.npy`` - float32 rows, opened with ``mmap_mode='r'`` so loading
+  costs nothing until rows are read
+* ``<field>.json`` - sidecar index: the page behind each row (``None`` once
+  the row is stale), per-row extras from the embedding JSON (section
+  heading, learning objective texts) and the ``updated_at`` of each page
+  when it was last read
+
+``sync()`` reads only pages whose ``updated_at`` moved since the last sync
+(every embedding write bumps it). Their new rows are appended to the file in
+place. Rows of re-embedded or deleted pages are marked stale, and the file
+is compacted once stale rows pass a quarter of it.
+
+Page fields such as title or topics are not cached here. TaxonomyBuilder
+reads them with a ``values()`` projection on each run.
+"""
+
+import json
+import logging
+import os
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger('analyzer')
+
+INDEX_VERSION = 1
+EMBEDDING_FIELDS = ('learning_objective_embeddings', 'page_embedding', 'section_embeddings')
+
+# Pages read per query round trip; their rows are appended to disk after each chunk
+SYNC_CHUNK_SIZE = 500
+# Compact the matrix once this share of its rows is stale
+COMPACT_STALE_FRACTION = 0.25
+COMPACT_CHUNK_ROWS = 10000
+# Pages updated this long before the last seen ``updated_at`` are checked
+# again, in case a slower transaction committed an older timestamp after it
+SYNC_OVERLAP = timedelta(minutes=5)
+
+
+def embedding_rows(embedding_field: str, value) -> List[Tuple[np.ndarray, Dict[str, Any]]]:
+    """(vector, extras) for each matrix row one page's embedding JSON produces."""
+    if embedding_field == 'learning_objective_embeddings':
+        # One row per page: the mean of its learning objective embeddings
+        objectives = value or []
+        vectors = [lo.get('embedding', []) for lo in objectives if lo.get('embedding')]
+        if not vectors:
+            return []
+        return [(np.mean(vectors, axis=0), {
+            'learning_objectives': [lo.get('objective', '') for lo in objectives],
+            'num_los': len(vectors),
+        })]
+
+    if embedding_field == 'page_embedding':
+        return [(np.asarray(value), {})] if value else []
+
+    if embedding_field == 'section_embeddings':
+        return [
+            (np.asarray(section['embedding']), {
+                'section_heading': section.get('heading', ''),
+                'section_index': section.get('index', 0),
+            })
+            for section in value or []
+            if section.get('embedding')
+        ]
+
+    raise ValueError(f"Unknown embedding field: {embedding_field}")
+
+
+class EmbeddingMatrix:
+    """
+    Cached embedding rows for one client and embedding field.
+
+    After ``sync()``, ``vectors`` is the memory-mapped matrix, and
+    ``page_ids`` and ``extras`` describe its rows. Stale rows have page id
+    ``None``; use ``rows_for_pages`` to pick live rows.
+    """
+
+    def __init__(self, client_id: int, embedding_field: str, cache_dir: Optional[str] = None):
+        if embedding_field not in EMBEDDING_FIELDS:
+            raise ValueError(f"Unknown embedding field: {embedding_field}")
+        self.client_id = client_id
+        self.embedding_field = embedding_field
+        directory = Path(cache_dir or settings.TAXONOMY_MATRIX_CACHE_DIR) / f'client_{client_id}'
+        self.matrix_path = directory / f'{embedding_field}.npy'
+        self.index_path = directory / f'{embedding_field}.json'
+
+        self.index = None
+        self.vectors = None
+
+    @property
+    def page_ids(self) -> List[Optional[int]]:
+        return self.index['page_ids']
+
+    @property
+    def extras(self) -> List[Dict[str, Any]]:
+        return self.index['extras']
+
+    def rows_for_pages(self, page_ids: Iterable[int]) -> np.ndarray:
+        """Row numbers of the live rows of the given pages, in row order."""
+        wanted = set(page_ids)
+        return np.fromiter(
+            (row for row, page_id in enumerate(self.page_ids) if page_id in wanted), dtype=np.int64,
+        )
+
+    def sync(self, rebuild: bool = False, dim: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Bring the cached matrix up to date with the database and map it.
+
+        Args:
+            rebuild: Discard the cache and read every page again
+            dim: Vector size to keep when rebuilding (default: the first seen)
+
+        Returns:
+            Counts of pages read, rows appended and stale, and whether the
+            file was compacted or rebuilt
+        """
+        from crawler.models import CrawledPage
+
+        index = None if rebuild else self._read_index()
+        if index is None:
+            rebuild = True
+            index = self._new_index(dim)
+            self._remove_files()
+
+        pages = CrawledPage.objects.filter(client_id=self.client_id)
+        changed = pages.order_by()
+        if index['updated']:
+            changed = changed.filter(updated_at__gt=datetime.fromisoformat(index['updated']) - SYNC_OVERLAP)
+
+        rows_by_page = defaultdict(list)
+        for row, page_id in enumerate(index['page_ids']):
+            if page_id is not None:
+                rows_by_page[page_id].append(row)
+
+        # Deleted pages
+        current_ids = set(pages.values_list('id', flat=True))
+        stale_pages = {page_id for page_id in rows_by_page if page_id not in current_ids}
+        deleted = 0
+        for known in (index['pages'], index['skipped']):
+            for key in [key for key in known if int(key) not in current_ids]:
+                del known[key]
+                deleted += 1
+
+        stats = {'read_pages': 0, 'appended_rows': 0, 'stale_rows': 0, 'compacted': False, 'rebuilt': rebuild}
+        vectors, page_ids, extras = [], [], []
+
+        def flush():
+            if vectors:
+                self._append_rows(np.vstack(vectors).astype(np.float32, copy=False))
+                stats['appended_rows'] += len(vectors)
+                index['page_ids'].extend(page_ids)
+                index['extras'].extend(extras)
+                vectors.clear()
+                page_ids.clear()
+                extras.clear()
+
+        # Timestamps first; embeddings only for pages not read at that timestamp
+        last_updated = index['updated']
+        latest = last_updated and datetime.fromisoformat(last_updated)
+        to_read = []
+        for page_id, updated_at in changed.values_list('id', 'updated_at').iterator(chunk_size=10 * SYNC_CHUNK_SIZE):
+            if not latest or updated_at > latest:
+                latest = updated_at
+            stamp = updated_at.isoformat()
+            if index['pages'].get(str(page_id)) != stamp:
+                to_read.append((page_id, stamp))
+        index['updated'] = latest and latest.isoformat()
+
+        for start in range(0, len(to_read), SYNC_CHUNK_SIZE):
+            stamps = dict(to_read[start:start + SYNC_CHUNK_SIZE])
+            for page_id, value in pages.filter(id__in=stamps).values_list('id', self.embedding_field):
+                key = str(page_id)
+                stats['read_pages'] += 1
+                if page_id in rows_by_page:
+                    stale_pages.add(page_id)
+                index['pages'][key] = stamps[page_id]
+                index['skipped'].pop(key, None)
+
+                rows = embedding_rows(self.embedding_field, value)
+                if rows and index['dim'] is None:
+                    index['dim'] = len(rows[0][0])
+                kept = [(vector, extra) for vector, extra in rows if len(vector) == index['dim']]
+                if len(kept) < len(rows):
+                    # Vectors from another embedding provider
+                    index['skipped'][key] = len(rows[0][0])
+                for vector, extra in kept:
+                    vectors.append(vector)
+                    page_ids.append(page_id)
+                    extras.append(extra)
+            flush()
+
+        for page_id in stale_pages:
+            for row in rows_by_page[page_id]:
+                index['page_ids'][row] = None
+        index['stale_rows'] = index['page_ids'].count(None)
+        stats['stale_rows'] = index['stale_rows']
+
+        if index['stale_rows'] > COMPACT_STALE_FRACTION * len(index['page_ids']):
+            self._compact(index)
+            stats['compacted'] = True
+
+        # Vectors of another size that now outnumber the cached ones were
+        # re-embedded with a new provider: start over with their size
+        if index['skipped']:
+            sizes = Counter(index['skipped'].values())
+            size, pages_of_size = sizes.most_common(1)[0]
+            pages_with_rows = len(set(index['page_ids']) - {None})
+            if pages_of_size > pages_with_rows and dim is None:
+                logger.info(
+                    f"[EmbeddingMatrix] Client {self.client_id}: {pages_of_size} pages now have dim {size} "
+                    f"embeddings, rebuilding {self.embedding_field}"
+                )
+                return self.sync(rebuild=True, dim=size)
+            logger.warning(
+                f"[EmbeddingMatrix] Mixed embedding sizes: {len(index['skipped'])} pages with dim "
+                f"{dict(sizes)} left out, keeping dim {index['dim']}. "
+                f"Re-run generate_embeddings --force with one provider."
+            )
+
+        if rebuild or deleted or stats['read_pages'] or index['updated'] != last_updated:
+            self._write_index(index)
+        self.index = index
+        self._map()
+
+        stats['rows'] = len(index['page_ids']) - index['stale_rows']
+        logger.info(
+            f"[EmbeddingMatrix] Client {self.client_id} {self.embedding_field}: {stats['rows']} rows "
+            f"(read {stats['read_pages']} pages, appended {stats['appended_rows']} rows"
+            f"{', compacted' if stats['compacted'] else ''}{', rebuilt' if rebuild else ''})"
+        )
+        return stats
+
+    def _new_index(self, dim: Optional[int]) -> Dict[str, Any]:
+        return {
+            'version': INDEX_VERSION,
+            'client_id': self.client_id,
+            'embedding_field': self.embedding_field,
+            'dim': dim,
+            'updated': None,     # Latest page updated_at read
+            'page_ids': [],      # Per row; None when stale
+            'extras': [],        # Per row
+            'stale_rows': 0,
+            'pages': {},         # Page id -> updated_at when last read
+            'skipped': {},       # Page id -> size, for pages with vectors of another size
+        }
+
+    def _read_index(self) -> Optional[Dict[str, Any]]:
+        """
+        The sidecar index, or None when missing or out of step with the matrix.
+
+        sync() appends each chunk's rows to the matrix before it writes the
+        index, so a run that dies in between leaves rows the index does not
+        list; such a matrix is rebuilt.
+        """
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if index.get('version') != INDEX_VERSION or index.get('embedding_field') != self.embedding_field:
+            return None
+        rows = len(index['page_ids'])
+        if not rows:
+            if self.matrix_path.exists():
+                logger.warning(f"[EmbeddingMatrix] {self.matrix_path} has rows its empty index does not list, rebuilding")
+                return None
+            return index
+        try:
+            shape = np.load(self.matrix_path, mmap_mode='r').shape
+        except (OSError, ValueError):
+            return None
+        if shape != (rows, index['dim']):
+            # e.g. interrupted while appending
+            logger.warning(f"[EmbeddingMatrix] {self.matrix_path} does not match its index, rebuilding")
+            return None
+        return index
+
+    def _write_index(self, index: Dict[str, Any]):
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, separators=(',', ':'))
+        os.replace(tmp_path, self.index_path)
+
+    def _remove_files(self):
+        for path in (self.matrix_path, self.index_path):
+            if path.exists():
+                path.unlink()
+
+    def _map(self):
+        if self.index['page_ids']:
+            self.vectors = np.load(self.matrix_path, mmap_mode='r')
+        else:
+            self.vectors = np.empty((0, self.index['dim'] or 0), dtype=np.float32)
+
+    def _append_rows(self, rows: np.ndarray):
+        """Append rows to the .npy file, rewriting only its header."""
+        if not self.matrix_path.exists():
+            self.matrix_path.parent.mkdir(parents=True, exist_ok=True)
+            np.save(self.matrix_path, rows)
+            return
+
+        with open(self.matrix_path, 'r+b') as fp:
+            version = np.lib.format.read_magic(fp)
+            in_place = version == (1, 0)
+            if in_place:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(fp)
+                data_start = fp.tell()
+
+                # np.save leaves room in the header for the row count to grow
+                header = BytesIO()
+                np.lib.format.write_array_header_1_0(header, {
+                    'descr': np.lib.format.dtype_to_descr(dtype),
+                    'fortran_order': fortran_order,
+                    'shape': (shape[0] + len(rows), shape[1]),
+                })
+                in_place = header.tell() == data_start and not fortran_order
+
+            if in_place:
+                fp.seek(data_start + shape[0] * shape[1] * dtype.itemsize)
+                fp.truncate()
+                fp.write(np.ascontiguousarray(rows, dtype=dtype).tobytes())
+                fp.seek(0)
+                fp.write(header.getvalue())
+                return
+
+        existing = np.load(self.matrix_path)
+        np.save(self.matrix_path, np.concatenate([existing, rows]))
+
+    def _compact(self, index: Dict[str, Any]):
+        """Rewrite the matrix without its stale rows."""
+        live = [row for row, page_id in enumerate(index['page_ids']) if page_id is not None]
+        if live:
+            existing = np.load(self.matrix_path, mmap_mode='r')
+            tmp_path = self.matrix_path.with_suffix('.npy.tmp')
+            compacted = np.lib.format.open_memmap(
+                tmp_path, mode='w+', dtype=np.float32, shape=(len(live), existing.shape[1]),
+            )
+            for start in range(0, len(live), COMPACT_CHUNK_ROWS):
+                chunk = live[start:start + COMPACT_CHUNK_ROWS]
+                compacted[start:start + len(chunk)] = existing[chunk]
+            compacted.flush()
+            del compacted, existing
+            os.replace(tmp_path, self.matrix_path)
+        elif self.matrix_path.exists():
+            self.matrix_path.unlink()
+
+        index['page_ids'] = [index['page_ids'][row] for row in live]
+        index['extras'] = [index['extras'][row] for row in live]
+        index['stale_rows'] = 0
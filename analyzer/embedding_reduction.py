@@ -0,0 +1,89 @@
+# analyzer/embedding_reduction.py
+
+"""
+Optional dimensionality reduction before taxonomy clustering.
+
+Clustering raw 1536-d embeddings makes every distance cost 1536 flops,
+and it keeps DBSCAN on brute-force cosine neighbour search. ``reduce_embeddings``
+projects the vectors to a smaller dimension and L2-normalises them:
+
+* ``pca`` - principal components (randomised solver), centred
+* ``svd`` - truncated SVD (randomised), uncentred
+* ``random`` - Gaussian random projection: no fit, distances kept
+  approximately (Johnson-Lindenstrauss)
+
+PCA and SVD are fitted on a sample of at most ``REDUCTION_FIT_SAMPLE`` rows.
+All rows are then projected in chunks, so the full matrix (possibly a
+memory map) is never copied at float64.
+
+On unit vectors, Euclidean distance and cosine distance order neighbours
+the same way (|a - b|² = 2(1 - cos)). KMeans and ward therefore cluster
+by angle, and DBSCAN can use tree-based Euclidean search.
+"""
+
+import logging
+
+import numpy as np
+from sklearn.decomposition import PCA, TruncatedSVD
+from sklearn.preprocessing import normalize
+from sklearn.random_projection import GaussianRandomProjection
+
+logger = logging.getLogger('analyzer')
+
+REDUCTION_METHODS = ('pca', 'svd', 'random')
+
+# Rows the PCA/SVD basis is fitted on; the rest are only projected
+REDUCTION_FIT_SAMPLE = 20000
+# Rows projected per transform call
+TRANSFORM_CHUNK_SIZE = 10000
+
+
+def reduce_embeddings(X: np.ndarray, method: str, dim: int, random_state: int = 42) -> np.ndarray:
+    """
+    Project embeddings to ``dim`` dimensions and L2-normalise them.
+
+    Args:
+        X: Vectors, one per row
+        method: 'pca', 'svd' or 'random'
+        dim: Target dimension; at or above the input's, rows are only normalised
+        random_state: Seed for the fit sample and the solvers
+
+    Returns:
+        float32 array of shape (len(X), min(dim, X.shape[1]))
+    """
+    if method not in REDUCTION_METHODS:
+        raise ValueError(f"Unknown reduction method: {method}")
+
+    n_rows, n_features = X.shape
+    if dim >= n_features:
+        logger.info(f"[EmbeddingReduction] {n_features}-d vectors are not above {dim}; normalising only")
+        return normalize(np.asarray(X, dtype=np.float32))
+
+    rng = np.random.default_rng(random_state)
+    sample = np.sort(rng.choice(n_rows, size=min(n_rows, REDUCTION_FIT_SAMPLE), replace=False))
+    fit_rows = np.asarray(X[sample], dtype=np.float32)
+
+    if method == 'pca':
+        reducer = PCA(n_components=min(dim, len(sample)), svd_solver='randomized', random_state=random_state)
+    elif method == 'svd':
+        reducer = TruncatedSVD(n_components=min(dim, len(sample)), algorithm='randomized', random_state=random_state)
+    else:
+        # Only the input width is used; the projection matrix is drawn, not fitted
+        reducer = GaussianRandomProjection(n_components=dim, random_state=random_state)
+    reducer.fit(fit_rows)
+
+    reduced = np.empty((n_rows, reducer.n_components), dtype=np.float32)
+    for start in range(0, n_rows, TRANSFORM_CHUNK_SIZE):
+        chunk = np.asarray(X[start:start + TRANSFORM_CHUNK_SIZE], dtype=np.float32)
+        reduced[start:start + len(chunk)] = reducer.transform(chunk)
+    normalize(reduced, copy=False)
+
+    if method in ('pca', 'svd'):
+        explained = float(np.sum(reducer.explained_variance_ratio_))
+        logger.info(
+            f"[EmbeddingReduction] {method}: {n_features} -> {reducer.n_components} dims, "
+            f"{explained:.0%} of variance kept"
+        )
+    else:
+        logger.info(f"[EmbeddingReduction] random projection: {n_features} -> {reducer.n_components} dims")
+    return reduced
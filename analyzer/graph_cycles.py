@@ -0,0 +1,107 @@
+# analyzer/graph_cycles.py
+
+"""
+Cycle breaking for directed graphs (the taxonomy prerequisite graph).
+
+Enumerating cycles (``nx.simple_cycles``) is exponential in the worst case,
+and a dense concept graph has that many. ``feedback_arc_set`` instead
+returns a set of edges whose removal leaves the graph acyclic, in
+O((V + E) log V):
+
+* Every cycle lies inside one strongly connected component, so only
+  components with more than one node are looked at. Edges between
+  components are never removed.
+* Each component is ordered with the greedy heuristic of Eades, Lin and
+  Smyth, weighted: sinks go to the end, sources to the front, and
+  otherwise the node with the largest (out-weight - in-weight) goes next.
+  The edges that point backwards in that order form the feedback arc set.
+  They tend to be few and light, though not provably minimal, because
+  nodes whose outgoing weight dominates are placed first.
+"""
+
+import heapq
+from typing import Dict, Hashable, List, Set, Tuple
+
+import networkx as nx
+
+Edge = Tuple[Hashable, Hashable]
+
+
+def feedback_arc_set(G: nx.DiGraph, weight: str = 'weight', default_weight: float = 1) -> List[Edge]:
+    """
+    Edges of G whose removal makes it acyclic; G is not modified.
+
+    Args:
+        G: Directed graph
+        weight: Edge attribute to keep heavy edges by
+        default_weight: Weight of edges without the attribute
+
+    Returns:
+        (u, v) edges, self-loops included
+    """
+    node_index = {node: i for i, node in enumerate(G)}
+    removed = list(nx.selfloop_edges(G))
+    for component in nx.strongly_connected_components(G):
+        if len(component) > 1:
+            removed.extend(_component_feedback_arcs(G, component, node_index, weight, default_weight))
+    return removed
+
+
+def _component_feedback_arcs(G: nx.DiGraph, component: Set, node_index: Dict, weight: str,
+                             default_weight: float) -> List[Edge]:
+    successors = {node: {} for node in component}
+    predecessors = {node: {} for node in component}
+    for u in component:
+        for v, data in G.adj[u].items():
+            if v in component and v != u:
+                successors[u][v] = predecessors[v][u] = data.get(weight, default_weight)
+    out_weight = {node: sum(edges.values()) for node, edges in successors.items()}
+    in_weight = {node: sum(edges.values()) for node, edges in predecessors.items()}
+    out_degree = {node: len(edges) for node, edges in successors.items()}
+    in_degree = {node: len(edges) for node, edges in predecessors.items()}
+
+    # Max-heap on out - in weight with lazy deletion; the node index breaks ties deterministically
+    heap = [(in_weight[node] - out_weight[node], node_index[node], node) for node in component]
+    heapq.heapify(heap)
+    remaining = set(component)
+    front, back = [], []
+
+    def take(node):
+        remaining.discard(node)
+        for v, w in successors[node].items():
+            if v in remaining:
+                in_weight[v] -= w
+                in_degree[v] -= 1
+                if in_degree[v] == 0:
+                    sources.append(v)
+                heapq.heappush(heap, (in_weight[v] - out_weight[v], node_index[v], v))
+        for u, w in predecessors[node].items():
+            if u in remaining:
+                out_weight[u] -= w
+                out_degree[u] -= 1
+                if out_degree[u] == 0:
+                    sinks.append(u)
+                heapq.heappush(heap, (in_weight[u] - out_weight[u], node_index[u], u))
+
+    sinks, sources = [], []
+    while remaining:
+        while sinks or sources:
+            while sinks:
+                node = sinks.pop()
+                if node in remaining:
+                    back.append(node)
+                    take(node)
+            while sources:
+                node = sources.pop()
+                if node in remaining:
+                    front.append(node)
+                    take(node)
+        while heap:
+            key, _, node = heapq.heappop(heap)
+            if node in remaining and key == in_weight[node] - out_weight[node]:
+                front.append(node)
+                take(node)
+                break
+
+    position = {node: i for i, node in enumerate(front + back[::-1])}
+    return [(u, v) for u in component for v in successors[u] if position[u] > position[v]]
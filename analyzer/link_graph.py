@@ -0,0 +1,124 @@
+# analyzer/link_graph.py
+
+"""
+Internal link graph analysis for a crawl job.
+
+All ``PageRelationship`` edges between a job's pages are loaded once into
+a SciPy sparse adjacency matrix, then:
+
+* mutual links (A -> B and B -> A) are the non-zeros of ``A ∘ Aᵀ``
+* link cycles are the strongly connected components with more than one
+  page (``scipy.sparse.csgraph``, linear in pages + edges); every cycle
+  lies inside one, so the components are reported as cycle clusters,
+  largest first
+
+Both run in seconds on a million edges; the edge load dominates.
+"""
+
+import logging
+from typing import Any, Dict, List
+
+import numpy as np
+from scipy.sparse import csr_matrix, triu
+from scipy.sparse.csgraph import connected_components
+from django.db import connections
+
+from crawler.models import CrawledPage, PageRelationship
+
+logger = logging.getLogger('analyzer')
+
+# Rows fetched per round trip when loading edges
+EDGE_CHUNK_SIZE = 10000
+
+
+class LinkGraph:
+    """
+    Directed page link graph for one job.
+
+    Pages without links in or out are left out, so ``page_ids`` only holds
+    pages that take part in at least one edge.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        # Filtering on both ends in SQL joins the page table twice; when the
+        # job's page count is underestimated (fresh crawl, stale statistics)
+        # the planner turns that into a pages x pages nested loop. Join the
+        # source side only and keep in-job targets here.
+        edges = PageRelationship.objects.filter(from_page__job=job).values_list('from_page_id', 'to_page_id')
+        job_page_ids = np.fromiter(job.pages.values_list('id', flat=True).iterator(), dtype=np.int64)
+
+        # A plain cursor rather than .iterator(): server-side cursors are also
+        # planned for fast first rows
+        sql, params = edges.query.sql_with_params()
+        chunks = []
+        with connections[edges.db].cursor() as cursor:
+            cursor.execute(sql, params)
+            while rows := cursor.fetchmany(EDGE_CHUNK_SIZE):
+                chunks.append(np.array(rows, dtype=np.int64))
+        pairs = np.concatenate(chunks) if chunks else np.empty((0, 2), dtype=np.int64)
+        pairs = pairs[np.isin(pairs[:, 1], job_page_ids)]
+
+        # Dense 0..n-1 index per page id
+        self.page_ids, index = np.unique(pairs, return_inverse=True)
+        index = index.reshape(-1, 2)
+        size = len(self.page_ids)
+        matrix = csr_matrix(
+            (np.ones(len(index), dtype=np.int8), (index[:, 0], index[:, 1])), shape=(size, size),
+        )
+        matrix.data[:] = 1  # Repeated relationships collapse into one edge
+        matrix.setdiag(0)
+        matrix.eliminate_zeros()
+        self.adjacency = matrix
+
+    @property
+    def edge_count(self) -> int:
+        return self.adjacency.nnz
+
+    def mutual_links(self) -> np.ndarray:
+        """Page id pairs (a, b), a < b by index, that link to each other."""
+        mutual = triu(self.adjacency.multiply(self.adjacency.T), k=1).tocoo()
+        return np.column_stack((self.page_ids[mutual.row], self.page_ids[mutual.col]))
+
+    def cycle_clusters(self) -> List[np.ndarray]:
+        """Page ids of each strongly connected component with a cycle, largest first."""
+        if not len(self.page_ids):
+            return []
+        _, labels = connected_components(self.adjacency, directed=True, connection='strong')
+        sizes = np.bincount(labels)
+        cyclic = np.flatnonzero(sizes > 1)
+        cyclic = cyclic[np.argsort(-sizes[cyclic], kind='stable')]
+
+        order = np.argsort(labels, kind='stable')
+        starts = np.concatenate(([0], np.cumsum(sizes)))
+        return [self.page_ids[order[starts[label]:starts[label + 1]]] for label in cyclic]
+
+    def circular_reference_report(self, max_clusters: int = 10, sample_size: int = 5) -> Dict[str, Any]:
+        """Mutual links and cycle clusters, with sample URLs for the top clusters."""
+        mutual = self.mutual_links()
+        clusters = self.cycle_clusters()
+
+        top_clusters = clusters[:max_clusters]
+        sample_pairs = mutual[:sample_size]
+        sample_ids = set(sample_pairs.ravel().tolist())
+        for cluster in top_clusters:
+            sample_ids.update(cluster[:sample_size].tolist())
+        urls = dict(CrawledPage.objects.filter(id__in=sample_ids).values_list('id', 'url'))
+
+        logger.info(
+            f"[LinkGraph] Job {self.job.id}: {len(self.page_ids)} pages, {self.edge_count} links, "
+            f"{len(mutual)} mutual pairs, {len(clusters)} cycle clusters"
+        )
+        return {
+            'mutual_links': len(mutual),
+            'mutual_links_sample': [(urls.get(a), urls.get(b)) for a, b in sample_pairs.tolist()],
+            'cycle_clusters': len(clusters),
+            'pages_in_cycles': int(sum(len(cluster) for cluster in clusters)),
+            'largest_cycle_clusters': [
+                {
+                    'size': len(cluster),
+                    'sample_pages': [urls.get(page_id) for page_id in cluster[:sample_size].tolist()],
+                }
+                for cluster in top_clusters
+            ],
+        }
@@ -1,9 +1,13 @@
 # analyzer/management/commands/analyze.py
 
+from contextlib import nullcontext
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
-from analyzer.documentation_analyzer import DocumentationAnalyzer
+from analyzer.documentation_analyzer import SECTIONS
 from analyzer.quick_analyzer import QuickAnalyzer
+from analyzer.result_cache import load_or_generate_analysis
 try:
     from analyzer.report_generator import ReportGenerator
 except ImportError:
@@ -39,11 +43,39 @@ class Command(BaseCommand):
             type=str,
             help='Email address to send the report to'
         )
-        parser.add_argument(
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument(
             '--quick',
             action='store_true',
             help='Run quick analysis (skip detailed checks)'
         )
+        mode.add_argument(
+            '--full',
+            action='store_true',
+            help='Run the full analysis (the default), all sections in parallel'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=len(SECTIONS),
+            help=f'Analysis sections to run at once in full analysis; 1 runs them one after another (default: {len(SECTIONS)})'
+        )
+        parser.add_argument(
+            '--refresh',
+            action='store_true',
+            help='Recompute the full analysis even if a stored result for unchanged data exists'
+        )
+        parser.add_argument(
+            '--time-budget',
+            type=float,
+            help='Seconds to spend on full analysis; queries still running are cancelled and their sections left out of the report'
+        )
+        parser.add_argument(
+            '--show-queries',
+            action='store_true',
+            help='Report the number of database queries the analysis ran (and the slowest ones); '
+                 'with --workers 1, since parallel sections query on their own connections'
+        )
     
     def handle(self, *args, **options):
         job_id = options['job']
@@ -51,6 +83,10 @@ class Command(BaseCommand):
         output_path = options.get('output')
         email = options.get('email')
         quick_mode = options.get('quick', False)
+        show_queries = options.get('show_queries', False)
+        workers = options['workers']
+        time_budget = options.get('time_budget')
+        refresh = options.get('refresh', False)
         
         # Verify job exists and is complete
         try:
@@ -78,27 +114,32 @@ class Command(BaseCommand):
         
         # Run analysis
         start_time = timezone.now()
-        analyzer = DocumentationAnalyzer(job_id)
+        
+        queries = CaptureQueriesContext(connection) if show_queries else nullcontext()
         
         try:
-            if quick_mode:
-                # Use the optimized quick analyzer
-                quick_analyzer = QuickAnalyzer(job_id)
-                analysis_results = quick_analyzer.analyze()
-                self.stdout.write('Quick analysis completed')
-            else:
-                # Full analysis - WARNING: Can be slow for large sites
-                self.stdout.write(
-                    self.style.WARNING(
-                        'Running full analysis. This may take several minutes for large sites...'
+            with queries:
+                if quick_mode:
+                    # Use the optimized quick analyzer
+                    quick_analyzer = QuickAnalyzer(job_id)
+                    analysis_results = quick_analyzer.analyze()
+                    self.stdout.write('Quick analysis completed')
+                else:
+                    # Full analysis - WARNING: Can be slow for large sites
+                    self.stdout.write(
+                        self.style.WARNING(
+                            'Running full analysis. This may take several minutes for large sites...'
+                        )
                     )
-                )
-                analysis_results = analyzer.generate_comprehensive_analysis()
+                    analysis_results = load_or_generate_analysis(
+                        job, max_workers=workers, time_budget=time_budget, refresh=refresh
+                    )
+                    self._print_cache_status(analysis_results)
                 
-                # Mark job as analyzed
-                job.is_analyzed = True
-                job.analysis_started_at = start_time
-                job.save(update_fields=['is_analyzed', 'analysis_started_at'])
+                    # Mark job as analyzed
+                    job.is_analyzed = True
+                    job.analysis_started_at = start_time
+                    job.save(update_fields=['is_analyzed', 'analysis_started_at'])
             
             duration = (timezone.now() - start_time).total_seconds()
             self.stdout.write(
@@ -106,6 +147,10 @@ class Command(BaseCommand):
                     f'Analysis completed in {duration:.1f} seconds'
                 )
             )
+            if analysis_results.get('section_timings') and analysis_results.get('cache') != 'hit':
+                self._print_section_timings(analysis_results)
+            if show_queries:
+                self._print_query_report(queries)
             
             # Generate report in requested format
             if output_format == 'terminal':
@@ -143,6 +188,33 @@ class Command(BaseCommand):
             )
             raise CommandError(f'Analysis failed: {str(e)}')
     
+    def _print_cache_status(self, results):
+        """Say whether the stored analysis was reused"""
+        
+        if results.get('cache') == 'hit':
+            self.stdout.write(self.style.SUCCESS(
+                f"Reused stored analysis from {results.get('analysis_date')} (crawl data unchanged, --refresh to recompute)"
+            ))
+        elif results.get('reused_sections'):
+            self.stdout.write(f"Reused unchanged sections: {', '.join(results['reused_sections'])}")
+    
+    def _print_section_timings(self, results):
+        """Print how long each analysis section took"""
+        
+        for section, seconds in results['section_timings'].items():
+            self.stdout.write(f'  {section}: {seconds:.2f}s')
+        for section in results.get('incomplete_sections', []):
+            self.stdout.write(self.style.WARNING(f'  {section}: skipped (time budget exceeded)'))
+    
+    def _print_query_report(self, queries):
+        """Print how many queries the analysis ran and the slowest ones"""
+        
+        captured = queries.captured_queries
+        self.stdout.write(f'Database queries: {len(captured)}')
+        slowest = sorted(captured, key=lambda query: float(query['time']), reverse=True)[:5]
+        for query in slowest:
+            self.stdout.write(f"  {float(query['time']):.3f}s  {query['sql'][:120]}")
+    
     def _print_terminal_report(self, results):
         """Print a formatted report to the terminal"""
         
@@ -21,16 +21,33 @@ Usage:
     
     # Dry run (show stats without generating)
     python manage.py build_taxonomy --client-id 5 --dry-run
+    
+    # Cluster 1536-d embeddings in a 128-d PCA space (large corpora)
+    python manage.py build_taxonomy --client-id 5 --reduction pca --reduced-dim 128
+    
+    # Compare fast and exhaustive auto-k on synthetic embeddings (10k-200k vectors)
+    python manage.py build_taxonomy --benchmark-k-selection
+    
+    # Embeddings are read from a per-client matrix cache that is updated
+    # incrementally (TAXONOMY_MATRIX_CACHE_DIR); start it over with
+    python manage.py build_taxonomy --client-id 5 --rebuild-matrix-cache
 """
 
 import os
 import logging
 from django.core.management.base import BaseCommand
 from decouple import config
+from analyzer.cluster_selection import K_SELECTION_METHODS, pick_k, score_k_exhaustive, score_k_fast
+from analyzer.embedding_reduction import REDUCTION_METHODS
 from analyzer.taxonomy_builder import TaxonomyBuilder
 
 logger = logging.getLogger('analyzer')
 
+# Exhaustive k selection is O(n²) per k; the benchmark skips it above this size
+BENCHMARK_EXHAUSTIVE_MAX = 20000
+# Clusters in the synthetic benchmark data
+BENCHMARK_TRUE_K = 12
+
 
 class Command(BaseCommand):
     help = 'Build documentation taxonomy for a client'
@@ -39,8 +56,7 @@ class Command(BaseCommand):
         parser.add_argument(
             '--client-id',
             type=int,
-            required=True,
-            help='Client ID to analyze'
+            help='Client ID to analyze (required unless benchmarking)'
         )
         
         parser.add_argument(
@@ -87,6 +103,54 @@ class Command(BaseCommand):
             help='Clustering algorithm to use (default: kmeans)'
         )
         
+        parser.add_argument(
+            '--k-selection',
+            type=str,
+            choices=K_SELECTION_METHODS,
+            default='fast',
+            help='How --n-clusters auto scores candidate cluster counts: fast (mini-batch fits, '
+                 'sampled silhouette, parallel) or exhaustive (full KMeans and silhouette per k) (default: fast)'
+        )
+        
+        parser.add_argument(
+            '--reduction',
+            type=str,
+            choices=('none',) + REDUCTION_METHODS,
+            default='none',
+            help='Reduce embeddings before clustering: pca, svd or random projection, then L2-normalise '
+                 '(default: none)'
+        )
+        
+        parser.add_argument(
+            '--reduced-dim',
+            type=int,
+            default=128,
+            help='Target dimension for --reduction (default: 128)'
+        )
+        
+        parser.add_argument(
+            '--benchmark-k-selection',
+            action='store_true',
+            help='Time fast against exhaustive k selection on synthetic embeddings (see --benchmark-sizes); '
+                 'no client data is read'
+        )
+        
+        parser.add_argument(
+            '--benchmark-sizes',
+            type=int,
+            nargs='+',
+            default=[10000, 50000, 100000, 200000],
+            help='Vector counts for --benchmark-k-selection (default: 10000 50000 100000 200000; '
+                 f'exhaustive only runs up to {BENCHMARK_EXHAUSTIVE_MAX})'
+        )
+        
+        parser.add_argument(
+            '--benchmark-dim',
+            type=int,
+            default=1536,
+            help='Vector size for --benchmark-k-selection (default: 1536)'
+        )
+        
         parser.add_argument(
             '--visualize',
             action='store_true',
@@ -119,8 +183,21 @@ class Command(BaseCommand):
             action='store_true',
             help='Skip GPT-4o-mini cluster summarization (faster, cheaper)'
         )
+        
+        parser.add_argument(
+            '--rebuild-matrix-cache',
+            action='store_true',
+            help='Rebuild the cached embedding matrix from scratch instead of updating it incrementally'
+        )
     
     def handle(self, *args, **options):
+        if options['benchmark_k_selection']:
+            self._benchmark_k_selection(options['benchmark_sizes'], options['benchmark_dim'])
+            return
+        if options['client_id'] is None:
+            self.stdout.write(self.style.ERROR("--client-id is required"))
+            return
+        
         client_id = options['client_id']
         output_dir = options['output_dir']
         embedding_type = options['embedding_type']
@@ -199,7 +276,10 @@ class Command(BaseCommand):
         # Step 1: Load pages
         self.stdout.write(self.style.SUCCESS("\n[1/5] Loading pages..."))
         try:
-            pages = builder.load_pages(filters=filters if filters else None)
+            pages = builder.load_pages(
+                filters=filters if filters else None,
+                rebuild_matrix_cache=options['rebuild_matrix_cache']
+            )
             
             if not pages:
                 self.stdout.write(self.style.ERROR("No pages found for this client."))
@@ -258,7 +338,10 @@ class Command(BaseCommand):
                 n_clusters=n_clusters,
                 method=clustering_method,
                 min_cluster_size=min_cluster_size,
-                max_cluster_size=max_cluster_size
+                max_cluster_size=max_cluster_size,
+                k_selection=options['k_selection'],
+                reduction=None if options['reduction'] == 'none' else options['reduction'],
+                reduced_dim=options['reduced_dim']
             )
             
             self.stdout.write(f"  ✓ Created {len(clusters)} clusters")
@@ -290,6 +373,10 @@ class Command(BaseCommand):
                 f"  ✓ Graph built: {graph.number_of_nodes()} nodes, "
                 f"{graph.number_of_edges()} edges"
             )
+            if builder.removed_cycle_edges:
+                self.stdout.write(
+                    self.style.WARNING(f"  ⚠️  Removed {len(builder.removed_cycle_edges)} edges to break cycles")
+                )
             
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Error building graph: {e}"))
@@ -394,4 +481,39 @@ class Command(BaseCommand):
                 f"{'='*60}\n"
             )
         )
-
+    
+    def _benchmark_k_selection(self, sizes, dim):
+        """Time fast and exhaustive k selection on synthetic clustered embeddings."""
+        import time
+        import numpy as np
+        
+        k_values = range(2, 21)  # The auto-k range TaxonomyBuilder searches on large clients
+        rng = np.random.default_rng(42)
+        centers = rng.standard_normal((BENCHMARK_TRUE_K, dim), dtype=np.float32)
+        
+        self.stdout.write(
+            f"Benchmarking k selection over k={k_values.start}..{k_values.stop - 1} "
+            f"on {dim}-d vectors from {BENCHMARK_TRUE_K} clusters..."
+        )
+        for size in sizes:
+            # Unit vectors scattered around uneven clusters, like embeddings
+            labels = rng.choice(BENCHMARK_TRUE_K, size=size, p=rng.dirichlet(np.full(BENCHMARK_TRUE_K, 2.0)))
+            vectors = centers[labels] + rng.standard_normal((size, dim), dtype=np.float32) * 0.9
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            
+            runs = [('fast', score_k_fast)]
+            if size <= BENCHMARK_EXHAUSTIVE_MAX:
+                runs.append(('exhaustive', score_k_exhaustive))
+            results = []
+            for label, score in runs:
+                start = time.perf_counter()
+                inertias, silhouettes = score(vectors, k_values)
+                elapsed = time.perf_counter() - start
+                k = pick_k(k_values, inertias, silhouettes)
+                results.append(
+                    f"{label} k={k} (silhouette {silhouettes[k - k_values.start]:.3f}) {elapsed:.1f}s"
+                )
+            if size > BENCHMARK_EXHAUSTIVE_MAX:
+                results.append("exhaustive skipped")
+            self.stdout.write(f"  {size:>8,} vectors: " + " | ".join(results))
+            del vectors
@@ -0,0 +1,213 @@
+# analyzer/metrics.py
+
+"""
+Page metrics for DocumentationAnalyzer in a single round trip.
+
+Every per-job count, min/max/avg and flag the analyzer sections need is
+declared once in ``page_metric_definitions`` as a (conditional) aggregate,
+and ``PageMetrics`` compiles them all into one ``aggregate()`` query:
+
+    SELECT COUNT(id) FILTER (WHERE readability_score < 50) AS low_readability_pages,
+           COUNT(id) FILTER (WHERE word_count < 100) AS stub_pages,
+           AVG(readability_score) AS avg_readability, ...
+    FROM crawler_crawledpage WHERE job_id = ...
+
+JSON columns are measured in Postgres (``jsonb_array_length``,
+``jsonb_array_elements``) rather than loaded into Python, so link, code
+block and endpoint statistics cost the same on 100k pages as on 100.
+
+Breakdowns that need their own GROUP BY (depth distribution, duplicate
+titles, code block languages) are separate small queries, loaded on first
+use.
+"""
+
+from typing import Any, Dict, List
+
+from django.db import connections
+from django.db.models import Avg, Count, Exists, Func, JSONField, Max, Min, OuterRef, Q, Sum
+from django.db.models.functions import Length
+from django.db.models.lookups import LessThan
+
+from core.db_functions import JSONBArrayLength
+from crawler.models import PageRelationship
+
+# Doc types that should carry examples
+EXAMPLE_DOC_TYPES = ['tutorial', 'guide', 'api_reference']
+
+
+class CodeBlocks(Func):
+    """
+    A page's code blocks as a JSONB array.
+
+    ``code_blocks`` is either a list of blocks or ``{'blocks': [...]}``;
+    anything else counts as no blocks.
+    """
+
+    template = (
+        "CASE jsonb_typeof(%(expressions)s) "
+        "WHEN 'array' THEN %(expressions)s "
+        "WHEN 'object' THEN CASE WHEN jsonb_typeof(%(expressions)s -> 'blocks') = 'array' "
+        "THEN %(expressions)s -> 'blocks' ELSE '[]'::jsonb END "
+        "ELSE '[]'::jsonb END"
+    )
+    output_field = JSONField()
+
+
+def no_code_blocks() -> Q:
+    return Q(code_blocks__exact=[]) | Q(code_blocks__exact={})
+
+
+def no_parameters() -> Q:
+    return Q(parameters__isnull=True) | Q(parameters__exact=[]) | Q(parameters__exact={})
+
+
+def missing_meta_description() -> Q:
+    return Q(meta_description='') | Q(meta_description__isnull=True)
+
+
+def page_metric_definitions(job, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Aggregate expression for every scalar page metric, keyed by metric name."""
+    api = Q(doc_type='api_reference')
+    has_incoming_links = Exists(PageRelationship.objects.filter(to_page=OuterRef('pk')))
+
+    return {
+        'total_pages': Count('id'),
+
+        # Content quality
+        'avg_readability': Avg('readability_score'),
+        'min_readability': Min('readability_score'),
+        'max_readability': Max('readability_score'),
+        'low_readability_pages': Count('id', filter=Q(readability_score__lt=config['min_readability_score'])),
+        'stub_pages': Count('id', filter=Q(word_count__lt=config['min_word_count'])),
+        'pages_without_examples': Count('id', filter=Q(has_examples=False, doc_type__in=EXAMPLE_DOC_TYPES)),
+        'quality_excellent': Count('id', filter=Q(readability_score__gte=70, word_count__gte=300)),
+        'quality_good': Count('id', filter=Q(readability_score__gte=50, word_count__gte=200)),
+        'quality_needs_work': Count('id', filter=Q(readability_score__lt=50) | Q(word_count__lt=200)),
+        'quality_critical': Count('id', filter=Q(readability_score__lt=30, word_count__lt=100)),
+
+        # Navigation
+        'orphaned_pages': Count('id', filter=~Q(has_incoming_links) & ~Q(url=job.target_url)),  # home page excluded
+        'pages_without_links': Count('id', filter=Q(internal_links__exact=[])),
+        # API refs often don't have links
+        'dead_ends': Count('id', filter=Q(internal_links__exact=[]) & ~Q(doc_type='api_reference')),
+        'max_depth': Max('depth'),
+        'total_internal_links': Sum(JSONBArrayLength('internal_links'), default=0),
+
+        # Code
+        'pages_with_code': Count('id', filter=Q(code_blocks__isnull=False) & ~no_code_blocks()),
+        'total_code_blocks': Sum(JSONBArrayLength(CodeBlocks('code_blocks')), default=0),
+        'api_pages_without_examples': Count('id', filter=api & no_code_blocks()),
+        'tutorials_without_code': Count('id', filter=Q(doc_type='tutorial') & no_code_blocks()),
+
+        # SEO
+        'missing_titles': Count('id', filter=Q(title='') | Q(title__isnull=True)),
+        'missing_meta_descriptions': Count('id', filter=missing_meta_description()),
+        'short_meta_descriptions': Count('id', filter=(
+            Q(LessThan(Length('meta_description'), 50)) & ~missing_meta_description()
+        )),
+        'pages_without_og_tags': Count('id', filter=Q(og_tags__exact={})),
+
+        # API completeness
+        'total_api_pages': Count('id', filter=api),
+        'api_pages_with_examples': Count('id', filter=api & Q(has_examples=True)),
+        'total_endpoints_documented': Sum(JSONBArrayLength('api_endpoints'), filter=api, default=0),
+        'endpoints_without_examples': Sum(
+            JSONBArrayLength('api_endpoints'), filter=api & Q(has_examples=False), default=0,
+        ),
+        'endpoints_without_parameters': Sum(
+            JSONBArrayLength('api_endpoints'), filter=api & no_parameters(), default=0,
+        ),
+        'api_auth_pages': Count('id', filter=api & (
+            Q(url__icontains='auth') | Q(title__icontains='authentication') | Q(main_content__icontains='authentication')
+        )),
+        'api_error_pages': Count('id', filter=api & (
+            Q(url__icontains='error') | Q(title__icontains='error') | Q(main_content__icontains='error handling')
+        )),
+        'api_rate_limit_pages': Count('id', filter=api & (
+            Q(main_content__icontains='rate limit') | Q(main_content__icontains='throttl')
+        )),
+        # Looser checks used by the API completeness score
+        'api_score_auth_pages': Count('id', filter=api & (
+            Q(url__icontains='auth') | Q(main_content__icontains='authentication')
+        )),
+        'api_score_error_pages': Count('id', filter=api & (
+            Q(main_content__icontains='error') | Q(main_content__icontains='status code')
+        )),
+
+        # Performance
+        'slow_pages': Count('id', filter=Q(response_time__gt=config['max_response_time'])),
+        'large_pages': Count('id', filter=Q(page_size__gt=500000)),  # > 500KB
+        'javascript_rendered_pages': Count('id', filter=Q(render_method='javascript')),
+        'avg_response': Avg('response_time'),
+        'max_response': Max('response_time'),
+        'min_response': Min('response_time'),
+    }
+
+
+class PageMetrics:
+    """
+    Lazily computed metrics for one job's pages.
+
+    ``metrics['stub_pages']`` etc. run the combined aggregate query on first
+    access; the grouped breakdowns are properties with their own query.
+    """
+
+    def __init__(self, job, pages, config: Dict[str, Any]):
+        self.job = job
+        self.pages = pages
+        self.config = config
+        self._values = None
+        self._depth_distribution = None
+        self._duplicate_titles = None
+        self._code_languages = None
+
+    def __getitem__(self, name: str):
+        return self.values[name]
+
+    @property
+    def values(self) -> Dict[str, Any]:
+        if self._values is None:
+            self._values = self.pages.aggregate(**page_metric_definitions(self.job, self.config))
+        return self._values
+
+    @property
+    def depth_distribution(self) -> List[Dict]:
+        if self._depth_distribution is None:
+            self._depth_distribution = list(
+                self.pages.values('depth').annotate(count=Count('id')).order_by('depth')
+            )
+        return self._depth_distribution
+
+    @property
+    def duplicate_titles(self) -> int:
+        """Number of distinct non-empty titles used by more than one page."""
+        if self._duplicate_titles is None:
+            self._duplicate_titles = (
+                self.pages.exclude(title='').values('title').annotate(count=Count('id')).filter(count__gt=1).count()
+            )
+        return self._duplicate_titles
+
+    @property
+    def code_languages(self) -> Dict[str, int]:
+        """Code blocks per language, most common first (blocks without one count as 'unknown')."""
+        if self._code_languages is None:
+            self._code_languages = code_block_language_counts(self.pages)
+        return self._code_languages
+
+
+def code_block_language_counts(pages) -> Dict[str, int]:
+    """Count code blocks by ``language`` across pages, unnesting the JSON in the database."""
+    pages_sql, params = pages.order_by().values('code_blocks').query.sql_with_params()
+    blocks_sql = CodeBlocks.template % {'expressions': 'page.code_blocks'}
+    sql = f"""
+        SELECT CASE WHEN block ? 'language' THEN block ->> 'language' ELSE 'unknown' END AS language,
+               COUNT(*) AS blocks
+        FROM ({pages_sql}) AS page
+        CROSS JOIN LATERAL jsonb_array_elements({blocks_sql}) AS block
+        WHERE jsonb_typeof(block) = 'object'
+        GROUP BY 1
+        ORDER BY blocks DESC, language
+    """
+    with connections[pages.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        return dict(cursor.fetchall())
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0001_initial'),
+        ('core', '0003_rename_unigue_to_unique_content_pages'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysis',
+            name='analyzer_version',
+            field=models.CharField(blank=True, help_text='Analyzer version that produced the results', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='analysis',
+            name='fingerprint',
+            field=models.JSONField(default=dict, help_text='Fingerprint of the input data (page count, last page update, ...) behind the results'),
+        ),
+        migrations.AlterField(
+            model_name='analysis',
+            name='analysis_type',
+            field=models.CharField(choices=[('comprehensive', 'Comprehensive Documentation Analysis'), ('structure', 'Documentation Structure Analysis'), ('content_gaps', 'Content Gap Detection'), ('api_completeness', 'API Reference Completeness'), ('tutorial_quality', 'Tutorial Quality Assessment'), ('custom', 'Custom Analysis')], max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='analysis',
+            index=models.Index(fields=['job', 'analysis_type', 'analyzer_version'], name='analyzer_an_job_id_520e0b_idx'),
+        ),
+    ]
@@ -1,6 +1,5 @@
 """
 Analyzer models for storing analysis results.
-This is a placeholder for future LLM-based analysis features.
 """
 
 from django.db import models
@@ -10,9 +9,14 @@ from core.models import CrawlJob
 class Analysis(models.Model):
     """
     Represents an analysis run on crawled data.
-    Future implementation will include LLM-based insights.
+
+    Comprehensive analyses (DocumentationAnalyzer reports) are stored per
+    job and analyzer version together with a fingerprint of the data they
+    were computed from, so they can be reused until the crawl data changes
+    (see analyzer.result_cache).
     """
     ANALYSIS_TYPE_CHOICES = [
+        ('comprehensive', 'Comprehensive Documentation Analysis'),
         ('structure', 'Documentation Structure Analysis'),
         ('content_gaps', 'Content Gap Detection'),
         ('api_completeness', 'API Reference Completeness'),
@@ -23,12 +27,19 @@ class Analysis(models.Model):
     job = models.ForeignKey(CrawlJob, on_delete=models.CASCADE, related_name='analyses')
     analysis_type = models.CharField(max_length=50, choices=ANALYSIS_TYPE_CHOICES)
     results = models.JSONField(default=dict, help_text="Analysis results and insights")
+    analyzer_version = models.CharField(max_length=20, blank=True, help_text="Analyzer version that produced the results")
+    fingerprint = models.JSONField(
+        default=dict, help_text="Fingerprint of the input data (page count, last page update, ...) behind the results"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = 'Analyses'
+        indexes = [
+            models.Index(fields=['job', 'analysis_type', 'analyzer_version']),
+        ]
 
     def __str__(self):
         return f"{self.get_analysis_type_display()} for Job #{self.job.id}"
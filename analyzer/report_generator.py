@@ -24,7 +24,16 @@ except ImportError:
 class ReportGenerator:
     """Generate professional documentation analysis reports"""
     
-    def __init__(self, job, analysis_results):
+    def __init__(self, job, analysis_results=None):
+        """
+        Args:
+            job: CrawlJob to report on
+            analysis_results: Comprehensive analysis to render (default: the
+                stored analysis if the crawl data hasn't changed, else a fresh one)
+        """
+        if analysis_results is None:
+            from analyzer.result_cache import load_or_generate_analysis
+            analysis_results = load_or_generate_analysis(job)
         self.job = job
         self.results = analysis_results
         self.pages = job.pages.all()
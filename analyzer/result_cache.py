@@ -0,0 +1,104 @@
+# analyzer/result_cache.py
+
+"""
+Stored comprehensive analyses, reused until the crawl data changes.
+
+Each ``Analysis`` row of type ``comprehensive`` holds the full report for a
+job and ``ANALYZER_VERSION`` plus a fingerprint of the data it was computed
+from:
+
+* ``pages`` - page count and latest ``updated_at``. Page writers must move
+  it: ``save(update_fields=...)`` only applies ``auto_now`` when
+  ``updated_at`` is listed, and ``bulk_update`` callers set it themselves
+  (see ``ANALYSIS_UPDATE_FIELDS`` and ``EMBEDDING_UPDATE_FIELDS``)
+* ``links`` - relationship count and highest id
+* ``crawl_errors`` - error count and latest ``created_at``
+
+``load_or_generate_analysis`` compares the stored fingerprint with the
+current one and reruns only the sections whose inputs (``SECTION_INPUTS``)
+changed or that did not finish last time; the rest are reused as-is.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from analyzer.documentation_analyzer import ANALYZER_VERSION, SECTION_INPUTS, SECTIONS, DocumentationAnalyzer
+from analyzer.models import Analysis
+from crawler.models import PageRelationship
+
+logger = logging.getLogger('analyzer')
+
+ANALYSIS_TYPE = 'comprehensive'
+
+
+def data_fingerprint(job) -> Dict[str, Dict]:
+    """Cheap summary of a job's analysis inputs; changes whenever the data does."""
+    pages = job.pages.aggregate(count=Count('id'), updated=Max('updated_at'))
+    links = PageRelationship.objects.filter(from_page__job=job).aggregate(count=Count('id'), last_id=Max('id'))
+    errors = job.errors.aggregate(count=Count('id'), created=Max('created_at'))
+    return {
+        'pages': {'count': pages['count'], 'updated': pages['updated'] and pages['updated'].isoformat()},
+        'links': links,
+        'crawl_errors': {'count': errors['count'], 'created': errors['created'] and errors['created'].isoformat()},
+    }
+
+
+def stored_analysis(job) -> Optional[Analysis]:
+    return Analysis.objects.filter(
+        job=job, analysis_type=ANALYSIS_TYPE, analyzer_version=ANALYZER_VERSION,
+    ).first()
+
+
+def reusable_sections(stored: Optional[Analysis], fingerprint: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Stored section results whose inputs match the current fingerprint."""
+    if stored is None:
+        return {}
+    changed = {source for source, value in fingerprint.items() if stored.fingerprint.get(source) != value}
+    incomplete = set(stored.results.get('incomplete_sections', []))
+    detailed = stored.results.get('detailed_metrics', {})
+    return {
+        name: detailed[name]
+        for name, inputs in SECTION_INPUTS.items()
+        if name in detailed and name not in incomplete and not changed.intersection(inputs)
+    }
+
+
+def load_or_generate_analysis(job, max_workers: int = 1, time_budget: Optional[float] = None,
+                              refresh: bool = False) -> Dict[str, Any]:
+    """
+    Comprehensive analysis for a job, from the stored result where still valid.
+
+    Returns the report; ``report['cache']`` says whether it was a stored
+    result ('hit'), partly recomputed ('partial') or computed from scratch
+    ('miss'). ``refresh`` recomputes everything.
+    """
+    fingerprint = data_fingerprint(job)
+    stored = stored_analysis(job)
+    reuse = {} if refresh else reusable_sections(stored, fingerprint)
+
+    if stored is not None and len(reuse) == len(SECTIONS):
+        logger.info(f"[Analyzer] Job {job.id}: reusing stored analysis #{stored.id}")
+        return {**stored.results, 'cache': 'hit'}
+
+    analyzer = DocumentationAnalyzer(job.id)
+    results = analyzer.generate_comprehensive_analysis(
+        max_workers=max_workers, time_budget=time_budget, reuse_sections=reuse,
+    )
+    logger.info(
+        f"[Analyzer] Job {job.id}: reused {len(reuse)} sections, "
+        f"recomputed {len(SECTIONS) - len(reuse) - len(results['incomplete_sections'])}"
+    )
+
+    if stored is None:
+        stored = Analysis(job=job, analysis_type=ANALYSIS_TYPE, analyzer_version=ANALYZER_VERSION)
+    stored.results = results
+    stored.fingerprint = fingerprint
+    stored.completed_at = timezone.now()
+    stored.save()
+    # Results from other analyzer versions can never be reused
+    Analysis.objects.filter(job=job, analysis_type=ANALYSIS_TYPE).exclude(analyzer_version=ANALYZER_VERSION).delete()
+
+    return {**results, 'cache': 'partial' if reuse else 'miss'}
@@ -22,18 +22,51 @@ Usage:
 
 import logging
 import json
+import time
 import numpy as np
+from scipy.sparse import csr_matrix
 from typing import List, Dict, Optional, Tuple, Any
+from dataclasses import dataclass, fields
 from datetime import datetime
 from collections import defaultdict, Counter
-from sklearn.cluster import KMeans, AgglomerativeClustering, DBSCAN
+from sklearn.cluster import KMeans, AgglomerativeClustering, DBSCAN, MiniBatchKMeans
 from sklearn.metrics import silhouette_score
-from sklearn.metrics.pairwise import cosine_similarity
 import networkx as nx
 
+from analyzer.cluster_selection import MINIBATCH_SIZE, SILHOUETTE_SAMPLE_SIZE, pick_k, score_k_exhaustive, score_k_fast
+from analyzer.embedding_reduction import reduce_embeddings
+from analyzer.graph_cycles import feedback_arc_set
+from analyzer.embedding_matrix import EmbeddingMatrix
+
 logger = logging.getLogger('analyzer')
 
 
+@dataclass
+class TaxonomyPage:
+    """The CrawledPage fields the taxonomy needs (loaded with ``values()``)."""
+    id: int
+    title: str
+    url: str
+    doc_type: str
+    ai_doc_type: Optional[str]
+    ai_audience_level: Optional[str]
+    ai_summary: Optional[str]
+    ai_topics: Optional[List]
+    ai_learning_objectives: Optional[List]
+    ai_prerequisite_chain: Optional[List]
+    ai_key_concepts: Optional[List]
+
+
+TAXONOMY_PAGE_FIELDS = [field.name for field in fields(TaxonomyPage)]
+
+# Above this many rows, hierarchical clustering runs ward on mini-batch
+# k-means centres instead of all rows (ward needs an n x n distance matrix)
+HIERARCHICAL_EXACT_MAX_ROWS = 10000
+HIERARCHICAL_MICRO_CLUSTERS = 1000
+# DBSCAN neighbourhood radius as a cosine distance
+DBSCAN_EPS = 0.3
+
+
 class TaxonomyBuilder:
     """
     Build documentation taxonomy from AI-analyzed pages.
@@ -66,6 +99,7 @@ class TaxonomyBuilder:
         # Data storage
         self.client = None
         self.pages = []
+        self.embedding_matrix = EmbeddingMatrix(client_id, embedding_field)
         self.embeddings = None
         self.page_metadata = []
         
@@ -74,6 +108,7 @@ class TaxonomyBuilder:
         self.cluster_labels = None
         self.cluster_summaries = {}
         self.prerequisite_graph = None
+        self.removed_cycle_edges = []  # (u, v, data) edges dropped to make the graph acyclic
         self.taxonomy = {}
         
         logger.info(f"[TaxonomyBuilder] Initialized for client {client_id}, using {embedding_field}")
@@ -81,17 +116,23 @@ class TaxonomyBuilder:
     def load_pages(
         self,
         filters: Optional[Dict] = None,
-        min_quality_score: float = 0.0
+        min_quality_score: float = 0.0,
+        rebuild_matrix_cache: bool = False
     ) -> List:
         """
         Load analyzed pages from database.
         
+        Only the page fields the taxonomy uses are read (``TaxonomyPage``);
+        embeddings come from the client's cached matrix (see
+        ``analyzer.embedding_matrix``), which is brought up to date first.
+        
         Args:
             filters: Optional filters (doc_type, audience_level, etc.)
             min_quality_score: Minimum AI quality score (0.0-1.0)
+            rebuild_matrix_cache: Rebuild the embedding matrix from scratch
             
         Returns:
-            List of CrawledPage objects
+            List of TaxonomyPage records
         """
         from crawler.models import CrawledPage
         from core.models import Client
@@ -124,104 +165,92 @@ class TaxonomyBuilder:
             pass
         
         # Fetch pages
-        self.pages = list(queryset.select_related('job', 'client'))
+        self.pages = [TaxonomyPage(**row) for row in queryset.values(*TAXONOMY_PAGE_FIELDS)]
         
         logger.info(f"[TaxonomyBuilder] Loaded {len(self.pages)} pages")
         
         # Build embeddings matrix and metadata
+        self.embedding_matrix.sync(rebuild=rebuild_matrix_cache)
         self._prepare_embeddings()
         
         return self.pages
     
     def _prepare_embeddings(self):
         """
-        Extract and prepare embeddings for clustering.
+        Select the loaded pages' rows from the embedding matrix and build their metadata.
         
         Handles different embedding types (LO, page, section).
-        For LO embeddings, aggregates multiple LOs per page into a single page-level embedding.
+        For LO embeddings, each row is the average of a page's LO embeddings.
         """
-        embeddings_list = []
-        metadata_list = []
+        matrix = self.embedding_matrix
+        pages_by_id = {page.id: page for page in self.pages}
+        rows = matrix.rows_for_pages(pages_by_id)
         
-        for page in self.pages:
-            if self.embedding_field == 'learning_objective_embeddings':
-                # Aggregate learning objective embeddings to page level
-                # Strategy: average all LO embeddings for the page
-                lo_embeddings = page.learning_objective_embeddings or []
-                lo_vectors = [lo.get('embedding', []) for lo in lo_embeddings if lo.get('embedding')]
-                
-                if lo_vectors:
-                    # Average all LO embeddings for this page
-                    avg_embedding = np.mean(lo_vectors, axis=0)
-                    embeddings_list.append(avg_embedding)
-                    metadata_list.append({
-                        'page_id': page.id,
-                        'page_title': page.title,
-                        'page_url': page.url,
-                        'doc_type': page.doc_type,
-                        'ai_doc_type': page.ai_doc_type,
-                        'audience_level': page.ai_audience_level,
-                        'topics': page.ai_topics or [],
-                        'learning_objectives': [lo.get('objective', '') for lo in lo_embeddings],
-                        'num_los': len(lo_vectors),
-                        'type': 'page_from_lo'
-                    })
-            
-            elif self.embedding_field == 'page_embedding':
-                # Use full-page embeddings (one per page)
-                embedding = page.page_embedding or []
-                if embedding:
-                    embeddings_list.append(embedding)
-                    metadata_list.append({
-                        'page_id': page.id,
-                        'page_title': page.title,
-                        'page_url': page.url,
-                        'doc_type': page.doc_type,
-                        'ai_doc_type': page.ai_doc_type,
-                        'audience_level': page.ai_audience_level,
-                        'topics': page.ai_topics or [],
-                        'learning_objectives': page.ai_learning_objectives or [],
-                        'type': 'page'
-                    })
-            
-            elif self.embedding_field == 'section_embeddings':
-                # Use section embeddings (multiple per page)
-                section_embeds = page.section_embeddings or []
-                for section in section_embeds:
-                    embedding = section.get('embedding', [])
-                    if embedding:
-                        embeddings_list.append(embedding)
-                        metadata_list.append({
-                            'page_id': page.id,
-                            'page_title': page.title,
-                            'page_url': page.url,
-                            'section_heading': section.get('heading', ''),
-                            'section_index': section.get('index', 0),
-                            'doc_type': page.doc_type,
-                            'topics': page.ai_topics or [],
-                            'type': 'section'
-                        })
-        
-        if not embeddings_list:
+        if not len(rows):
             logger.warning(f"[TaxonomyBuilder] No embeddings found for client {self.client_id}")
             self.embeddings = np.array([])
             self.page_metadata = []
             return
         
-        self.embeddings = np.array(embeddings_list)
-        self.page_metadata = metadata_list
+        if len(rows) == len(matrix.page_ids):
+            # Every row: use the mapped file as-is
+            self.embeddings = np.asarray(matrix.vectors)
+        else:
+            self.embeddings = np.asarray(matrix.vectors[rows])
+        self.page_metadata = [
+            self._row_metadata(pages_by_id[matrix.page_ids[row]], matrix.extras[row]) for row in rows.tolist()
+        ]
         
         logger.info(
-            f"[TaxonomyBuilder] Prepared {len(embeddings_list)} embeddings "
+            f"[TaxonomyBuilder] Prepared {len(self.page_metadata)} embeddings "
             f"(dim: {self.embeddings.shape[1]})"
         )
     
+    def _row_metadata(self, page: 'TaxonomyPage', extras: Dict) -> Dict:
+        """Metadata for one embedding row: page fields plus the row's own extras."""
+        if self.embedding_field == 'section_embeddings':
+            return {
+                'page_id': page.id,
+                'page_title': page.title,
+                'page_url': page.url,
+                'section_heading': extras.get('section_heading', ''),
+                'section_index': extras.get('section_index', 0),
+                'doc_type': page.doc_type,
+                'topics': page.ai_topics or [],
+                'type': 'section'
+            }
+        
+        metadata = {
+            'page_id': page.id,
+            'page_title': page.title,
+            'page_url': page.url,
+            'doc_type': page.doc_type,
+            'ai_doc_type': page.ai_doc_type,
+            'audience_level': page.ai_audience_level,
+            'topics': page.ai_topics or [],
+        }
+        if self.embedding_field == 'learning_objective_embeddings':
+            metadata.update({
+                'learning_objectives': extras.get('learning_objectives', []),
+                'num_los': extras.get('num_los', 0),
+                'type': 'page_from_lo'
+            })
+        else:
+            metadata.update({
+                'learning_objectives': page.ai_learning_objectives or [],
+                'type': 'page'
+            })
+        return metadata
+    
     def cluster_by_embeddings(
         self,
         n_clusters: Any = 'auto',
         method: str = 'kmeans',
         min_cluster_size: int = 3,
-        max_cluster_size: int = 15
+        max_cluster_size: int = 15,
+        k_selection: str = 'fast',
+        reduction: Optional[str] = None,
+        reduced_dim: int = 128
     ) -> List[Dict]:
         """
         Cluster pages by embedding similarity.
@@ -231,6 +260,10 @@ class TaxonomyBuilder:
             method: 'kmeans', 'hierarchical', or 'dbscan'
             min_cluster_size: Minimum pages per cluster
             max_cluster_size: Maximum pages per cluster
+            k_selection: How 'auto' scores candidate ks: 'fast' or 'exhaustive'
+            reduction: Reduce embeddings before clustering: 'pca', 'svd',
+                'random' or None for the raw vectors (see analyzer.embedding_reduction)
+            reduced_dim: Target dimension when reducing
             
         Returns:
             List of cluster dictionaries
@@ -241,36 +274,53 @@ class TaxonomyBuilder:
         
         logger.info(f"[TaxonomyBuilder] Clustering {len(self.embeddings)} embeddings using {method}")
         
+        # Cluster in the reduced space; cohesion is still measured on the original embeddings
+        if reduction:
+            vectors = reduce_embeddings(self.embeddings, reduction, reduced_dim)
+        else:
+            vectors = self.embeddings
+        
         # Determine optimal number of clusters if auto
         if n_clusters == 'auto':
             n_clusters = self._find_optimal_clusters(
-                min_k=max(2, len(self.embeddings) // max_cluster_size),
-                max_k=min(20, len(self.embeddings) // min_cluster_size)
+                min_k=max(2, len(vectors) // max_cluster_size),
+                max_k=min(20, len(vectors) // min_cluster_size),
+                k_selection=k_selection,
+                vectors=vectors
             )
             logger.info(f"[TaxonomyBuilder] Auto-detected optimal clusters: {n_clusters}")
         
         # Cluster using selected method
         if method == 'kmeans':
             clusterer = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-            self.cluster_labels = clusterer.fit_predict(self.embeddings)
+            self.cluster_labels = clusterer.fit_predict(vectors)
         
         elif method == 'hierarchical':
-            clusterer = AgglomerativeClustering(n_clusters=n_clusters, linkage='ward')
-            self.cluster_labels = clusterer.fit_predict(self.embeddings)
+            if len(vectors) > HIERARCHICAL_EXACT_MAX_ROWS:
+                self.cluster_labels = self._minibatch_ward(vectors, n_clusters)
+            else:
+                clusterer = AgglomerativeClustering(n_clusters=n_clusters, linkage='ward')
+                self.cluster_labels = clusterer.fit_predict(vectors)
         
         elif method == 'dbscan':
             # DBSCAN auto-determines clusters based on density
-            clusterer = DBSCAN(eps=0.3, min_samples=min_cluster_size, metric='cosine')
-            self.cluster_labels = clusterer.fit_predict(self.embeddings)
+            if reduction:
+                # Unit vectors: Euclidean radius sqrt(2 * eps) is cosine distance eps, and allows a tree search
+                clusterer = DBSCAN(eps=np.sqrt(2 * DBSCAN_EPS), min_samples=min_cluster_size, metric='euclidean')
+            else:
+                clusterer = DBSCAN(eps=DBSCAN_EPS, min_samples=min_cluster_size, metric='cosine')
+            self.cluster_labels = clusterer.fit_predict(vectors)
             n_clusters = len(set(self.cluster_labels)) - (1 if -1 in self.cluster_labels else 0)
             logger.info(f"[TaxonomyBuilder] DBSCAN found {n_clusters} clusters")
         
         else:
             raise ValueError(f"Unknown clustering method: {method}")
         
-        # Calculate silhouette score
-        if len(set(self.cluster_labels)) > 1:
-            score = silhouette_score(self.embeddings, self.cluster_labels)
+        # Calculate silhouette score (on a sample: the exact score is O(n²))
+        if 1 < len(set(self.cluster_labels)) < len(vectors):
+            score = silhouette_score(
+                vectors, self.cluster_labels, sample_size=SILHOUETTE_SAMPLE_SIZE, random_state=42
+            )
             logger.info(f"[TaxonomyBuilder] Silhouette score: {score:.3f}")
         
         # Build cluster objects
@@ -280,69 +330,85 @@ class TaxonomyBuilder:
         
         return self.clusters
     
-    def _find_optimal_clusters(self, min_k: int = 2, max_k: int = 20) -> int:
+    def _find_optimal_clusters(
+        self,
+        min_k: int = 2,
+        max_k: int = 20,
+        k_selection: str = 'fast',
+        vectors: Optional[np.ndarray] = None
+    ) -> int:
         """
         Find optimal number of clusters using elbow method + silhouette score.
         
         Args:
             min_k: Minimum clusters to try
             max_k: Maximum clusters to try
+            k_selection: 'fast' (mini-batch fits, sampled silhouette) or
+                'exhaustive' (full KMeans and silhouette per k); see
+                analyzer.cluster_selection
+            vectors: Vectors to cluster (default: self.embeddings)
             
         Returns:
             Optimal number of clusters
         """
-        inertias = []
-        silhouettes = []
-        k_range = range(max(2, min_k), min(max_k + 1, len(self.embeddings) // 2))
-        
-        for k in k_range:
-            kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-            labels = kmeans.fit_predict(self.embeddings)
-            inertias.append(kmeans.inertia_)
-            
-            if len(set(labels)) > 1:
-                score = silhouette_score(self.embeddings, labels)
-                silhouettes.append(score)
-            else:
-                silhouettes.append(0)
-        
-        # Find elbow point (max second derivative)
-        if len(k_range) == 0 or len(silhouettes) == 0:
+        if vectors is None:
+            vectors = self.embeddings
+        upper = min(max_k, len(vectors) // 2 - 1)
+        if min_k > upper:
+            # More pages than max_k clusters of max_cluster_size can hold: search up to the cap
+            min_k = 2
+        k_range = range(max(2, min_k), upper + 1)
+        
+        if len(k_range) == 0:
             # Fallback to reasonable default
             logger.warning("[TaxonomyBuilder] Could not determine optimal clusters, using default: 10")
-            return min(10, len(self.embeddings) // 15)
+            return max(2, min(10, len(vectors) // 15))
         
-        if len(inertias) >= 3 and len(second_derivatives) > 0:
-            second_derivatives = []
-            for i in range(1, len(inertias) - 1):
-                second_deriv = inertias[i-1] - 2*inertias[i] + inertias[i+1]
-                second_derivatives.append(second_deriv)
-            
-            if second_derivatives:
-                # Combine elbow and silhouette
-                # Weight: 60% silhouette, 40% elbow
-                best_idx = 0
-                best_score = -1
-                for i, (sil, k) in enumerate(zip(silhouettes, k_range)):
-                    if i < len(second_derivatives):
-                        normalized_elbow = second_derivatives[i] / max(second_derivatives)
-                        combined_score = 0.6 * sil + 0.4 * normalized_elbow
-                        if combined_score > best_score:
-                            best_score = combined_score
-                            best_idx = i
-                
-                optimal_k = list(k_range)[best_idx]
-            else:
-                optimal_k = list(k_range)[silhouettes.index(max(silhouettes))]
+        start = time.perf_counter()
+        if k_selection == 'fast':
+            inertias, silhouettes = score_k_fast(vectors, k_range)
+        elif k_selection == 'exhaustive':
+            inertias, silhouettes = score_k_exhaustive(vectors, k_range)
         else:
-            # Fallback: use silhouette only
-            if silhouettes:
-                optimal_k = list(k_range)[silhouettes.index(max(silhouettes))]
-            else:
-                optimal_k = list(k_range)[0] if k_range else 10
+            raise ValueError(f"Unknown k selection: {k_selection}")
         
+        optimal_k = pick_k(k_range, inertias, silhouettes)
+        logger.info(
+            f"[TaxonomyBuilder] Scored k={k_range.start}..{k_range.stop - 1} ({k_selection}) "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
         return optimal_k
     
+    def _minibatch_ward(self, vectors: np.ndarray, n_clusters: int) -> np.ndarray:
+        """
+        Hierarchical clustering for corpora too large for exact ward.
+        
+        Mini-batch k-means first summarises the rows as up to
+        HIERARCHICAL_MICRO_CLUSTERS centres. Ward then merges those centres
+        into n_clusters, and every row takes its centre's cluster. Ward's
+        memory is bounded by the centre count instead of the row count.
+        
+        Args:
+            vectors: Vectors to cluster
+            n_clusters: Final number of clusters
+            
+        Returns:
+            Cluster label per row
+        """
+        n_micro = max(n_clusters, min(HIERARCHICAL_MICRO_CLUSTERS, len(vectors)))
+        micro = MiniBatchKMeans(
+            n_clusters=n_micro,
+            batch_size=max(MINIBATCH_SIZE, 3 * n_micro),
+            n_init=1,
+            random_state=42
+        ).fit(vectors)
+        merged = AgglomerativeClustering(n_clusters=n_clusters, linkage='ward').fit_predict(micro.cluster_centers_)
+        logger.info(
+            f"[TaxonomyBuilder] Hierarchical: {len(vectors)} rows -> {n_micro} mini-batch centres "
+            f"-> {n_clusters} clusters (ward)"
+        )
+        return merged[micro.labels_]
+    
     def _build_cluster_objects(self) -> List[Dict]:
         """
         Build cluster objects with metadata.
@@ -352,23 +418,32 @@ class TaxonomyBuilder:
         """
         clusters = []
         
-        # Convert cluster_labels to list of ints to handle numpy types
-        unique_labels = set(int(label) for label in self.cluster_labels)
+        # Group row indices by label in one sort instead of a scan per cluster
+        labels = np.asarray(self.cluster_labels, dtype=np.int64)
+        order = np.argsort(labels, kind='stable')
+        unique_labels, starts, counts = np.unique(labels[order], return_index=True, return_counts=True)
+        cohesions = self._cluster_cohesions(labels, unique_labels)
+        page_positions = {page.id: position for position, page in enumerate(self.pages)}
         
         logger.debug(f"[_build_cluster_objects] Processing {len(unique_labels)} unique labels")
         
-        for cluster_id in unique_labels:
+        for cluster_id, start, count, cohesion in zip(
+            unique_labels.tolist(), starts.tolist(), counts.tolist(), cohesions.tolist()
+        ):
             if cluster_id == -1:  # DBSCAN noise
                 continue
             
             try:
-                # Get items in this cluster - need to compare with int
-                cluster_indices = [i for i, label in enumerate(self.cluster_labels) if int(label) == cluster_id]
+                # Get items in this cluster
+                cluster_indices = order[start:start + count].tolist()
                 cluster_metadata = [self.page_metadata[i] for i in cluster_indices]
                 
-                # Get unique pages in cluster
+                # Get unique pages in cluster, in load order
                 page_ids = list(set(item['page_id'] for item in cluster_metadata))
-                cluster_pages = [p for p in self.pages if p.id in page_ids]
+                cluster_pages = [
+                    self.pages[position]
+                    for position in sorted(page_positions[page_id] for page_id in page_ids if page_id in page_positions)
+                ]
                 
                 logger.debug(f"[_build_cluster_objects] Cluster {cluster_id}: {len(cluster_pages)} pages")
                 
@@ -404,16 +479,6 @@ class TaxonomyBuilder:
                 audience_counter = Counter(audience_levels)
                 primary_audience = audience_counter.most_common(1)[0][0] if audience_counter else "intermediate"
                 
-                # Calculate cluster cohesion (avg intra-cluster similarity)
-                cluster_embeddings = self.embeddings[cluster_indices]
-                if len(cluster_embeddings) > 1:
-                    similarities = cosine_similarity(cluster_embeddings)
-                    # Get upper triangle (exclude diagonal and duplicates)
-                    triu_indices = np.triu_indices_from(similarities, k=1)
-                    cohesion = similarities[triu_indices].mean()
-                else:
-                    cohesion = 1.0
-                
                 cluster_obj = {
                     'cluster_id': cluster_id,
                     'size': len(page_ids),
@@ -424,7 +489,7 @@ class TaxonomyBuilder:
                     'primary_audience': primary_audience,
                     'learning_objectives': learning_objectives,
                     'topics': topics,
-                    'cohesion': float(cohesion),
+                    'cohesion': cohesion,
                     'metadata_items': cluster_metadata,
                 }
                 
@@ -442,6 +507,41 @@ class TaxonomyBuilder:
         
         return clusters
     
+    def _cluster_cohesions(self, labels: np.ndarray, unique_labels: np.ndarray) -> np.ndarray:
+        """
+        Average pairwise cosine similarity within each cluster.
+        
+        With unit vectors u_i and S = sum(u_i) over a cluster of n rows,
+        the sum of u_i . u_j over all pairs i != j is |S|^2 - n, so the mean
+        is (|S|^2 - n) / (n(n - 1)). One sparse product sums every cluster's
+        normalised rows in a single O(n*d) pass, without a per-cluster n x n
+        similarity matrix. All-zero rows count as similarity 0, as in
+        sklearn's cosine_similarity.
+        
+        Args:
+            labels: Cluster label per embedding row
+            unique_labels: Sorted distinct labels
+            
+        Returns:
+            Cohesion per label in unique_labels (1.0 for single-row clusters)
+        """
+        norms = np.linalg.norm(self.embeddings, axis=1)
+        nonzero = norms > 0
+        weights = np.divide(1.0, norms, out=np.zeros(len(norms)), where=nonzero)
+        rows = np.searchsorted(unique_labels, labels)
+        membership = csr_matrix(
+            (weights, (rows, np.arange(len(labels)))), shape=(len(unique_labels), len(labels))
+        )
+        sums = np.asarray(membership @ self.embeddings, dtype=np.float64)
+        
+        counts = np.bincount(rows, minlength=len(unique_labels))
+        unit_rows = np.bincount(rows, weights=nonzero, minlength=len(unique_labels))
+        pairs = counts * (counts - 1.0)
+        cohesions = np.ones(len(unique_labels))
+        multi = counts > 1
+        cohesions[multi] = ((sums[multi] ** 2).sum(axis=1) - unit_rows[multi]) / pairs[multi]
+        return cohesions
+    
     def build_prerequisite_graph(self) -> nx.DiGraph:
         """
         Build prerequisite dependency graph from ai_prerequisite_chain.
@@ -504,59 +604,51 @@ class TaxonomyBuilder:
         
         # Add inter-page relationships based on shared concepts
         # If page A introduces concept X (is_new=true) and page B uses X, A -> B
-        concept_to_introducing_page = {}
+        positions = {page.id: i for i, page in enumerate(self.pages)}
+        concept_rows = self._load_concept_index(positions)
         
-        for page in self.pages:
-            key_concepts = page.ai_key_concepts or []
-            for concept_obj in key_concepts:
-                if concept_obj.get('is_new', False):
-                    term = concept_obj.get('term', '')
-                    if term:
-                        concept_to_introducing_page[term.lower()] = page.id
-        
-        # Now create edges where pages use concepts introduced elsewhere
-        for page in self.pages:
-            key_concepts = page.ai_key_concepts or []
-            for concept_obj in key_concepts:
-                if not concept_obj.get('is_new', True):  # Assumed known
-                    term = concept_obj.get('term', '').lower()
-                    if term in concept_to_introducing_page:
-                        source_page_id = concept_to_introducing_page[term]
-                        if source_page_id != page.id:
-                            # Add edge: source page -> current page
-                            G.add_edge(
-                                f"page_{source_page_id}",
-                                f"page_{page.id}",
-                                weight=2,
-                                relationship='introduces_concept',
-                                concept=term
-                            )
+        # Introducing page per term: the last one in load order
+        concept_to_introducing_page = {}
+        for _, page_id, term, is_new in concept_rows:
+            if is_new:
+                current = concept_to_introducing_page.get(term)
+                if current is None or positions[page_id] > positions[current]:
+                    concept_to_introducing_page[term] = page_id
+        
+        # Now create edges where pages use (is_new=false) concepts introduced elsewhere,
+        # in page load order and each page's concept order
+        uses = sorted(
+            (positions[page_id], row_id, page_id, term)
+            for row_id, page_id, term, is_new in concept_rows
+            if is_new is False and term in concept_to_introducing_page
+        )
+        for _, _, page_id, term in uses:
+            source_page_id = concept_to_introducing_page[term]
+            if source_page_id != page_id:
+                # Add edge: source page -> current page
+                G.add_edge(
+                    f"page_{source_page_id}",
+                    f"page_{page_id}",
+                    weight=2,
+                    relationship='introduces_concept',
+                    concept=term
+                )
         
         self.prerequisite_graph = G
         
-        # Check for cycles
-        try:
-            cycles = list(nx.simple_cycles(G))
-            if cycles:
-                logger.warning(f"[TaxonomyBuilder] Found {len(cycles)} cycles in prerequisite graph")
-                # Break cycles by removing lowest-weight edges
-                for cycle in cycles[:10]:  # Handle first 10 cycles
-                    if len(cycle) >= 2:
-                        # Find weakest edge in cycle
-                        min_weight = float('inf')
-                        min_edge = None
-                        for i in range(len(cycle)):
-                            u, v = cycle[i], cycle[(i + 1) % len(cycle)]
-                            if G.has_edge(u, v):
-                                weight = G[u][v].get('weight', 1)
-                                if weight < min_weight:
-                                    min_weight = weight
-                                    min_edge = (u, v)
-                        if min_edge:
-                            G.remove_edge(*min_edge)
-                            logger.info(f"[TaxonomyBuilder] Removed edge {min_edge} to break cycle")
-        except nx.NetworkXError:
-            pass
+        # Break cycles: remove the edges that point backwards in a greedy order
+        # of each strongly connected component (see analyzer.graph_cycles)
+        removed_edges = feedback_arc_set(G)
+        self.removed_cycle_edges = [(u, v, dict(G[u][v])) for u, v in removed_edges]
+        if removed_edges:
+            G.remove_edges_from(removed_edges)
+            removed_weight = sum(data.get('weight', 1) for _, _, data in self.removed_cycle_edges)
+            logger.warning(
+                f"[TaxonomyBuilder] Removed {len(removed_edges)} edges (total weight {removed_weight}) "
+                f"to break cycles in prerequisite graph"
+            )
+            for u, v, data in self.removed_cycle_edges[:10]:
+                logger.debug(f"[TaxonomyBuilder] Removed edge {(u, v)} ({data.get('concept', '')}) to break cycle")
         
         logger.info(
             f"[TaxonomyBuilder] Graph built: {G.number_of_nodes()} nodes, "
@@ -565,6 +657,36 @@ class TaxonomyBuilder:
         
         return G
     
+    def _load_concept_index(self, positions: Dict[int, int]) -> List[Tuple]:
+        """
+        Concept index rows of the loaded pages (see crawler.concept_index).
+        
+        Loaded pages that have key concepts but no index rows yet (analyzed
+        before the index existed) are indexed first.
+        
+        Args:
+            positions: Load position per loaded page id
+            
+        Returns:
+            (row id, page id, normalised term, is_new) tuples
+        """
+        from crawler.concept_index import rebuild_concept_index
+        from crawler.models import CrawledPage, PageConcept
+        
+        def load():
+            rows = PageConcept.objects.filter(client_id=self.client_id).values_list('id', 'page_id', 'term', 'is_new')
+            return [row for row in rows.iterator(chunk_size=10000) if row[1] in positions]
+        
+        rows = load()
+        indexed = {row[1] for row in rows}
+        missing = [page.id for page in self.pages if page.ai_key_concepts and page.id not in indexed]
+        if missing:
+            logger.info(f"[TaxonomyBuilder] Adding {len(missing)} pages to the concept index")
+            rebuild_concept_index(CrawledPage.objects.filter(id__in=missing))
+            rows = load()
+        
+        return rows
+    
     def generate_cluster_summaries(self) -> Dict[int, Dict]:
         """
         Generate summaries for each cluster using GPT-4o-mini.
@@ -1228,6 +1350,7 @@ Use the EXACT module names from the list above. Return valid JSON only."""
             lines.append(f"\n## Prerequisite Graph\n")
             lines.append(f"Total Nodes: {G.number_of_nodes()}")
             lines.append(f"Total Edges: {G.number_of_edges()}")
+            lines.append(f"Edges Removed to Break Cycles: {len(self.removed_cycle_edges)}")
             
             page_nodes = [n for n, d in G.nodes(data=True) if d.get('type') == 'page']
             concept_nodes = [n for n, d in G.nodes(data=True) if d.get('type') == 'concept']
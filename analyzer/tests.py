@@ -0,0 +1,52 @@
+from django.test import TestCase
+
+from analyzer.documentation_analyzer import DocumentationAnalyzer
+from core.models import Client, CrawlJob
+from crawler.models import CrawledPage, PageRelationship
+
+
+class DocumentationAnalyzerQueryTests(TestCase):
+    """The analysis runs a fixed number of queries, however many pages the job has."""
+
+    @classmethod
+    def setUpTestData(cls):
+        client = Client.objects.create(name='Docs', slug='docs', contact_email='docs@example.com')
+        cls.job = CrawlJob.objects.create(client=client, target_url='https://docs.example.com/')
+        cls.add_pages(70)
+
+    @classmethod
+    def add_pages(cls, count):
+        start = cls.job.pages.count()
+        pages = CrawledPage.objects.bulk_create([
+            CrawledPage(
+                client=cls.job.client, job=cls.job, url=f'https://docs.example.com/{i}', depth=i % 3,
+                status_code=200, title=f'Page {i % 4}', doc_type='api_reference' if i % 2 else 'tutorial',
+                word_count=50 * i, readability_score=40 + i,
+                code_blocks=[{'language': 'python', 'code': 'print(1)'}] if i % 3 else [],
+            )
+            for i in range(start, start + count)
+        ])
+        PageRelationship.objects.bulk_create([
+            PageRelationship(from_page=page, to_page=target, relationship_type='related')
+            for page, target in zip(pages, pages[1:] + pages[:1])
+        ])
+
+    def test_page_metrics_aggregate_in_one_query(self):
+        metrics = DocumentationAnalyzer(self.job.id).metrics
+        with self.assertNumQueries(1):
+            metrics['total_pages']
+            metrics['stub_pages']
+            metrics['orphaned_pages']
+        with self.assertNumQueries(0):
+            metrics.values
+
+    def test_comprehensive_analysis_queries_do_not_grow_with_pages(self):
+        # 70 pages already cross every insight threshold they can, so both runs fetch the same samples
+        with self.assertNumQueries(14):
+            small = DocumentationAnalyzer(self.job.id).generate_comprehensive_analysis()
+        self.add_pages(70)
+        with self.assertNumQueries(14):
+            large = DocumentationAnalyzer(self.job.id).generate_comprehensive_analysis()
+        self.assertEqual(small['detailed_metrics']['content_quality']['stub_pages'], 2)
+        self.assertEqual(large['detailed_metrics']['content_quality']['stub_pages'], 2)
+        self.assertEqual(large['incomplete_sections'], [])
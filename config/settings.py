@@ -124,6 +124,24 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Redis Configuration
 REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/0')
 
+# Cache Configuration
+# Options: 'redis' or 'locmem'. Use redis whenever the crawler or Celery workers
+# run in separate processes, so their cache invalidations reach the web server.
+CACHE_BACKEND = config('CACHE_BACKEND', default='redis')
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': config('CACHE_REDIS_URL', default='redis://localhost:6379/2'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Celery Configuration
 CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localhost:6379/1')
@@ -225,6 +243,9 @@ CRAWLER_USER_AGENT = config(
 CRAWLER_POLITENESS_DELAY = config('CRAWLER_POLITENESS_DELAY', default=0.5, cast=float)
 CRAWLER_CONCURRENT_REQUESTS = config('CRAWLER_CONCURRENT_REQUESTS', default=16, cast=int)
 CRAWLER_DEFAULT_DEPTH_LIMIT = config('CRAWLER_DEFAULT_DEPTH_LIMIT', default=5, cast=int)
+# Live progress: 'redis' (pub/sub on REDIS_URL) or 'cache' (polls the Django cache)
+CRAWLER_PROGRESS_BACKEND = config('CRAWLER_PROGRESS_BACKEND', default='redis')
+CRAWLER_PROGRESS_INTERVAL = config('CRAWLER_PROGRESS_INTERVAL', default=1.0, cast=float)
 
 # Security
 ENCRYPTION_KEY = config('ENCRYPTION_KEY', default='dev-encryption-key-change-in-production')
@@ -241,3 +262,46 @@ SCREENSHOT_S3_PREFIX = config('SCREENSHOT_S3_PREFIX', default='screenshots/')
 # AWS_ACCESS_KEY_ID = config('AWS_ACCESS_KEY_ID', default=None)
 # AWS_SECRET_ACCESS_KEY = config('AWS_SECRET_ACCESS_KEY', default=None)
 # AWS_REGION = config('AWS_REGION', default='us-east-1')
+
+# Dashboard Settings
+# Result sets estimated above this many rows show the planner estimate instead of COUNT(*)
+DASHBOARD_ESTIMATED_COUNT_THRESHOLD = config('DASHBOARD_ESTIMATED_COUNT_THRESHOLD', default=10000, cast=int)
+DASHBOARD_SUMMARY_CACHE_TTL = config('DASHBOARD_SUMMARY_CACHE_TTL', default=300, cast=int)
+# Cached dashboard data is invalidated by data-version bumps on crawl/analysis
+# completion; TTLs only bound staleness while a crawl is still running
+DASHBOARD_VIEW_CACHE_TTL = config('DASHBOARD_VIEW_CACHE_TTL', default=24 * 60 * 60, cast=int)
+DASHBOARD_RUNNING_CACHE_TTL = config('DASHBOARD_RUNNING_CACHE_TTL', default=10, cast=int)
+DASHBOARD_FACETS_CACHE_TTL = config('DASHBOARD_FACETS_CACHE_TTL', default=600, cast=int)
+# Server-sent event streams (job logs/progress) occupy a worker thread while open;
+# they are closed after this many seconds and the browser reconnects
+DASHBOARD_STREAM_MAX_SECONDS = config('DASHBOARD_STREAM_MAX_SECONDS', default=300, cast=int)
+
+# Export API
+# Bearer tokens accepted by the NDJSON streaming export endpoints
+EXPORT_API_TOKENS = config('EXPORT_API_TOKENS', default='', cast=Csv())
+
+# AI Content Analysis
+# Optional OpenAI-compatible endpoint (e.g. a local mock server); empty uses api.openai.com
+OPENAI_BASE_URL = config('OPENAI_BASE_URL', default='')
+# Concurrent analysis engine: in-flight requests and starting rate budgets,
+# adjusted at runtime from the API's rate-limit headers
+ANALYSIS_CONCURRENCY = config('ANALYSIS_CONCURRENCY', default=8, cast=int)
+ANALYSIS_RPM = config('ANALYSIS_RPM', default=500, cast=int)
+ANALYSIS_TPM = config('ANALYSIS_TPM', default=200000, cast=int)
+# Content-addressed cache of LLM results (crawler.analysis_cache); least recently
+# used entries beyond the limit are evicted after each analysis run
+ANALYSIS_CACHE_ENABLED = config('ANALYSIS_CACHE_ENABLED', default=True, cast=bool)
+ANALYSIS_CACHE_MAX_ENTRIES = config('ANALYSIS_CACHE_MAX_ENTRIES', default=100000, cast=int)
+# Embedding vectors cached by normalised text hash + model (crawler.embedding_cache)
+EMBEDDING_CACHE_ENABLED = config('EMBEDDING_CACHE_ENABLED', default=True, cast=bool)
+EMBEDDING_CACHE_MAX_ENTRIES = config('EMBEDDING_CACHE_MAX_ENTRIES', default=100000, cast=int)
+# Where embeddings come from: 'openai', or offline 'hashing' / 'sentence-transformers'
+# (crawler.embedding_providers)
+EMBEDDING_PROVIDER = config('EMBEDDING_PROVIDER', default='openai')
+EMBEDDING_LOCAL_MODEL = config('EMBEDDING_LOCAL_MODEL', default='all-MiniLM-L6-v2')
+EMBEDDING_HASHING_DIMENSIONS = config('EMBEDDING_HASHING_DIMENSIONS', default=1536, cast=int)
+
+# Taxonomy Builder
+# Per-client float32 embedding matrices (analyzer.embedding_matrix), memory-mapped
+# by build_taxonomy and updated incrementally as pages are re-embedded
+TAXONOMY_MATRIX_CACHE_DIR = config('TAXONOMY_MATRIX_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'taxonomy_matrices'))
@@ -0,0 +1,21 @@
+"""
+Postgres database functions shared across apps.
+"""
+
+from django.db.models import Func, IntegerField
+
+
+class JSONBArrayLength(Func):
+    """
+    Length of a JSONB array, or 0 when the value is not an array.
+
+    Plain ``jsonb_array_length`` raises on scalars (including JSON null), so
+    the call is guarded with ``jsonb_typeof``.
+    """
+
+    function = 'jsonb_array_length'
+    template = (
+        "CASE WHEN jsonb_typeof(%(expressions)s) = 'array' "
+        "THEN %(function)s(%(expressions)s) ELSE 0 END"
+    )
+    output_field = IntegerField()
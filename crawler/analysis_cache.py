@@ -0,0 +1,162 @@
+"""
+Content-addressed cache of LLM analysis results.
+
+The prompt is built from the prepared page content (title, headings and the
+start of each section, see ContentAnalyzer.prepare_content), the spaCy
+candidates extracted from it, and the page's title, word count and media
+flags (ContentAnalyzer.page_prompt_inputs). The URL and the fields the
+analysis itself rewrites (doc_type, prerequisites, learning objectives) are
+left out of the prompt, so they can't split the key. Pages for which all of
+these match get the same prompt, and so the same analysis. Responses are
+stored in ``AnalysisCacheEntry`` rows keyed by ``prompt_key`` (a SHA-256 of
+the content and page fields; the spaCy output is derived from the content),
+the model and ``PROMPT_VERSION``, and are shared across jobs and clients:
+
+* unchanged pages re-analyzed after a re-crawl or with ``--force``
+* duplicate URLs (``is_duplicate=True``) and docs shared between clients
+
+copy the cached response instead of calling the API. Only the parsed model
+response is cached; the per-page result (doc_type fallback, merge with the
+regex-detected data, metadata) is still built for each page.
+
+The table is bounded by ``ANALYSIS_CACHE_MAX_ENTRIES``: ``prune()`` drops
+entries from other models or prompt versions first, then the least recently
+used ones.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Dict, Iterable
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from crawler.content_analyzer import LLM_MODEL, PROMPT_VERSION
+from crawler.models import AnalysisCacheEntry
+
+logger = logging.getLogger('crawler')
+
+
+def evict_least_recently_used(queryset, max_entries: int) -> int:
+    """Delete all but the max_entries most recently used rows (by last_used_at); returns rows deleted."""
+    # First row past the limit in LRU order; it and everything older goes
+    boundary = list(
+        queryset.order_by('-last_used_at', '-id').values_list('last_used_at', 'id')[max_entries:max_entries + 1]
+    )
+    if not boundary:
+        return 0
+    last_used_at, pk = boundary[0]
+    deleted, _ = queryset.filter(
+        Q(last_used_at__lt=last_used_at) | Q(last_used_at=last_used_at, id__lte=pk)
+    ).delete()
+    return deleted
+
+
+def prompt_key(content: str, prompt_inputs: Dict) -> str:
+    """Cache key for prepared content plus the page's other prompt inputs."""
+    payload = json.dumps([content, prompt_inputs], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Cache lookups and stores for one analysis run, with hit/miss counters.
+
+    A disabled cache never finds anything and never stores, so callers need
+    no special casing. Callers count hits and misses themselves (they also
+    know about duplicates within a run) via ``hits``/``misses``.
+
+    Args:
+        enabled: Read cached results (default ANALYSIS_CACHE_ENABLED)
+        store: Write new results (default: same as ANALYSIS_CACHE_ENABLED);
+            ``enabled=False, store=True`` refreshes entries without using them
+    """
+
+    def __init__(self, enabled=None, store=None, model=LLM_MODEL, prompt_version=PROMPT_VERSION):
+        self.enabled = settings.ANALYSIS_CACHE_ENABLED if enabled is None else enabled
+        self.store = settings.ANALYSIS_CACHE_ENABLED if store is None else store
+        self.model = model
+        self.prompt_version = prompt_version
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def summary(self) -> Dict:
+        return {
+            'cache_hits': self.hits,
+            'cache_misses': self.misses,
+            'cache_stored': self.stored,
+            'cache_hit_rate': round(self.hit_rate, 3),
+        }
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Look up cached responses in one query.
+
+        Returns {key: {'llm_result': ..., 'stats': ...}} for the keys found,
+        and marks them as used for LRU eviction.
+        """
+        keys = set(keys)
+        if not self.enabled or not keys:
+            return {}
+
+        entries = AnalysisCacheEntry.objects.filter(
+            content_hash__in=keys, model=self.model, prompt_version=self.prompt_version,
+        ).values('content_hash', 'llm_result', 'stats')
+        found = {
+            entry['content_hash']: {'llm_result': entry['llm_result'], 'stats': entry['stats']}
+            for entry in entries
+        }
+        if found:
+            AnalysisCacheEntry.objects.filter(
+                content_hash__in=list(found), model=self.model, prompt_version=self.prompt_version,
+            ).update(hit_count=F('hit_count') + 1, last_used_at=timezone.now())
+        return found
+
+    def set_many(self, results: Dict[str, Dict]):
+        """
+        Store {key: {'llm_result': ..., 'stats': ...}}; newer results replace older ones.
+        """
+        if not self.store or not results:
+            return
+        now = timezone.now()
+        AnalysisCacheEntry.objects.bulk_create(
+            [
+                AnalysisCacheEntry(
+                    content_hash=key,
+                    model=self.model,
+                    prompt_version=self.prompt_version,
+                    llm_result=value['llm_result'],
+                    stats=value.get('stats') or {},
+                    last_used_at=now,
+                )
+                for key, value in results.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['content_hash', 'model', 'prompt_version'],
+            update_fields=['llm_result', 'stats', 'last_used_at'],
+        )
+        self.stored += len(results)
+
+    def prune(self, max_entries=None) -> int:
+        """Evict stale and least recently used entries beyond the size limit; returns rows deleted."""
+        if not self.store:
+            return 0
+        max_entries = settings.ANALYSIS_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+
+        deleted, _ = AnalysisCacheEntry.objects.exclude(
+            model=self.model, prompt_version=self.prompt_version,
+        ).delete()
+
+        deleted += evict_least_recently_used(AnalysisCacheEntry.objects.all(), max_entries)
+
+        if deleted:
+            logger.info(f"[AnalysisCache] Evicted {deleted} entries (limit {max_entries})")
+        return deleted
@@ -0,0 +1,608 @@
+"""
+Concurrent AI content analysis.
+
+``AsyncAnalysisEngine`` runs ContentAnalyzer over many pages at once:
+
+* pages are loaded in chunks and spaCy preprocessing runs on a thread or
+  process pool, ahead of the LLM calls (pipelined through a bounded queue);
+  each chunk is split across the pool and parsed with batched ``nlp.pipe``
+* up to ``concurrency`` chat completions are in flight on ``AsyncOpenAI``
+* requests-per-minute and tokens-per-minute token buckets gate every call;
+  they follow the ``x-ratelimit-*`` response headers and back off on 429s
+* results are written with ``bulk_update`` in batches
+* pages whose prompt inputs are already in the analysis cache (or are
+  being analyzed for another page in the same run) reuse that response
+  instead of calling the API; learning-objective embeddings go through the
+  embedding cache the same way
+
+Point ``base_url`` at any OpenAI-compatible server (e.g. ``manage.py
+mock_openai_server``) to exercise the engine without the real API.
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import random
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from asgiref.sync import sync_to_async
+
+from crawler.analysis_cache import AnalysisCache, prompt_key
+from crawler.concept_index import index_pages
+from crawler.content_analyzer import (
+    ANALYSIS_UPDATE_FIELDS,
+    SKIP_DOC_TYPES,
+    ContentAnalyzer,
+    apply_analysis_result,
+    preprocess_many_in_worker,
+)
+from crawler.embedding_cache import EmbeddingCache, text_key
+from crawler.models import CrawledPage
+
+logger = logging.getLogger('crawler')
+
+# Columns needed to analyze a page and merge the result
+PAGE_FIELDS = [
+    'id', 'client_id', 'url', 'title', 'main_content', 'sections', 'doc_type',
+    'prerequisites', 'learning_objectives', 'has_examples', 'images',
+    'has_videos', 'word_count',
+]
+
+# Rough completion size used to reserve TPM budget before a call
+ESTIMATED_COMPLETION_TOKENS = 1200
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+
+
+def parse_reset_duration(value) -> Optional[float]:
+    """Parse OpenAI reset headers like '1s', '6m0s' or '120ms' into seconds."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    scale = {'h': 3600, 'm': 60, 's': 1, 'ms': 0.001}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def estimate_tokens(messages: List[Dict]) -> int:
+    """Cheap prompt token estimate (~4 characters per token) plus the expected completion."""
+    chars = sum(len(message.get('content') or '') for message in messages)
+    return chars // 4 + ESTIMATED_COMPLETION_TOKENS
+
+
+class TokenBucket:
+    """
+    Async token bucket refilled continuously at ``limit`` units per minute.
+
+    The effective rate is ``limit * factor``: the limit follows what the API
+    reports, while the factor drops on 429s and recovers on successes.
+    """
+
+    def __init__(self, limit_per_minute: float):
+        self.limit = float(limit_per_minute)
+        self.factor = 1.0
+        self.level = self.limit
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def rate(self) -> float:
+        """Units per second."""
+        return max(self.limit * self.factor, 1.0) / 60.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.limit, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1):
+        # Requests larger than the whole bucket are clamped so they can ever proceed
+        amount = min(amount, self.limit)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill()
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                await asyncio.sleep((amount - self.level) / self.rate)
+
+    def refund(self, amount: float):
+        """Give back over-reserved units (e.g. when actual usage was below the estimate)."""
+        self._refill()
+        self.level = min(self.limit, self.level + amount)
+
+    def observe(self, limit=None, remaining=None, reset_seconds=None):
+        """Align the bucket with rate-limit headers from the API."""
+        if limit:
+            self.limit = float(limit)
+        if remaining is not None:
+            self._refill()
+            self.level = min(self.level, float(remaining))
+            if float(remaining) <= 0 and reset_seconds:
+                self.pause(reset_seconds)
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def slow_down(self):
+        self.factor = max(self.factor * 0.5, 0.1)
+
+    def speed_up(self):
+        self.factor = min(self.factor * 1.05, 1.0)
+
+
+class AdaptiveRateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets driven by API feedback."""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.rate_limited = 0
+
+    async def acquire(self, tokens: int):
+        await self.requests.acquire(1)
+        await self.tokens.acquire(tokens)
+
+    def observe_headers(self, headers):
+        self.requests.observe(
+            limit=_int_header(headers, 'x-ratelimit-limit-requests'),
+            remaining=_int_header(headers, 'x-ratelimit-remaining-requests'),
+            reset_seconds=parse_reset_duration(headers.get('x-ratelimit-reset-requests')),
+        )
+        self.tokens.observe(
+            limit=_int_header(headers, 'x-ratelimit-limit-tokens'),
+            remaining=_int_header(headers, 'x-ratelimit-remaining-tokens'),
+            reset_seconds=parse_reset_duration(headers.get('x-ratelimit-reset-tokens')),
+        )
+
+    def on_success(self, estimated_tokens: int, used_tokens: Optional[int]):
+        self.requests.speed_up()
+        self.tokens.speed_up()
+        if used_tokens is not None and used_tokens < estimated_tokens:
+            self.tokens.refund(estimated_tokens - used_tokens)
+
+    def on_rate_limited(self, retry_after: float):
+        self.rate_limited += 1
+        for bucket in (self.requests, self.tokens):
+            bucket.slow_down()
+            bucket.pause(retry_after)
+
+
+def _int_header(headers, name):
+    value = headers.get(name)
+    try:
+        return int(float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _retry_after(headers, attempt: int) -> float:
+    """Seconds to wait after a 429, from the response headers or exponential backoff."""
+    if headers:
+        if headers.get('retry-after-ms'):
+            try:
+                return float(headers['retry-after-ms']) / 1000
+            except ValueError:
+                pass
+        for name in ('retry-after', 'x-ratelimit-reset-requests', 'x-ratelimit-reset-tokens'):
+            seconds = parse_reset_duration(headers.get(name))
+            if seconds:
+                return seconds
+    return min(2 ** attempt, 60) + random.random()
+
+
+class AsyncAnalysisEngine:
+    """
+    Analyze pages concurrently and save results in batches.
+
+    Args:
+        analyzer: ContentAnalyzer providing prompts, preprocessing and merging
+        concurrency: Maximum chat completions in flight
+        rpm / tpm: Initial request and token budgets per minute (adjusted
+            from rate-limit headers as responses arrive)
+        batch_size: Pages loaded per chunk and saved per bulk_update
+        spacy_workers: Size of the preprocessing pool
+        spacy_processes: Use a process pool (one spaCy model per process)
+            instead of a thread pool
+        max_retries: Attempts per page for 429s and transient API errors
+        generate_lo_embeddings: Also embed learning objectives, with the
+            analyzer's embedding provider (local providers run in a thread)
+        on_page: Optional callback(page, result, error) after each page
+        cache: AnalysisCache to use (default: one following the settings)
+        embedding_cache: EmbeddingCache for learning-objective embeddings
+            (default: one following the settings)
+    """
+
+    def __init__(
+        self,
+        analyzer: ContentAnalyzer,
+        concurrency: int = 8,
+        rpm: int = 500,
+        tpm: int = 200000,
+        batch_size: int = 50,
+        spacy_workers: int = 1,
+        spacy_processes: bool = False,
+        max_retries: int = 5,
+        generate_lo_embeddings: bool = True,
+        on_page: Optional[Callable] = None,
+        cache: Optional[AnalysisCache] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+    ):
+        self.analyzer = analyzer
+        self.concurrency = max(concurrency, 1)
+        self.rpm = rpm
+        self.tpm = tpm
+        self.batch_size = max(batch_size, 1)
+        self.spacy_workers = max(spacy_workers, 1)
+        self.spacy_processes = spacy_processes
+        self.max_retries = max_retries
+        self.generate_lo_embeddings = generate_lo_embeddings
+        self.on_page = on_page
+        self.cache = cache or AnalysisCache()
+        self.embedding_provider = None
+        if generate_lo_embeddings:
+            try:
+                self.embedding_provider = analyzer.embedding_provider
+            except ValueError as exc:
+                # Same policy as a failed embeddings call: analyze without them
+                logger.error(f"[AnalysisEngine] Learning-objective embeddings disabled: {exc}")
+                self.generate_lo_embeddings = False
+        self.embedding_cache = embedding_cache or EmbeddingCache(
+            model=self.embedding_provider.model if self.embedding_provider else '',
+        )
+
+        self.stats = {
+            'success': 0,
+            'errors': 0,
+            'skipped': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'rate_limited': 0,
+            'retries': 0,
+            'elapsed_seconds': 0.0,
+        }
+        self.client_ids = set()
+        self._pending = []
+        # Cache keys being analyzed (-> future resolved with the cache entry),
+        # and new entries waiting to be written with the next flush
+        self._inflight = {}
+        self._cache_pending = {}
+        self._embedding_cache_pending = {}
+
+    def run(self, page_ids: List[int]) -> Dict:
+        """Analyze the given pages; blocking entry point for commands and views."""
+        return asyncio.run(self.analyze(page_ids))
+
+    async def analyze(self, page_ids: List[int]) -> Dict:
+        from openai import AsyncOpenAI
+
+        start = time.monotonic()
+        # Retries are handled here so 429s feed the rate limiter
+        self.client = AsyncOpenAI(
+            api_key=self.analyzer.openai_api_key,
+            base_url=self.analyzer.base_url,
+            max_retries=0,
+        )
+        self.limiter = AdaptiveRateLimiter(self.rpm, self.tpm)
+        self._flush_lock = asyncio.Lock()
+
+        if self.spacy_processes:
+            # spawn: forked children would inherit DB connections and, on macOS, crash
+            pool = ProcessPoolExecutor(
+                max_workers=self.spacy_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+            preprocess = preprocess_many_in_worker
+        else:
+            pool = ThreadPoolExecutor(max_workers=self.spacy_workers, thread_name_prefix='spacy')
+            # Load the model once before threads race for it
+            await asyncio.get_running_loop().run_in_executor(pool, lambda: self.analyzer.spacy_nlp)
+            preprocess = self.analyzer.preprocess_many
+
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        try:
+            workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)]
+            try:
+                await self._produce(page_ids, queue, pool, preprocess)
+            finally:
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            await self._flush()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            await self.client.close()
+        await sync_to_async(self.cache.prune)()
+        await sync_to_async(self.embedding_cache.prune)()
+
+        self.stats.update(self.cache.summary())
+        self.stats.update({
+            f'embedding_{name}': value for name, value in self.embedding_cache.summary().items()
+        })
+        self.stats['rate_limited'] = self.limiter.rate_limited
+        self.stats['elapsed_seconds'] = round(time.monotonic() - start, 2)
+        return self.stats
+
+    # ------------------------------------------------------------
+    # Pipeline stages
+    # ------------------------------------------------------------
+
+    async def _produce(self, page_ids, queue, pool, preprocess):
+        """
+        Load pages chunk by chunk and preprocess them ahead of the LLM workers.
+
+        Queue items are (page, prepared, key, cached): cache hits carry the
+        cached entry (or a future for content analyzed elsewhere in this
+        run) instead of preprocessed content.
+        """
+        loop = asyncio.get_running_loop()
+        for offset in range(0, len(page_ids), self.batch_size):
+            pages = await sync_to_async(self._load_pages)(page_ids[offset:offset + self.batch_size])
+            keys = {
+                page.id: prompt_key(
+                    self.analyzer.prepare_content(page.title, page.main_content or '', page.sections or []),
+                    self.analyzer.page_prompt_inputs(page),
+                )
+                for page in pages if page.doc_type not in SKIP_DOC_TYPES
+            }
+            cached = await sync_to_async(self.cache.get_many)(set(keys.values()) - set(self._inflight))
+
+            items = []
+            misses = []
+            for page in pages:
+                key = keys.get(page.id)
+                if key is None:
+                    self.stats['skipped'] += 1
+                    continue
+                entry = cached.get(key) or self._cache_pending.get(key) or self._inflight.get(key)
+                if entry is not None:
+                    self.cache.hits += 1
+                    items.append((page, key, entry))
+                    continue
+                self.cache.misses += 1
+                self._inflight[key] = loop.create_future()
+                items.append((page, key, None))
+                misses.append(page)
+
+            # One nlp.pipe call per worker, each over a slice of the chunk
+            size = max(-(-len(misses) // self.spacy_workers), 1)
+            preprocessing = {}
+            for start in range(0, len(misses), size):
+                batch = misses[start:start + size]
+                future = loop.run_in_executor(
+                    pool, preprocess,
+                    [(page.title, page.main_content or '', page.sections or []) for page in batch],
+                )
+                for index, page in enumerate(batch):
+                    preprocessing[page.id] = (future, index)
+
+            for page, key, entry in items:
+                if entry is not None:
+                    await queue.put((page, None, key, entry))
+                    continue
+                future, index = preprocessing[page.id]
+                try:
+                    prepared = (await future)[index]
+                except Exception as exc:
+                    self._resolve(key, None)
+                    self._record_error(page, exc)
+                    continue
+                await queue.put((page, prepared, key, None))
+
+    async def _worker(self, queue):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            page, prepared, key, cached = item
+            try:
+                if prepared is None:
+                    result = await self._from_cache(cached, page)
+                else:
+                    try:
+                        llm_result, seconds = await self._analyze(page, prepared)
+                    except Exception:
+                        self._resolve(key, None)
+                        raise
+                    stats = self.analyzer.preprocess_stats(prepared)
+                    self._resolve(key, {'llm_result': llm_result, 'stats': stats})
+                    result = self.analyzer.build_result(llm_result, page.doc_type, stats, seconds)
+                lo_embeddings = []
+                if self.generate_lo_embeddings and result['ai_learning_objectives']:
+                    lo_embeddings = await self._embed_learning_objectives(page, result['ai_learning_objectives'])
+                apply_analysis_result(page, result, self.analyzer, lo_embeddings)
+            except Exception as exc:
+                self._record_error(page, exc)
+                continue
+
+            self.stats['success'] += 1
+            self.client_ids.add(page.client_id)
+            self._notify(page, result, None)
+            self._pending.append(page)
+            if len(self._pending) >= self.batch_size:
+                await self._flush()
+
+    async def _from_cache(self, cached, page) -> Dict:
+        if isinstance(cached, asyncio.Future):
+            cached = await cached
+            if cached is None:
+                raise RuntimeError("analysis of a page with the same content failed")
+        return self.analyzer.build_result(
+            cached['llm_result'], page.doc_type, cached['stats'], 0,
+            extra_metadata={'cache_hit': True},
+        )
+
+    def _resolve(self, key, entry):
+        """Hand a finished analysis (or None on failure) to pages waiting on the same content."""
+        future = self._inflight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(entry)
+        if entry is not None:
+            self._cache_pending[key] = entry
+
+    async def _analyze(self, page, prepared):
+        """
+        Run the LLM step for one page, retrying 429s and transient errors.
+
+        Returns (parsed response, seconds spent on the successful call).
+        """
+        import openai
+
+        request = self.analyzer.build_chat_request(
+            content=prepared['content'],
+            topic_candidates=prepared['topic_candidates'],
+            prerequisite_mentions=prepared['prerequisite_mentions'],
+            **self.analyzer.page_prompt_inputs(page),
+        )
+        estimated = estimate_tokens(request['messages'])
+
+        attempt = 0
+        while True:
+            await self.limiter.acquire(estimated)
+            started = time.monotonic()
+            try:
+                raw = await self.client.chat.completions.with_raw_response.create(**request)
+            except openai.RateLimitError as exc:
+                headers = exc.response.headers if exc.response is not None else {}
+                self.limiter.observe_headers(headers)
+                wait = _retry_after(headers, attempt)
+                self.limiter.on_rate_limited(wait)
+                logger.warning(f"[AnalysisEngine] Page {page.id}: rate limited, retrying in {wait:.1f}s")
+            except (openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError) as exc:
+                wait = min(2 ** attempt, 60) + random.random()
+                logger.warning(f"[AnalysisEngine] Page {page.id}: {exc.__class__.__name__}, retrying in {wait:.1f}s")
+                await asyncio.sleep(wait)
+            else:
+                self.limiter.observe_headers(raw.headers)
+                response = raw.parse()
+                usage = response.usage
+                self.limiter.on_success(estimated, usage.total_tokens if usage else None)
+                if usage:
+                    self.stats['prompt_tokens'] += usage.prompt_tokens
+                    self.stats['completion_tokens'] += usage.completion_tokens
+                return json.loads(response.choices[0].message.content), time.monotonic() - started
+
+            attempt += 1
+            self.stats['retries'] += 1
+            if attempt > self.max_retries:
+                raise RuntimeError(f"gave up after {self.max_retries} retries")
+
+    async def _embed_learning_objectives(self, page, learning_objectives) -> List[Dict]:
+        inputs = self.analyzer.learning_objective_inputs(learning_objectives, page_context=f"{page.title}")
+        keys = [text_key(text) for text in inputs]
+        texts = dict(zip(keys, inputs))
+        found = {key: self._embedding_cache_pending[key] for key in texts if key in self._embedding_cache_pending}
+        if len(found) < len(texts):
+            found.update(await sync_to_async(self.embedding_cache.get_many)(set(texts) - set(found)))
+        missing = [key for key in texts if key not in found]
+
+        if missing:
+            provider = self.embedding_provider
+            try:
+                if provider.is_remote:
+                    await self.limiter.acquire(sum(len(texts[key]) for key in missing) // 4)
+                    response = await self.client.embeddings.create(
+                        model=provider.model, input=[texts[key] for key in missing],
+                    )
+                    new_vectors = {missing[d.index]: d.embedding for d in response.data}
+                else:
+                    vectors = await asyncio.to_thread(provider.embed, [texts[key] for key in missing])
+                    new_vectors = dict(zip(missing, vectors))
+            except Exception as exc:
+                # Same policy as the synchronous path: keep the analysis, skip the embeddings
+                logger.error(f"[AnalysisEngine] Page {page.id}: error generating LO embeddings: {exc}")
+                return []
+            self._embedding_cache_pending.update(new_vectors)
+            found.update(new_vectors)
+
+        self.embedding_cache.misses += len(missing)
+        self.embedding_cache.hits += len(keys) - len(missing)
+        self.embedding_cache.tokens_saved += sum(len(texts[key]) // 4 for key in keys if key not in missing)
+        vectors = [found[key] for key in keys]
+        return self.analyzer.learning_objective_records(learning_objectives, vectors, self.embedding_provider.model)
+
+    # ------------------------------------------------------------
+    # Database access
+    # ------------------------------------------------------------
+
+    def _load_pages(self, ids):
+        pages = CrawledPage.objects.only(*PAGE_FIELDS).in_bulk(ids)
+        return [pages[page_id] for page_id in ids if page_id in pages]
+
+    async def _flush(self):
+        """
+        Write pending cache entries and analyzed pages.
+
+        Never raises: a worker that died here would leave the producer
+        blocked on the full queue. Failures are logged, and pages that could
+        not be saved are counted as errors.
+        """
+        async with self._flush_lock:
+            if self._cache_pending:
+                entries, self._cache_pending = self._cache_pending, {}
+                try:
+                    await sync_to_async(self.cache.set_many)(entries)
+                except Exception as exc:
+                    logger.error(f"[AnalysisEngine] Could not store {len(entries)} analysis cache entries: {exc}")
+            if self._embedding_cache_pending:
+                vectors, self._embedding_cache_pending = self._embedding_cache_pending, {}
+                try:
+                    await sync_to_async(self.embedding_cache.set_many)(vectors)
+                except Exception as exc:
+                    logger.error(f"[AnalysisEngine] Could not store {len(vectors)} embedding cache entries: {exc}")
+            if not self._pending:
+                return
+            pages, self._pending = self._pending, []
+            try:
+                await sync_to_async(CrawledPage.objects.bulk_update)(
+                    pages, ANALYSIS_UPDATE_FIELDS, batch_size=self.batch_size,
+                )
+            except Exception as exc:
+                self._record_save_error(pages, exc)
+                return
+            try:
+                await sync_to_async(index_pages)(pages)
+            except Exception as exc:
+                logger.error(
+                    f"[AnalysisEngine] Could not index {len(pages)} saved pages "
+                    f"(rebuild with analyze_content --rebuild-concept-index): {exc}"
+                )
+            logger.info(f"[AnalysisEngine] Saved {len(pages)} analyzed pages")
+
+    def _record_error(self, page, exc):
+        self.stats['errors'] += 1
+        logger.error(f"[AnalysisEngine] Page {page.id}: analysis failed: {exc}")
+        self._notify(page, None, exc)
+
+    def _record_save_error(self, pages, exc):
+        # These pages were already counted (and reported) as analyzed
+        self.stats['success'] -= len(pages)
+        self.stats['errors'] += len(pages)
+        logger.error(
+            f"[AnalysisEngine] Could not save {len(pages)} analyzed pages "
+            f"({', '.join(str(page.id) for page in pages)}): {exc}"
+        )
+
+    def _notify(self, page, result, error):
+        """Call on_page; a failing callback must not take a worker down with it."""
+        if not self.on_page:
+            return
+        try:
+            self.on_page(page, result, error)
+        except Exception as exc:
+            logger.error(f"[AnalysisEngine] Page {page.id}: on_page callback failed: {exc}")
@@ -0,0 +1,660 @@
+"""
+OpenAI Batch API mode for bulk content analysis and embeddings.
+
+For backfills that do not need interactive latency, requests are written to
+JSONL files (one request per page, ``custom_id = "page-<id>"``), uploaded,
+and submitted as batch jobs that OpenAI completes within 24 hours at a
+lower price. Results are streamed back line by line and applied to
+``CrawledPage`` rows with ``bulk_update``.
+
+Every step is recorded on an ``OpenAIBatch`` row, so a run can be stopped
+at any point and resumed later with ``--batch-resume``:
+
+    prepared  -> JSONL written locally (not uploaded/submitted yet)
+    submitted -> batch created remotely; poll until it finishes
+    completed -> remote batch finished; results not applied yet
+    applied   -> results written to pages
+    failed    -> remote batch failed/expired/cancelled with no output
+
+Analysis batches go through the analysis cache: pages whose prompt inputs
+are already cached are applied straight away, pages sharing them within a
+batch file share one request, and applied results are added to the cache.
+Embedding batches do the same per input text with the embedding cache: a
+page's request only carries texts that are neither cached nor already
+requested in the same file, and the rest of its vectors are looked up when
+the results are applied.
+
+Any OpenAI-compatible server implementing /files and /batches works,
+including ``manage.py mock_openai_server``.
+"""
+
+import json
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from crawler.analysis_cache import AnalysisCache, prompt_key
+from crawler.concept_index import index_pages
+from crawler.content_analyzer import ANALYSIS_UPDATE_FIELDS, apply_analysis_result
+from crawler.embedding_cache import EmbeddingCache, text_key
+from crawler.embeddings import (
+    EMBEDDING_MODEL,
+    EMBEDDING_UPDATE_FIELDS,
+    assign_page_embeddings,
+    page_embedding_inputs,
+    truncate_to_tokens,
+)
+from crawler.models import CrawledPage, OpenAIBatch
+from dashboard.caching import bump_data_version
+
+logger = logging.getLogger('crawler')
+
+ENDPOINTS = {
+    'analysis': '/v1/chat/completions',
+    'embeddings': '/v1/embeddings',
+}
+
+# Batch API limits: 50,000 requests and 200 MB per input file
+MAX_BATCH_REQUESTS = 50000
+MAX_BATCH_BYTES = 190 * 1024 * 1024
+
+ACTIVE_STATUSES = ('prepared', 'submitted', 'completed')
+
+# Remote statuses after which a batch will not change any more
+REMOTE_FINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+# Pages loaded and saved per round trip when applying results
+APPLY_CHUNK_SIZE = 500
+
+
+def batch_dir():
+    return Path(settings.BASE_DIR) / 'batches'
+
+
+def custom_id_for(page_id):
+    return f'page-{page_id}'
+
+
+def page_id_from(custom_id):
+    return int(custom_id.rsplit('-', 1)[1])
+
+
+class BatchManager:
+    """
+    Prepare, submit, poll and apply OpenAI batch jobs for one kind of work.
+
+    Args:
+        client: OpenAI client (any OpenAI-compatible base_url)
+        kind: 'analysis' or 'embeddings'
+        analyzer: ContentAnalyzer, required for 'analysis'
+        log: Optional callable receiving progress messages
+        cache: AnalysisCache for 'analysis', EmbeddingCache for 'embeddings'
+            (default: one following the settings)
+    """
+
+    def __init__(self, client, kind, analyzer=None, log=None, cache=None):
+        if kind not in ENDPOINTS:
+            raise ValueError(f"Unknown batch kind: {kind}")
+        if kind == 'analysis' and analyzer is None:
+            raise ValueError("Analysis batches need a ContentAnalyzer")
+        self.client = client
+        self.kind = kind
+        self.analyzer = analyzer
+        self.log = log or logger.info
+        self.cache = cache or (AnalysisCache() if kind == 'analysis' else EmbeddingCache())
+
+    # ------------------------------------------------------------
+    # Prepare
+    # ------------------------------------------------------------
+
+    def prepare(self, queryset, job_id=None, client_id=None, max_requests=MAX_BATCH_REQUESTS,
+                max_bytes=MAX_BATCH_BYTES):
+        """
+        Write batch request files for the pages in a queryset.
+
+        Large selections are split across several batches to respect the
+        per-file limits. Returns the created OpenAIBatch rows.
+        """
+        batch_dir().mkdir(parents=True, exist_ok=True)
+        batches = []
+        writer = None
+        # Requests of the current file by cache key; exists before the file is opened
+        # so the first page's texts are deduplicated too
+        keys = {}
+
+        for page in self._uncached_pages(queryset):
+            key = getattr(page, 'cache_key', None)
+            if key in keys:
+                # Same content as a request already in this file: apply its result to this page too
+                keys[key].setdefault('duplicate_page_ids', []).append(page.id)
+                self.cache.hits += 1
+                continue
+            if key:
+                self.cache.misses += 1
+
+            # Texts are only shared across pages through the cache
+            requested = keys if self.cache.enabled else {}
+            request = self._build_request(page, requested)
+            if request is None:
+                continue
+            body, metadata = request
+            custom_id = custom_id_for(page.id)
+            if body is None:
+                # Every text is requested by other pages in this file; resolved when applying
+                writer['metadata'][custom_id] = metadata
+                self._count_embedding_request(page, metadata)
+                continue
+            line = self._request_line(custom_id, body)
+
+            if writer and (writer['count'] >= max_requests or writer['bytes'] + len(line) > max_bytes):
+                if self.kind == 'embeddings' and requested is keys:
+                    # This page goes to the next file: its texts are not requested in this one
+                    for i in metadata['sent']:
+                        del requested[metadata['cache_keys'][i]]
+                batches.append(self._close_writer(writer))
+                keys = {}
+                writer = self._open_writer(job_id, client_id)
+                if self.kind == 'embeddings':
+                    # Texts requested in the previous file are not in this one
+                    requested = keys if self.cache.enabled else {}
+                    body, metadata = self._build_request(page, requested)
+                    line = self._request_line(custom_id, body)
+            if writer is None:
+                writer = self._open_writer(job_id, client_id)
+            if self.kind == 'embeddings':
+                self._count_embedding_request(page, metadata)
+
+            writer['file'].write(line)
+            writer['count'] += 1
+            writer['bytes'] += len(line)
+            writer['metadata'][custom_id] = metadata
+            if key:
+                metadata['cache_key'] = key
+                keys[key] = metadata
+
+        if writer:
+            batches.append(self._close_writer(writer))
+        return batches
+
+    def _request_line(self, custom_id, body):
+        return json.dumps({
+            'custom_id': custom_id,
+            'method': 'POST',
+            'url': ENDPOINTS[self.kind],
+            'body': body,
+        }, ensure_ascii=False).encode('utf-8') + b'\n'
+
+    def _open_writer(self, job_id, client_id):
+        batch = OpenAIBatch.objects.create(
+            kind=self.kind,
+            job_id=job_id,
+            client_id=client_id,
+            input_path='',
+        )
+        path = batch_dir() / f'{self.kind}_{batch.id}.jsonl'
+        batch.input_path = str(path)
+        batch.save(update_fields=['input_path', 'updated_at'])
+        return {
+            'batch': batch,
+            'file': open(path, 'wb'),
+            'count': 0,
+            'bytes': 0,
+            'metadata': {},
+        }
+
+    def _close_writer(self, writer):
+        writer['file'].close()
+        batch = writer['batch']
+        batch.request_count = writer['count']
+        batch.request_metadata = writer['metadata']
+        batch.save(update_fields=['request_count', 'request_metadata', 'updated_at'])
+        self.log(f"Prepared {self.kind} batch #{batch.id}: {batch.request_count} requests ({writer['bytes'] / 1e6:.1f} MB)")
+        return batch
+
+    def _uncached_pages(self, queryset):
+        """
+        Yield the pages that need a request.
+
+        For analysis, pages whose prompt inputs are in the cache get the
+        cached result applied here instead; the others carry their cache key
+        as ``page.cache_key`` and their spaCy preprocessing (done a chunk at
+        a time with nlp.pipe) as ``page.prepared``. For embeddings, pages
+        whose texts are all cached get their vectors here; the others carry
+        their inputs as ``page.embedding_inputs``.
+        """
+        prepare_chunk = self._prepare_chunk if self.kind == 'analysis' else self._prepare_embedding_chunk
+        chunk = []
+        for page in queryset.iterator(chunk_size=APPLY_CHUNK_SIZE):
+            chunk.append(page)
+            if len(chunk) >= APPLY_CHUNK_SIZE:
+                yield from prepare_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield from prepare_chunk(chunk)
+
+    def _prepare_chunk(self, pages):
+        for page in pages:
+            page.cache_key = prompt_key(
+                self.analyzer.prepare_content(page.title, page.main_content or '', page.sections or []),
+                self.analyzer.page_prompt_inputs(page),
+            )
+        cached = self.cache.get_many(page.cache_key for page in pages)
+
+        updated = []
+        for page in pages:
+            entry = cached.get(page.cache_key)
+            if entry is None:
+                continue
+            result = self.analyzer.build_result(
+                entry['llm_result'], page.doc_type, entry['stats'], 0, extra_metadata={'cache_hit': True},
+            )
+            apply_analysis_result(page, result, self.analyzer)
+            updated.append(page)
+
+        if updated:
+            self.cache.hits += len(updated)
+            CrawledPage.objects.bulk_update(updated, ANALYSIS_UPDATE_FIELDS, batch_size=APPLY_CHUNK_SIZE)
+            index_pages(updated)
+            for client_id in {page.client_id for page in updated}:
+                bump_data_version(client_id)
+            self.log(f"Applied {len(updated)} cached analysis result(s) without a request")
+
+        remaining = [page for page in pages if page.cache_key not in cached]
+        unique = {}
+        for page in remaining:
+            unique.setdefault(page.cache_key, page)
+        prepared = self.analyzer.preprocess_many(
+            [(page.title, page.main_content or '', page.sections or []) for page in unique.values()]
+        )
+        by_key = dict(zip(unique, prepared))
+        for page in remaining:
+            page.prepared = by_key[page.cache_key]
+        return remaining
+
+    def _prepare_embedding_chunk(self, pages):
+        entries = []
+        for page in pages:
+            inputs, index_map = page_embedding_inputs(page)
+            if inputs:
+                entries.append((page, inputs, index_map, [text_key(text) for text in inputs]))
+        cached = self.cache.get_many(key for *_, keys in entries for key in keys)
+
+        updated = []
+        remaining = []
+        for page, inputs, index_map, keys in entries:
+            hits = [i for i, key in enumerate(keys) if key in cached]
+            self.cache.hits += len(hits)
+            self.cache.tokens_saved += sum(truncate_to_tokens(inputs[i])[1] for i in hits)
+            if len(hits) == len(keys):
+                assign_page_embeddings(page, index_map, [cached[key] for key in keys])
+                updated.append(page)
+            else:
+                page.embedding_inputs = (inputs, index_map, keys, {keys[i] for i in hits})
+                remaining.append(page)
+
+        if updated:
+            CrawledPage.objects.bulk_update(updated, EMBEDDING_UPDATE_FIELDS, batch_size=APPLY_CHUNK_SIZE)
+            for client_id in {page.client_id for page in updated}:
+                bump_data_version(client_id)
+            self.log(f"Applied cached embeddings to {len(updated)} page(s) without a request")
+        return remaining
+
+    def _count_embedding_request(self, page, metadata):
+        """Record sent texts as cache misses and those requested by other pages as hits."""
+        inputs, _, keys, cached = page.embedding_inputs
+        sent = set(metadata['sent'])
+        duplicates = [i for i, key in enumerate(keys) if key not in cached and i not in sent]
+        self.cache.misses += len(sent)
+        self.cache.hits += len(duplicates)
+        self.cache.tokens_saved += sum(truncate_to_tokens(inputs[i])[1] for i in duplicates)
+
+    def _build_request(self, page, requested):
+        """
+        Return (request body, metadata needed to apply the result) or None to skip.
+
+        ``requested`` holds the embedding cache keys already requested in the
+        current file; a body of None means the page needs no request of its own.
+        """
+        if self.kind == 'embeddings':
+            inputs, index_map, keys, cached = page.embedding_inputs
+            sent = []
+            for i, key in enumerate(keys):
+                if key not in cached and key not in requested:
+                    requested[key] = True
+                    sent.append(i)
+            metadata = {'index_map': index_map, 'cache_keys': keys, 'sent': sent}
+            if not sent:
+                return None, metadata
+            return {'model': EMBEDDING_MODEL, 'input': [truncate_to_tokens(inputs[i])[0] for i in sent]}, metadata
+
+        prepared = page.prepared
+        body = self.analyzer.build_chat_request(
+            content=prepared['content'],
+            topic_candidates=prepared['topic_candidates'],
+            prerequisite_mentions=prepared['prerequisite_mentions'],
+            **self.analyzer.page_prompt_inputs(page),
+        )
+        return body, {'stats': self.analyzer.preprocess_stats(prepared)}
+
+    # ------------------------------------------------------------
+    # Submit / poll
+    # ------------------------------------------------------------
+
+    def submit(self, batch):
+        """Upload the request file (once) and create the remote batch (once)."""
+        resumed_upload = bool(batch.input_file_id)
+        if not batch.input_file_id:
+            with open(batch.input_path, 'rb') as f:
+                uploaded = self.client.files.create(file=f, purpose='batch')
+            batch.input_file_id = uploaded.id
+            batch.save(update_fields=['input_file_id', 'updated_at'])
+            self.log(f"Batch #{batch.id}: uploaded {batch.input_path} as {uploaded.id}")
+
+        if not batch.batch_id:
+            # A previous run may have created the batch but died before saving its id
+            remote = (self._find_remote(batch) if resumed_upload else None) or self.client.batches.create(
+                input_file_id=batch.input_file_id,
+                endpoint=ENDPOINTS[self.kind],
+                completion_window='24h',
+                metadata={'local_batch_id': str(batch.id), 'kind': self.kind},
+            )
+            batch.batch_id = remote.id
+            batch.remote_status = remote.status
+            batch.status = 'submitted'
+            batch.submitted_at = timezone.now()
+            batch.save(update_fields=['batch_id', 'remote_status', 'status', 'submitted_at', 'updated_at'])
+            self.log(f"Batch #{batch.id}: submitted as {remote.id}")
+
+    def _find_remote(self, batch):
+        try:
+            for remote in self.client.batches.list(limit=100):
+                if (remote.metadata or {}).get('local_batch_id') == str(batch.id) \
+                        and remote.input_file_id == batch.input_file_id:
+                    return remote
+        except Exception as e:
+            logger.warning(f"[Batch] Could not list remote batches: {e}")
+        return None
+
+    def refresh(self, batch):
+        """Fetch remote status and counts; marks the batch completed/failed when it finishes."""
+        remote = self.client.batches.retrieve(batch.batch_id)
+        counts = remote.request_counts
+        batch.remote_status = remote.status
+        batch.completed_count = counts.completed if counts else 0
+        batch.failed_count = counts.failed if counts else 0
+        batch.output_file_id = remote.output_file_id or ''
+        batch.error_file_id = remote.error_file_id or ''
+
+        if remote.status in REMOTE_FINAL_STATUSES:
+            batch.finished_at = timezone.now()
+            # Expired and cancelled batches still return the requests that finished
+            if batch.output_file_id or batch.error_file_id:
+                batch.status = 'completed'
+            else:
+                batch.status = 'failed'
+                errors = getattr(remote, 'errors', None)
+                batch.error_message = str(errors.data if errors and errors.data else remote.status)
+
+        batch.save(update_fields=[
+            'remote_status', 'completed_count', 'failed_count', 'output_file_id',
+            'error_file_id', 'status', 'finished_at', 'error_message', 'updated_at',
+        ])
+        return batch
+
+    # ------------------------------------------------------------
+    # Apply
+    # ------------------------------------------------------------
+
+    def apply(self, batch):
+        """
+        Stream the batch output into CrawledPage rows.
+
+        Applying is idempotent, so an interrupted apply is simply repeated.
+        Returns (applied, failed) counts.
+        """
+        applied = 0
+        failed = 0
+        client_ids = set()
+        chunk = []
+        self._unresolved = []
+
+        def flush():
+            nonlocal applied, failed
+            ok, bad, clients = self._apply_chunk(batch, chunk)
+            applied += ok
+            failed += bad
+            client_ids.update(clients)
+            chunk.clear()
+
+        if batch.output_file_id:
+            for record in self._iter_file(batch.output_file_id):
+                chunk.append(record)
+                if len(chunk) >= APPLY_CHUNK_SIZE:
+                    flush()
+            if chunk:
+                flush()
+
+        if batch.error_file_id:
+            for record in self._iter_file(batch.error_file_id):
+                failed += 1
+                logger.warning(f"[Batch] #{batch.id} {record.get('custom_id')}: {_record_error(record)}")
+
+        if self.kind == 'embeddings':
+            ok, bad, clients = self._apply_unresolved_embeddings(batch)
+            applied += ok
+            failed += bad
+            client_ids.update(clients)
+
+        for client_id in client_ids:
+            bump_data_version(client_id)
+        self.cache.prune()
+
+        batch.applied_count = applied
+        batch.failed_count = max(batch.failed_count, failed)
+        batch.status = 'applied'
+        batch.applied_at = timezone.now()
+        batch.save(update_fields=['applied_count', 'failed_count', 'status', 'applied_at', 'updated_at'])
+        self.log(f"Batch #{batch.id}: applied {applied} results, {failed} failed")
+        return applied, failed
+
+    def _iter_file(self, file_id):
+        with self.client.files.with_streaming_response.content(file_id) as response:
+            for line in response.iter_lines():
+                if line.strip():
+                    yield json.loads(line)
+
+    def _apply_chunk(self, batch, records):
+        by_page = {}
+        failed = 0
+        for record in records:
+            response = record.get('response') or {}
+            if record.get('error') or response.get('status_code') != 200:
+                failed += 1
+                logger.warning(f"[Batch] #{batch.id} {record.get('custom_id')}: {_record_error(record)}")
+                continue
+            by_page[page_id_from(record['custom_id'])] = (record['custom_id'], response['body'])
+
+        if self.kind == 'embeddings':
+            ok, bad, clients = self._apply_embedding_chunk(batch, by_page)
+            return ok, failed + bad, clients
+
+        duplicates = {
+            custom_id: batch.request_metadata.get(custom_id, {}).get('duplicate_page_ids', [])
+            for custom_id, _ in by_page.values()
+        }
+        pages = CrawledPage.objects.in_bulk(
+            list(by_page) + [page_id for page_ids in duplicates.values() for page_id in page_ids]
+        )
+        updated = []
+        cache_entries = {}
+        for page_id, (custom_id, body) in by_page.items():
+            page = pages.get(page_id)
+            if page is None:
+                continue
+            metadata = batch.request_metadata.get(custom_id, {})
+            try:
+                llm_result = json.loads(body['choices'][0]['message']['content'])
+            except (KeyError, IndexError, ValueError) as e:
+                failed += 1
+                logger.warning(f"[Batch] #{batch.id} {custom_id}: could not apply result: {e}")
+                continue
+
+            stats = metadata.get('stats', {})
+            if metadata.get('cache_key'):
+                cache_entries[metadata['cache_key']] = {'llm_result': llm_result, 'stats': stats}
+            for target in [page] + [pages[pid] for pid in duplicates[custom_id] if pid in pages]:
+                result = self.analyzer.build_result(
+                    llm_result, target.doc_type, stats, 0,
+                    extra_metadata={'batch_id': batch.batch_id},
+                )
+                # Learning-objective embeddings come from a later embeddings run
+                apply_analysis_result(target, result, self.analyzer)
+                updated.append(target)
+
+        CrawledPage.objects.bulk_update(updated, ANALYSIS_UPDATE_FIELDS, batch_size=APPLY_CHUNK_SIZE)
+        index_pages(updated)
+        self.cache.set_many(cache_entries)
+        return len(updated), failed, {page.client_id for page in updated}
+
+    def _apply_embedding_chunk(self, batch, by_page):
+        pages = CrawledPage.objects.in_bulk(list(by_page))
+        updated = []
+        failed = 0
+        new_vectors = {}
+        waiting = {}
+        for page_id, (custom_id, body) in by_page.items():
+            page = pages.get(page_id)
+            if page is None:
+                continue
+            metadata = batch.request_metadata.get(custom_id, {})
+            try:
+                vectors = [item['embedding'] for item in sorted(body['data'], key=lambda d: d['index'])]
+                if 'cache_keys' not in metadata:
+                    # Prepared before the embedding cache: the request carried every input
+                    assign_page_embeddings(page, metadata['index_map'], vectors)
+                    updated.append(page)
+                    continue
+                keys = metadata['cache_keys']
+                new_vectors.update((keys[i], vector) for i, vector in zip(metadata['sent'], vectors, strict=True))
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                failed += 1
+                logger.warning(f"[Batch] #{batch.id} {custom_id}: could not apply result: {e}")
+                continue
+            waiting[custom_id] = (page, metadata)
+
+        self.cache.set_many(new_vectors)
+        resolved, unresolved = self._resolve_embeddings(waiting, new_vectors)
+        self._unresolved.extend(unresolved)
+        updated.extend(resolved)
+        CrawledPage.objects.bulk_update(updated, EMBEDDING_UPDATE_FIELDS, batch_size=APPLY_CHUNK_SIZE)
+        return len(updated), failed, {page.client_id for page in updated}
+
+    def _apply_unresolved_embeddings(self, batch):
+        """
+        Apply pages whose texts were requested by other pages of the batch:
+        those without a request of their own, and those whose texts came in a
+        later output chunk. Their vectors are in the cache by now.
+        """
+        custom_ids = self._unresolved + [
+            custom_id for custom_id, metadata in batch.request_metadata.items()
+            if 'sent' in metadata and not metadata['sent']
+        ]
+        applied = 0
+        failed = 0
+        client_ids = set()
+        for start in range(0, len(custom_ids), APPLY_CHUNK_SIZE):
+            chunk = custom_ids[start:start + APPLY_CHUNK_SIZE]
+            pages = CrawledPage.objects.in_bulk([page_id_from(custom_id) for custom_id in chunk])
+            waiting = {
+                custom_id: (pages[page_id_from(custom_id)], batch.request_metadata[custom_id])
+                for custom_id in chunk if page_id_from(custom_id) in pages
+            }
+            resolved, unresolved = self._resolve_embeddings(waiting, {})
+            for custom_id in unresolved:
+                logger.warning(f"[Batch] #{batch.id} {custom_id}: texts shared with a failed request; re-run to embed")
+            CrawledPage.objects.bulk_update(resolved, EMBEDDING_UPDATE_FIELDS, batch_size=APPLY_CHUNK_SIZE)
+            applied += len(resolved)
+            failed += len(unresolved)
+            client_ids.update(page.client_id for page in resolved)
+        return applied, failed, client_ids
+
+    def _resolve_embeddings(self, waiting, known):
+        """
+        Assign vectors to {custom_id: (page, metadata)} from ``known`` and the cache.
+
+        Returns (pages assigned, custom_ids still missing a vector).
+        """
+        needed = {key for _, metadata in waiting.values() for key in metadata['cache_keys']} - set(known)
+        found = {**self.cache.get_many(needed), **known}
+        resolved = []
+        unresolved = []
+        for custom_id, (page, metadata) in waiting.items():
+            vectors = [found.get(key) for key in metadata['cache_keys']]
+            if any(vector is None for vector in vectors):
+                unresolved.append(custom_id)
+                continue
+            assign_page_embeddings(page, metadata['index_map'], vectors)
+            resolved.append(page)
+        return resolved, unresolved
+
+    # ------------------------------------------------------------
+    # Driver
+    # ------------------------------------------------------------
+
+    def run(self, batches, wait=True, poll_interval=60):
+        """
+        Advance batches as far as possible: submit, poll and apply.
+
+        With wait=False, returns after one pass (batches still in flight can
+        be picked up later with resume). Returns the batches still running.
+        """
+        pending = list(batches)
+        while pending:
+            still_running = []
+            for batch in pending:
+                if batch.status == 'prepared':
+                    self.submit(batch)
+                if batch.status == 'submitted':
+                    self.refresh(batch)
+                    if batch.status == 'submitted':
+                        self.log(
+                            f"Batch #{batch.id} ({batch.batch_id}): {batch.remote_status}, "
+                            f"{batch.completed_count}/{batch.request_count} done, {batch.failed_count} failed"
+                        )
+                        still_running.append(batch)
+                        continue
+                if batch.status == 'completed':
+                    self.apply(batch)
+                elif batch.status == 'failed':
+                    self.log(f"Batch #{batch.id} failed: {batch.error_message}")
+
+            pending = still_running
+            if pending and wait:
+                time.sleep(poll_interval)
+            elif pending:
+                self.log(f"{len(pending)} batch(es) still running; resume later with --batch-resume")
+                break
+        return pending
+
+
+def resumable_batches(kind, job_id=None, client_id=None):
+    """Unfinished batches of a kind, oldest first."""
+    batches = OpenAIBatch.objects.filter(kind=kind, status__in=ACTIVE_STATUSES)
+    if job_id:
+        batches = batches.filter(job_id=job_id)
+    if client_id:
+        batches = batches.filter(client_id=client_id)
+    return list(batches.order_by('created_at'))
+
+
+def _record_error(record):
+    """Human-readable error for a failed batch output/error line."""
+    if record.get('error'):
+        error = record['error']
+        return error.get('message', error) if isinstance(error, dict) else error
+    response = record.get('response') or {}
+    message = ((response.get('body') or {}).get('error') or {}).get('message', '')
+    return f"HTTP {response.get('status_code')} {message}".strip()
@@ -0,0 +1,144 @@
+"""
+Inverted index of the key concepts pages introduce or assume.
+
+``ai_key_concepts`` is a JSON list per page, so "which pages use concept X"
+used to mean reading every page's analysis. ``PageConcept`` keeps one row
+per (page, normalised term) with the page's client, the ``is_new`` flag
+and the importance, indexed on (client, term) and (client, is_new):
+
+* every writer of analysis results (``AsyncAnalysisEngine`` and the Batch
+  API) calls ``index_pages`` after saving, which replaces those pages' rows
+* ``rebuild_concept_index`` backfills pages analyzed before the index
+  existed (``analyze_content --rebuild-concept-index``)
+* ``lookup_concept`` serves the dashboard concept API, and TaxonomyBuilder
+  joins introducing and using pages on ``term``
+"""
+
+import logging
+from typing import Dict, Iterable, List
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from crawler.models import CrawledPage, PageConcept
+
+logger = logging.getLogger('crawler')
+
+# Pages re-indexed per transaction by rebuild_concept_index
+REBUILD_CHUNK_SIZE = 1000
+TERM_MAX_LENGTH = PageConcept._meta.get_field('term').max_length
+
+
+def normalize_term(term) -> str:
+    """Index key for a concept term: lowercased, whitespace collapsed."""
+    return ' '.join(str(term or '').lower().split())[:TERM_MAX_LENGTH]
+
+
+def concept_rows(page) -> List[PageConcept]:
+    """
+    Unsaved index rows for a page's ai_key_concepts, one per distinct term.
+
+    A term listed more than once keeps its first entry, but is marked new if
+    any entry says so.
+    """
+    rows: Dict[str, PageConcept] = {}
+    for concept in page.ai_key_concepts or []:
+        if not isinstance(concept, dict):
+            continue
+        term = normalize_term(concept.get('term'))
+        if not term:
+            continue
+        is_new = concept.get('is_new')
+        is_new = None if is_new is None else bool(is_new)
+        if term in rows:
+            if is_new:
+                rows[term].is_new = True
+            continue
+        rows[term] = PageConcept(
+            page_id=page.id,
+            client_id=page.client_id,
+            term=term,
+            display_term=str(concept.get('term')).strip()[:TERM_MAX_LENGTH],
+            is_new=is_new,
+            importance=str(concept.get('importance') or '')[:20],
+        )
+    return list(rows.values())
+
+
+def index_pages(pages: Iterable) -> int:
+    """
+    Replace the index rows of saved pages from their ai_key_concepts.
+
+    Args:
+        pages: CrawledPage instances (id, client_id and ai_key_concepts loaded)
+
+    Returns:
+        Rows written
+    """
+    pages = list(pages)
+    if not pages:
+        return 0
+    rows = [row for page in pages for row in concept_rows(page)]
+    with transaction.atomic():
+        PageConcept.objects.filter(page_id__in=[page.id for page in pages]).delete()
+        PageConcept.objects.bulk_create(rows, batch_size=REBUILD_CHUNK_SIZE)
+    return len(rows)
+
+
+def rebuild_concept_index(queryset=None, chunk_size: int = REBUILD_CHUNK_SIZE) -> Dict[str, int]:
+    """
+    Re-index every page in a queryset (default: all pages), in id order and chunks.
+
+    Returns:
+        {'pages': pages indexed, 'concepts': rows written}
+    """
+    if queryset is None:
+        queryset = CrawledPage.objects.all()
+    queryset = queryset.only('id', 'client_id', 'ai_key_concepts').order_by('id')
+    pages = concepts = 0
+    last_id = 0
+    while chunk := list(queryset.filter(id__gt=last_id)[:chunk_size]):
+        concepts += index_pages(chunk)
+        pages += len(chunk)
+        last_id = chunk[-1].id
+    logger.info(f"[ConceptIndex] Indexed {concepts} concepts from {pages} pages")
+    return {'pages': pages, 'concepts': concepts}
+
+
+def lookup_concept(client_id: int, term: str, limit: int = 50) -> Dict:
+    """
+    Pages of a client that introduce, assume or mention a concept.
+
+    Args:
+        client_id: Client to search
+        term: Concept term (normalised here)
+        limit: Maximum pages listed per group
+
+    Returns:
+        Dict with the normalised term, per-group page lists and counts
+    """
+    term = normalize_term(term)
+    rows = PageConcept.objects.filter(client_id=client_id, term=term)
+    groups = {'introduced_by': Q(is_new=True), 'used_by': Q(is_new=False), 'mentioned_by': Q(is_new__isnull=True)}
+    result = {'term': term}
+    result.update(rows.aggregate(**{f'{name}_count': Count('id', filter=condition) for name, condition in groups.items()}))
+    for name, condition in groups.items():
+        result[name] = list(
+            rows.filter(condition).order_by('page_id').values(
+                'page_id', 'display_term', 'importance', title=F('page__title'), url=F('page__url'),
+            )[:limit]
+        ) if result[f'{name}_count'] else []
+    return result
+
+
+def suggest_concepts(client_id: int, prefix: str, limit: int = 20) -> List[Dict]:
+    """Indexed terms of a client starting with prefix, most widely used first."""
+    prefix = normalize_term(prefix)
+    if not prefix:
+        return []
+    return list(
+        PageConcept.objects.filter(client_id=client_id, term__startswith=prefix)
+        .values('term')
+        .annotate(pages=Count('page_id'), introduced=Count('page_id', filter=Q(is_new=True)))
+        .order_by('-pages', 'term')[:limit]
+    )
@@ -20,8 +20,79 @@ from datetime import datetime
 import json
 import re
 
+from crawler.embeddings import EMBEDDING_MODEL, learning_objective_inputs, learning_objective_records
+
 logger = logging.getLogger('crawler')
 
+LLM_MODEL = "gpt-4o-mini"
+
+# Bump whenever SYSTEM_PROMPT, _build_prompt, the request parameters or the
+# analysis cache key change, so cached results produced by the old prompt are
+# no longer reused
+PROMPT_VERSION = "3"
+
+# spaCy components the extraction uses: entities (ner), noun chunks, sentences and
+# dependencies (parser), lemmas (tagger + attribute_ruler + lemmatizer) and the
+# embedding layers they listen to. Any other pipeline component is disabled.
+SPACY_REQUIRED_PIPES = {'tok2vec', 'transformer', 'tagger', 'attribute_ruler', 'lemmatizer', 'parser', 'ner'}
+
+# Texts per nlp.pipe batch
+SPACY_BATCH_SIZE = 32
+
+# Doc types not worth analyzing (but NOT 'unknown' - we want to reclassify those!)
+SKIP_DOC_TYPES = ['navigation', 'landing', 'changelog']
+
+# Map AI doc types to CrawledPage.doc_type choices (handle both formats)
+AI_DOC_TYPE_MAPPING = {
+    'api-reference': 'api_reference',
+    'how-to': 'guide',  # Map how-to to guide
+    'tutorial': 'tutorial',
+    'reference': 'api_reference',
+    'guide': 'guide',
+    'concept': 'concept',
+    'troubleshooting': 'troubleshooting',
+    'quickstart': 'quickstart',
+    'example': 'example',
+    'faq': 'faq',
+    'changelog': 'changelog',
+}
+
+# CrawledPage fields written by apply_analysis_result
+ANALYSIS_UPDATE_FIELDS = [
+    # Core AI fields
+    'ai_topics',
+    'ai_learning_objectives',
+    'ai_prerequisite_chain',
+    'ai_analysis_metadata',
+    # Enhanced AI fields
+    'ai_summary',
+    'ai_audience_level',
+    'ai_key_concepts',
+    'ai_doc_type',
+    'ai_quality_indicators',
+    'ai_related_topics',
+    # Merged fields
+    'prerequisites',
+    'learning_objectives',
+    'has_prerequisites',
+    'has_learning_objectives',
+    # Learning objective embeddings
+    'learning_objective_embeddings',
+    # Update original doc_type with AI classification
+    'doc_type',
+    # auto_now only applies when listed in update_fields (and never in bulk_update)
+    'updated_at',
+]
+
+SYSTEM_PROMPT = """You are an expert technical documentation analyst and instructional designer. 
+Your task is to extract structured metadata optimized for:
+1. Grouping pages into coherent lessons and learning paths
+2. Building documentation taxonomies
+3. Creating dependency graphs for learning journeys
+4. Identifying content gaps and quality issues
+
+Apply educational frameworks like Bloom's Taxonomy rigorously. Be specific and actionable."""
+
 
 class ContentAnalyzer:
     """
@@ -30,16 +101,19 @@ class ContentAnalyzer:
     Cost: ~$0.0001-0.0002 per page with GPT-4o-mini
     """
     
-    def __init__(self, openai_api_key: str):
+    def __init__(self, openai_api_key: str, base_url: Optional[str] = None):
         """
         Initialize the content analyzer.
         
         Args:
             openai_api_key: OpenAI API key for GPT-4o-mini
+            base_url: Optional OpenAI-compatible API base URL (e.g. a local mock server)
         """
         self.openai_api_key = openai_api_key
+        self.base_url = base_url or None
         self._spacy_nlp = None
         self._openai_client = None
+        self._embedding_provider = None
         
     @property
     def spacy_nlp(self):
@@ -63,8 +137,16 @@ class ContentAnalyzer:
         """Lazy-load OpenAI client."""
         if self._openai_client is None:
             from openai import OpenAI
-            self._openai_client = OpenAI(api_key=self.openai_api_key)
+            self._openai_client = OpenAI(api_key=self.openai_api_key, base_url=self.base_url)
         return self._openai_client
+
+    @property
+    def embedding_provider(self):
+        """Lazy-load the embedding provider (EMBEDDING_PROVIDER); OpenAI uses this analyzer's key and URL."""
+        if self._embedding_provider is None:
+            from crawler.embedding_providers import get_embedding_provider
+            self._embedding_provider = get_embedding_provider(api_key=self.openai_api_key, base_url=self.base_url)
+        return self._embedding_provider
     
     def analyze_page(
         self,
@@ -74,8 +156,6 @@ class ContentAnalyzer:
         main_content: str,
         sections: List[Dict],
         doc_type: str,
-        existing_prerequisites: List = None,
-        existing_learning_objectives: List = None,
         has_code_examples: bool = False,
         has_images: bool = False,
         has_videos: bool = False,
@@ -91,8 +171,6 @@ class ContentAnalyzer:
             main_content: Main text content
             sections: Page sections with headings
             doc_type: Document type (tutorial, guide, etc.)
-            existing_prerequisites: Existing regex-detected prerequisites
-            existing_learning_objectives: Existing regex-detected learning objectives
             has_code_examples: Whether page has code examples
             has_images: Whether page has images
             has_videos: Whether page has videos
@@ -107,35 +185,26 @@ class ContentAnalyzer:
         
         logger.info(f"[ContentAnalyzer] Page {page_id} ({url}): Starting analysis")
         
-        # Skip certain doc types to save costs (but NOT 'unknown' - we want to reclassify those!)
-        skip_types = ['navigation', 'landing', 'changelog']
-        if doc_type in skip_types:
+        # Skip certain doc types to save costs
+        if doc_type in SKIP_DOC_TYPES:
             logger.info(f"[ContentAnalyzer] Page {page_id}: Skipping doc_type='{doc_type}'")
             return self._empty_result(f"Skipped doc_type: {doc_type}")
         
-        # Truncate content if too long (cost optimization)
-        content_for_analysis = self._prepare_content(title, main_content, sections, max_chars=4000)
-        
         # Step 1: spaCy preprocessing (fast, local)
-        topic_candidates = self._extract_topic_candidates(content_for_analysis)
-        prerequisite_mentions = self._extract_prerequisite_mentions(content_for_analysis)
+        prepared = self.preprocess(title, main_content, sections)
         
         logger.info(
-            f"[ContentAnalyzer] Page {page_id}: spaCy found {len(topic_candidates)} topic candidates, "
-            f"{len(prerequisite_mentions)} prerequisite mentions"
+            f"[ContentAnalyzer] Page {page_id}: spaCy found {len(prepared['topic_candidates'])} topic candidates, "
+            f"{len(prepared['prerequisite_mentions'])} prerequisite mentions"
         )
         
         # Step 2: GPT-4o-mini enrichment (single API call)
         try:
             llm_result = self._enrich_with_llm(
-                url=url,
                 title=title,
-                content=content_for_analysis,
-                doc_type=doc_type,
-                topic_candidates=topic_candidates,
-                prerequisite_mentions=prerequisite_mentions,
-                existing_prerequisites=existing_prerequisites or [],
-                existing_learning_objectives=existing_learning_objectives or [],
+                content=prepared['content'],
+                topic_candidates=prepared['topic_candidates'],
+                prerequisite_mentions=prepared['prerequisite_mentions'],
                 has_code_examples=has_code_examples,
                 has_images=has_images,
                 has_videos=has_videos,
@@ -146,18 +215,103 @@ class ContentAnalyzer:
             return self._empty_result(f"LLM error: {str(e)}")
         
         processing_time = time.time() - start_time
+        result = self.build_result(llm_result, doc_type, self.preprocess_stats(prepared), processing_time)
+        
+        logger.info(
+            f"[ContentAnalyzer] Page {page_id}: ✓ Extracted {len(result['ai_topics'])} topics, "
+            f"{len(result['ai_learning_objectives'])} LOs, "
+            f"{len(result['ai_prerequisite_chain'])} prerequisites, "
+            f"{len(result['ai_key_concepts'])} key concepts in {processing_time:.2f}s"
+        )
+        
+        return result
+    
+    def preprocess(self, title: str, main_content: str, sections: List[Dict]) -> Dict:
+        """
+        Local preprocessing step: truncate content and run spaCy extraction.
         
-        # Build metadata
+        Returns:
+            Dict with content (the truncated text sent to the LLM),
+            topic_candidates and prerequisite_mentions.
+        """
+        return self.preprocess_many([(title, main_content, sections)])[0]
+    
+    def preprocess_many(
+        self,
+        pages: List[Tuple[str, str, List[Dict]]],
+        batch_size: int = SPACY_BATCH_SIZE,
+        n_process: int = 1,
+    ) -> List[Dict]:
+        """
+        Preprocess many pages with a single spaCy pass per text.
+        
+        Texts are streamed through nlp.pipe in batches with unused pipeline
+        components disabled, and each parsed doc feeds both extractors.
+        
+        Args:
+            pages: (title, main_content, sections) tuples
+            batch_size: Texts per nlp.pipe batch
+            n_process: Processes for nlp.pipe (spaCy starts its own workers)
+            
+        Returns:
+            One preprocess() dict per page, in order
+        """
+        if not pages:
+            return []  # e.g. every page was a cache hit; don't load spaCy for nothing
+        contents = [self.prepare_content(title, main_content, sections) for title, main_content, sections in pages]
+        nlp = self.spacy_nlp
+        disable = [name for name in nlp.pipe_names if name not in SPACY_REQUIRED_PIPES]
+        docs = nlp.pipe(contents, batch_size=batch_size, n_process=n_process, disable=disable)
+        return [
+            {
+                "content": content,
+                "topic_candidates": self._extract_topic_candidates(content, doc),
+                "prerequisite_mentions": self._extract_prerequisite_mentions(content, doc),
+            }
+            for content, doc in zip(contents, docs)
+        ]
+    
+    def prepare_content(self, title: str, main_content: str, sections: List[Dict]) -> str:
+        """The (truncated) page text sent to the LLM."""
+        # Truncate content if too long (cost optimization)
+        return self._prepare_content(title, main_content, sections, max_chars=4000)
+    
+    @staticmethod
+    def preprocess_stats(prepared: Dict) -> Dict:
+        """Preprocessing figures recorded in ai_analysis_metadata."""
+        return {
+            "content_length": len(prepared["content"]),
+            "spacy_candidates": len(prepared["topic_candidates"]),
+            "prerequisite_mentions": len(prepared["prerequisite_mentions"]),
+        }
+    
+    def build_result(
+        self,
+        llm_result: Dict,
+        doc_type: str,
+        stats: Dict,
+        processing_time: float,
+        extra_metadata: Optional[Dict] = None,
+    ) -> Dict:
+        """
+        Turn the parsed LLM response into the analysis result stored on a page.
+        
+        Args:
+            llm_result: Parsed JSON returned by the model
+            doc_type: Current doc type of the page (fallback classification)
+            stats: preprocess_stats() of the preprocessed content
+            processing_time: Seconds spent on the page
+            extra_metadata: Additional ai_analysis_metadata entries
+        """
         metadata = {
-            "model": "gpt-4o-mini",
+            "model": LLM_MODEL,
             "timestamp": datetime.utcnow().isoformat(),
             "processing_time_seconds": round(processing_time, 2),
-            "content_length": len(content_for_analysis),
-            "spacy_candidates": len(topic_candidates),
-            "prerequisite_mentions": len(prerequisite_mentions),
+            **stats,
+            **(extra_metadata or {}),
         }
         
-        result = {
+        return {
             # Core analysis fields
             "ai_topics": llm_result.get("topics", []),
             "ai_learning_objectives": llm_result.get("learning_objectives", []),
@@ -174,15 +328,6 @@ class ContentAnalyzer:
             # Metadata
             "ai_analysis_metadata": metadata,
         }
-        
-        logger.info(
-            f"[ContentAnalyzer] Page {page_id}: ✓ Extracted {len(result['ai_topics'])} topics, "
-            f"{len(result['ai_learning_objectives'])} LOs, "
-            f"{len(result['ai_prerequisite_chain'])} prerequisites, "
-            f"{len(result['ai_key_concepts'])} key concepts in {processing_time:.2f}s"
-        )
-        
-        return result
     
     def _prepare_content(
         self, 
@@ -219,13 +364,16 @@ class ContentAnalyzer:
         
         return full_text
     
-    def _extract_topic_candidates(self, text: str) -> List[str]:
+    def _extract_topic_candidates(self, text: str, doc=None) -> List[str]:
         """
         Extract topic candidates using spaCy NER and noun chunks.
         
+        Pass the parsed ``doc`` of ``text`` to avoid parsing it again.
+        
         Returns list of candidate topic strings.
         """
-        doc = self.spacy_nlp(text)
+        if doc is None:
+            doc = self.spacy_nlp(text)
         candidates = set()
         
         # Named entities (ORG, PRODUCT, GPE, etc.)
@@ -254,13 +402,16 @@ class ContentAnalyzer:
         
         return list(candidates)[:50]  # Limit to top 50
     
-    def _extract_prerequisite_mentions(self, text: str) -> List[str]:
+    def _extract_prerequisite_mentions(self, text: str, doc=None) -> List[str]:
         """
         Extract prerequisite mentions using spaCy dependency parsing.
         
+        Pass the parsed ``doc`` of ``text`` to avoid parsing it again.
+        
         Returns list of prerequisite strings.
         """
-        doc = self.spacy_nlp(text)
+        if doc is None:
+            doc = self.spacy_nlp(text)
         mentions = set()
         
         # Pattern 1: "requires X", "needs X", "must have X"
@@ -287,14 +438,10 @@ class ContentAnalyzer:
     
     def _enrich_with_llm(
         self,
-        url: str,
         title: str,
         content: str,
-        doc_type: str,
         topic_candidates: List[str],
         prerequisite_mentions: List[str],
-        existing_prerequisites: List,
-        existing_learning_objectives: List,
         has_code_examples: bool = False,
         has_images: bool = False,
         has_videos: bool = False,
@@ -305,57 +452,63 @@ class ContentAnalyzer:
         
         Single API call optimized for cost and lesson grouping use case.
         """
-        prompt = self._build_prompt(
-            url=url,
+        request = self.build_chat_request(
             title=title,
             content=content,
-            doc_type=doc_type,
             topic_candidates=topic_candidates,
             prerequisite_mentions=prerequisite_mentions,
-            existing_prerequisites=existing_prerequisites,
-            existing_learning_objectives=existing_learning_objectives,
             has_code_examples=has_code_examples,
             has_images=has_images,
             has_videos=has_videos,
             word_count=word_count,
         )
-        
-        response = self.openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": """You are an expert technical documentation analyst and instructional designer. 
-Your task is to extract structured metadata optimized for:
-1. Grouping pages into coherent lessons and learning paths
-2. Building documentation taxonomies
-3. Creating dependency graphs for learning journeys
-4. Identifying content gaps and quality issues
-
-Apply educational frameworks like Bloom's Taxonomy rigorously. Be specific and actionable."""
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.3,  # Lower temperature for more consistent output
-            response_format={"type": "json_object"},
-        )
+        response = self.openai_client.chat.completions.create(**request)
         
         result_text = response.choices[0].message.content
         return json.loads(result_text)
     
+    @staticmethod
+    def page_prompt_inputs(page) -> Dict:
+        """
+        The _build_prompt arguments read straight from a CrawledPage.
+        
+        Everything else in the prompt (content, topic candidates, prerequisite
+        mentions) comes from prepare_content/preprocess. Only fields the
+        analysis never rewrites belong here: they also key the analysis cache,
+        so anything apply_analysis_result changes (doc_type, prerequisites,
+        learning_objectives) would make a re-run miss on unchanged content.
+        """
+        return {
+            "title": page.title,
+            "has_code_examples": page.has_examples,
+            "has_images": bool(page.images),
+            "has_videos": page.has_videos,
+            "word_count": page.word_count or 0,
+        }
+    
+    def build_chat_request(self, **prompt_kwargs) -> Dict:
+        """
+        Build the chat completion request for a page.
+        
+        Takes the same keyword arguments as _build_prompt; shared by the
+        synchronous path and the async engine so both send identical requests.
+        """
+        return {
+            "model": LLM_MODEL,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": self._build_prompt(**prompt_kwargs)},
+            ],
+            "temperature": 0.3,  # Lower temperature for more consistent output
+            "response_format": {"type": "json_object"},
+        }
+    
     def _build_prompt(
         self,
-        url: str,
         title: str,
         content: str,
-        doc_type: str,
         topic_candidates: List[str],
         prerequisite_mentions: List[str],
-        existing_prerequisites: List,
-        existing_learning_objectives: List,
         has_code_examples: bool = False,
         has_images: bool = False,
         has_videos: bool = False,
@@ -366,9 +519,7 @@ Apply educational frameworks like Bloom's Taxonomy rigorously. Be specific and a
         return f"""Analyze this technical documentation page and extract structured metadata for learning path construction and taxonomy building.
 
 **Page Information:**
-- URL: {url}
 - Title: {title}
-- Current Doc Type: {doc_type}
 - Word Count: {word_count}
 - Has Code Examples: {has_code_examples}
 - Has Images: {has_images}
@@ -381,10 +532,6 @@ Apply educational frameworks like Bloom's Taxonomy rigorously. Be specific and a
 - Topic candidates: {', '.join(topic_candidates[:20]) if topic_candidates else 'none'}
 - Prerequisite mentions: {', '.join(prerequisite_mentions[:10]) if prerequisite_mentions else 'none'}
 
-**Existing Data (from regex):**
-- Prerequisites: {existing_prerequisites[:5] if existing_prerequisites else 'none'}
-- Learning objectives: {existing_learning_objectives[:3] if existing_learning_objectives else 'none'}
-
 **Task:**
 Extract and structure the following in JSON format. This data will be used to:
 1. Group related pages into lessons
@@ -493,7 +640,7 @@ Return JSON with this exact structure:
    - This helps build a concept dependency graph
 
 7. **Quality Indicators**: Be constructively critical:
-   - Consider if a {doc_type} page SHOULD have certain elements
+   - Consider which elements a page of its doc type SHOULD have
    - Tutorials should have code examples and step-by-step instructions
    - Reference docs should be comprehensive
    - How-to guides should be task-focused with clear outcomes
@@ -633,55 +780,15 @@ Return valid JSON only, no markdown code blocks or explanation."""
         if not learning_objectives:
             return []
         
-        from openai import OpenAI
-        client = OpenAI(api_key=self.openai_api_key)
-        EMBEDDING_MODEL = "text-embedding-3-small"
-        
-        # Prepare texts for embedding
-        # Format: "Context: {page_context} | Objective: {objective} | Level: {bloom_level}"
-        # This format helps the embedding capture both the what and the how
-        inputs = []
-        for lo in learning_objectives:
-            objective = lo.get("objective", "")
-            bloom_level = lo.get("bloom_level", "")
-            bloom_verb = lo.get("bloom_verb", "")
-            difficulty = lo.get("difficulty", "")
-            
-            # Create rich text for embedding that captures the full learning context
-            parts = []
-            if page_context:
-                parts.append(f"Context: {page_context}")
-            parts.append(f"Objective: {objective}")
-            if bloom_verb:
-                parts.append(f"Action: {bloom_verb}")
-            if bloom_level:
-                parts.append(f"Level: {bloom_level}")
-            if difficulty:
-                parts.append(f"Difficulty: {difficulty}")
-            
-            text = " | ".join(parts)
-            inputs.append(text)
+        inputs = self.learning_objective_inputs(learning_objectives, page_context)
         
         logger.info(f"[ContentAnalyzer] Generating {len(inputs)} learning objective embeddings")
         
         try:
             # Generate embeddings
-            response = client.embeddings.create(model=EMBEDDING_MODEL, input=inputs)
-            vectors = [d.embedding for d in response.data]
-            
-            # Build result with metadata
-            result = []
-            for lo, vec in zip(learning_objectives, vectors):
-                result.append({
-                    "objective": lo.get("objective", ""),
-                    "bloom_level": lo.get("bloom_level", ""),
-                    "bloom_verb": lo.get("bloom_verb", ""),
-                    "difficulty": lo.get("difficulty", ""),
-                    "estimated_time_minutes": lo.get("estimated_time_minutes"),
-                    "measurable": lo.get("measurable"),
-                    "embedding_model": EMBEDDING_MODEL,
-                    "embedding": vec,
-                })
+            provider = self.embedding_provider
+            vectors = provider.embed(inputs)
+            result = self.learning_objective_records(learning_objectives, vectors, provider.model)
             
             logger.info(f"[ContentAnalyzer] ✓ Generated {len(result)} LO embeddings")
             return result
@@ -689,3 +796,74 @@ Return valid JSON only, no markdown code blocks or explanation."""
         except Exception as e:
             logger.error(f"[ContentAnalyzer] Error generating LO embeddings: {e}")
             return []
+    
+    def learning_objective_inputs(self, learning_objectives: List[Dict], page_context: str = "") -> List[str]:
+        """Build the embedding input text for each learning objective."""
+        return learning_objective_inputs(learning_objectives, page_context)
+    
+    def learning_objective_records(self, learning_objectives: List[Dict], vectors: List[List[float]],
+                                   model: str = EMBEDDING_MODEL) -> List[Dict]:
+        """Pair learning objectives with their embedding vectors."""
+        return learning_objective_records(learning_objectives, vectors, model)
+
+def apply_analysis_result(page, result: Dict, analyzer: ContentAnalyzer, lo_embeddings: Optional[List[Dict]] = None):
+    """
+    Copy an analysis result onto a CrawledPage instance (without saving).
+    
+    Sets every field in ANALYSIS_UPDATE_FIELDS, so callers can persist with
+    ``page.save(update_fields=ANALYSIS_UPDATE_FIELDS)`` or ``bulk_update``.
+    
+    Args:
+        page: CrawledPage instance
+        result: Result dict from ContentAnalyzer.analyze_page / build_result
+        analyzer: Analyzer used to merge with existing regex-detected data
+        lo_embeddings: Learning objective embeddings (from
+            generate_learning_objective_embeddings); empty list if None
+    """
+    from django.utils import timezone
+    
+    # Core fields
+    page.ai_topics = result["ai_topics"]
+    page.ai_learning_objectives = result["ai_learning_objectives"]
+    page.ai_prerequisite_chain = result["ai_prerequisite_chain"]
+    page.ai_analysis_metadata = result["ai_analysis_metadata"]
+    
+    # Enhanced fields
+    page.ai_summary = result.get("ai_summary", "")
+    page.ai_audience_level = result.get("ai_audience_level", "")
+    page.ai_key_concepts = result.get("ai_key_concepts", [])
+    page.ai_doc_type = result.get("ai_doc_type", "")
+    page.ai_quality_indicators = result.get("ai_quality_indicators", {})
+    page.ai_related_topics = result.get("ai_related_topics", [])
+    
+    # Update original doc_type with AI classification if available
+    # This makes the AI classification visible in the main doc_type field
+    if page.ai_doc_type:
+        page.doc_type = AI_DOC_TYPE_MAPPING.get(page.ai_doc_type.lower(), page.doc_type)
+    
+    # Merge with existing fields
+    enhanced_prereqs, enhanced_los = analyzer.merge_with_existing(
+        ai_result=result,
+        existing_prerequisites=page.prerequisites or [],
+        existing_learning_objectives=page.learning_objectives or [],
+    )
+    page.prerequisites = enhanced_prereqs
+    page.learning_objectives = enhanced_los
+    page.has_prerequisites = len(enhanced_prereqs) > 0
+    page.has_learning_objectives = len(enhanced_los) > 0
+    
+    page.learning_objective_embeddings = lo_embeddings or []
+    page.updated_at = timezone.now()
+
+
+# spaCy preprocessing in worker processes (see crawler.analysis_engine).
+# Each process loads its own model once, on first use.
+_worker_analyzer = None
+
+
+def preprocess_many_in_worker(pages: List[Tuple[str, str, List[Dict]]]) -> List[Dict]:
+    """Picklable entry point for ContentAnalyzer.preprocess_many in a process pool."""
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        _worker_analyzer = ContentAnalyzer(openai_api_key="")
+    return _worker_analyzer.preprocess_many(pages)
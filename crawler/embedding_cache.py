@@ -0,0 +1,133 @@
+"""
+Content-addressed cache of embedding vectors.
+
+Documentation sites repeat identical text across hundreds of pages (install
+snippets, "Next steps" sections, support footers). Embedding inputs are
+normalised (Unicode NFKC, whitespace collapsed) and keyed by the SHA-256 of
+the result plus the model, so each distinct text is embedded once and every
+other copy, in the same run or a later one, reuses the stored vector from
+``EmbeddingCacheEntry``.
+
+The table is bounded by ``EMBEDDING_CACHE_MAX_ENTRIES`` (least recently used
+entries are evicted after each run).
+"""
+
+import hashlib
+import logging
+import re
+import unicodedata
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from crawler.analysis_cache import evict_least_recently_used
+from crawler.embeddings import EMBEDDING_MODEL
+from crawler.models import EmbeddingCacheEntry
+
+logger = logging.getLogger('crawler')
+
+# USD per million input tokens, for reporting what cache hits saved
+EMBEDDING_PRICES = {
+    'text-embedding-3-small': 0.02,
+    'text-embedding-3-large': 0.13,
+    'text-embedding-ada-002': 0.10,
+}
+
+# Keys per lookup query
+LOOKUP_CHUNK_SIZE = 1000
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', text)).strip()
+
+
+def text_key(text: str) -> str:
+    """Cache key for an embedding input."""
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Vector lookups and stores for one embedding run, with hit statistics.
+
+    Callers record hits, misses and the tokens that hits saved; duplicates
+    within a run count as hits. A disabled cache never finds or stores
+    anything.
+    """
+
+    def __init__(self, enabled=None, model=EMBEDDING_MODEL):
+        self.enabled = settings.EMBEDDING_CACHE_ENABLED if enabled is None else enabled
+        self.model = model
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.tokens_saved = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def cost_saved(self) -> float:
+        return self.tokens_saved * EMBEDDING_PRICES.get(self.model, 0) / 1_000_000
+
+    def summary(self) -> Dict:
+        return {
+            'cache_hits': self.hits,
+            'cache_misses': self.misses,
+            'cache_stored': self.stored,
+            'cache_hit_rate': round(self.hit_rate, 3),
+            'tokens_saved': self.tokens_saved,
+            'cost_saved': round(self.cost_saved, 6),
+        }
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        """Look up vectors by key; returns {key: vector} for those found and marks them used."""
+        keys = list(set(keys))
+        if not self.enabled or not keys:
+            return {}
+
+        found = {}
+        for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+            entries = EmbeddingCacheEntry.objects.filter(text_hash__in=chunk, model=self.model)
+            found.update(entries.values_list('text_hash', 'embedding'))
+        if found:
+            hit_keys = list(found)
+            for start in range(0, len(hit_keys), LOOKUP_CHUNK_SIZE):
+                EmbeddingCacheEntry.objects.filter(
+                    text_hash__in=hit_keys[start:start + LOOKUP_CHUNK_SIZE], model=self.model,
+                ).update(hit_count=F('hit_count') + 1, last_used_at=timezone.now())
+        return found
+
+    def set_many(self, vectors: Dict[str, List[float]]):
+        """Store {key: vector}; existing entries are refreshed."""
+        if not self.enabled or not vectors:
+            return
+        now = timezone.now()
+        EmbeddingCacheEntry.objects.bulk_create(
+            [
+                EmbeddingCacheEntry(text_hash=key, model=self.model, embedding=vector, last_used_at=now)
+                for key, vector in vectors.items()
+            ],
+            batch_size=LOOKUP_CHUNK_SIZE,
+            update_conflicts=True,
+            unique_fields=['text_hash', 'model'],
+            update_fields=['embedding', 'last_used_at'],
+        )
+        self.stored += len(vectors)
+
+    def prune(self, max_entries=None) -> int:
+        """Evict least recently used entries beyond the size limit; returns rows deleted."""
+        if not self.enabled:
+            return 0
+        max_entries = settings.EMBEDDING_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        deleted = evict_least_recently_used(EmbeddingCacheEntry.objects.all(), max_entries)
+        if deleted:
+            logger.info(f"[EmbeddingCache] Evicted {deleted} entries (limit {max_entries})")
+        return deleted
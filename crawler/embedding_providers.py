@@ -0,0 +1,191 @@
+"""
+Embedding providers: where vectors come from.
+
+Every embedding path (``BatchEmbedder``, the Celery tasks,
+``ContentAnalyzer.generate_learning_objective_embeddings`` and the analysis
+engine) asks a provider for vectors instead of calling OpenAI directly:
+
+* ``openai`` - the embeddings API (``text-embedding-3-small``), the default
+* ``hashing`` - scikit-learn ``HashingVectorizer`` over word unigrams and
+  bigrams, L2-normalised; no model, no network, deterministic. Good enough
+  for clustering near-duplicate docs and for offline/air-gapped runs
+* ``sentence-transformers`` - a local model such as ``all-MiniLM-L6-v2`` on
+  CPU (optional dependency, loaded on first use)
+
+Local providers use every core: hashing splits each call across a joblib
+process pool, sentence-transformers relies on torch's intra-op threads.
+
+Vectors from different providers are not comparable; ``provider.model`` is
+recorded with each embedding and keys the embedding cache, so switching
+providers means re-embedding with ``--force``.
+
+This module must stay importable without Django being set up (spaCy worker
+processes import content_analyzer, which imports it lazily).
+"""
+
+import logging
+import os
+from typing import List, Optional
+
+from crawler.embeddings import EMBEDDING_MODEL, MAX_INPUTS_PER_REQUEST, MAX_TOKENS_PER_INPUT, MAX_TOKENS_PER_REQUEST
+
+logger = logging.getLogger('crawler')
+
+PROVIDERS = ('openai', 'hashing', 'sentence-transformers')
+
+DEFAULT_HASHING_DIMENSIONS = 1536
+DEFAULT_LOCAL_MODEL = 'all-MiniLM-L6-v2'
+
+# Below this many texts, hashing in-process beats shipping them to workers
+HASHING_PARALLEL_MIN_TEXTS = 256
+
+
+class EmbeddingProvider:
+    """
+    Turns texts into vectors, one per text, in order.
+
+    Attributes:
+        model: Name recorded with the vectors and used as the cache key
+        max_inputs: Texts per embed() call
+        max_tokens: Tokens per embed() call (None: unbounded)
+        max_tokens_per_input: Longer texts are truncated first (None: the
+            provider handles long input itself)
+        transient_errors: Exceptions worth retrying
+        is_remote: Calls go over the network (rate limits, Batch API)
+    """
+
+    model = ''
+    max_inputs = MAX_INPUTS_PER_REQUEST
+    max_tokens: Optional[int] = None
+    max_tokens_per_input: Optional[int] = None
+    transient_errors = ()
+    is_remote = False
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI (or any OpenAI-compatible) embeddings endpoint."""
+
+    max_tokens = MAX_TOKENS_PER_REQUEST
+    max_tokens_per_input = MAX_TOKENS_PER_INPUT
+    is_remote = True
+
+    def __init__(self, client, model: str = EMBEDDING_MODEL):
+        import openai
+
+        self.client = client
+        self.model = model
+        self.transient_errors = (
+            openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError,
+        )
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        response = self.client.embeddings.create(model=self.model, input=texts)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Feature-hashed bag of words and bigrams, no model to download.
+
+    Args:
+        dimensions: Vector size (more dimensions, fewer hash collisions)
+        n_jobs: Worker processes (default: all cores)
+    """
+
+    max_inputs = 8192
+
+    def __init__(self, dimensions: int = DEFAULT_HASHING_DIMENSIONS, n_jobs: Optional[int] = None):
+        try:
+            from sklearn.feature_extraction.text import HashingVectorizer
+        except ImportError:
+            raise ValueError("The 'scikit-learn' package is not installed; `pip install -r requirements.txt`.")
+
+        self.dimensions = dimensions
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.model = f'hashing-{dimensions}'
+        self.vectorizer = HashingVectorizer(
+            n_features=dimensions,
+            ngram_range=(1, 2),
+            strip_accents='unicode',
+            norm='l2',
+        )
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        import numpy as np
+        import scipy.sparse
+
+        if self.n_jobs == 1 or len(texts) < HASHING_PARALLEL_MIN_TEXTS:
+            matrix = self.vectorizer.transform(texts)
+        else:
+            from joblib import Parallel, delayed
+
+            size = -(-len(texts) // self.n_jobs)
+            parts = Parallel(n_jobs=self.n_jobs)(
+                delayed(self.vectorizer.transform)(texts[start:start + size])
+                for start in range(0, len(texts), size)
+            )
+            matrix = scipy.sparse.vstack(parts)
+        return np.round(matrix.toarray(), 6).tolist()
+
+
+class SentenceTransformerProvider(EmbeddingProvider):
+    """
+    Local sentence-transformers model on CPU.
+
+    The model truncates long input to its own sequence limit; torch spreads
+    each batch over all cores.
+    """
+
+    max_inputs = 1024
+
+    def __init__(self, model_name: str = DEFAULT_LOCAL_MODEL, batch_size: int = 64):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ValueError(
+                "The 'sentence-transformers' package is not installed; "
+                "`pip install sentence-transformers` or use the 'hashing' provider."
+            )
+        self.model = model_name
+        self.batch_size = batch_size
+        self.encoder = SentenceTransformer(model_name, device='cpu')
+        logger.info(f"[Embeddings] Loaded local model {model_name}")
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.encoder.encode(
+            texts, batch_size=self.batch_size, normalize_embeddings=True, convert_to_numpy=True,
+        )
+        return vectors.round(6).tolist()
+
+
+def get_embedding_provider(name: Optional[str] = None, api_key: Optional[str] = None,
+                           base_url: Optional[str] = None) -> EmbeddingProvider:
+    """
+    Build the configured provider (default EMBEDDING_PROVIDER).
+
+    The OpenAI provider uses ``api_key`` (default OPENAI_API_KEY) and
+    ``base_url`` (default OPENAI_BASE_URL). Raises ValueError when the
+    provider is unknown or cannot be set up.
+    """
+    from django.conf import settings
+
+    name = name or settings.EMBEDDING_PROVIDER
+    if name == 'openai':
+        from decouple import config
+
+        try:
+            from openai import OpenAI
+        except ImportError:
+            raise ValueError("The 'openai' package is not installed; `pip install -r requirements.txt`.")
+        api_key = api_key or config('OPENAI_API_KEY', default=None) or config('OPENAI_KEY', default=None)
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY is not set (or use a local EMBEDDING_PROVIDER)")
+        return OpenAIEmbeddingProvider(OpenAI(api_key=api_key, base_url=base_url or settings.OPENAI_BASE_URL or None))
+    if name == 'hashing':
+        return HashingEmbeddingProvider(dimensions=settings.EMBEDDING_HASHING_DIMENSIONS)
+    if name == 'sentence-transformers':
+        return SentenceTransformerProvider(settings.EMBEDDING_LOCAL_MODEL)
+    raise ValueError(f"Unknown embedding provider: {name} (choose from {', '.join(PROVIDERS)})")
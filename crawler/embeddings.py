@@ -0,0 +1,412 @@
+"""
+Embedding inputs and result mapping for crawled pages.
+
+A page is embedded as one request: the full page text, then one text per
+non-empty section, then one text per AI learning objective. ``index_map``
+records what each input was, so the vectors can be assigned back to
+``page_embedding``, ``section_embeddings`` and
+``learning_objective_embeddings``. Keeping the map explicit lets results
+that arrive later (e.g. from the Batch API) be applied without recomputing
+the inputs.
+
+``BatchEmbedder`` packs the inputs of many pages into as few calls to an
+embedding provider (``crawler.embedding_providers``: OpenAI, or a local
+backend) as the per-request limits allow, scatters the vectors back to their
+pages and saves them with ``bulk_update``. Identical texts (shared sections,
+boilerplate objectives) are embedded once per call, and texts seen in earlier
+runs come from the embedding cache (``crawler.embedding_cache``).
+"""
+
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger('crawler')
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Embeddings endpoint limits: inputs per request, tokens per input and
+# tokens per request (the latter kept below the documented 300k for headroom,
+# since without tiktoken token counts are estimated)
+MAX_INPUTS_PER_REQUEST = 2048
+MAX_TOKENS_PER_INPUT = 8191
+MAX_TOKENS_PER_REQUEST = 250000
+
+# Characters per token when tiktoken is unavailable; deliberately low so
+# estimates err on the side of smaller requests
+CHARS_PER_TOKEN_ESTIMATE = 3
+
+# Pages loaded, embedded and saved per round by BatchEmbedder.embed_queryset
+EMBED_CHUNK_PAGES = 500
+
+# CrawledPage fields written by assign_page_embeddings
+EMBEDDING_UPDATE_FIELDS = [
+    "page_embedding",
+    "section_embeddings",
+    "learning_objective_embeddings",
+    "updated_at",
+]
+
+
+def learning_objective_inputs(learning_objectives: List[Dict], page_context: str = "") -> List[str]:
+    """
+    Build the embedding input text for each learning objective.
+
+    Format: "Context: {page_context} | Objective: {objective} | Action: {verb} | ..."
+    so the embedding captures both the what and the how.
+    """
+    inputs = []
+    for lo in learning_objectives:
+        objective = lo.get("objective", "")
+        bloom_level = lo.get("bloom_level", "")
+        bloom_verb = lo.get("bloom_verb", "")
+        difficulty = lo.get("difficulty", "")
+
+        parts = []
+        if page_context:
+            parts.append(f"Context: {page_context}")
+        parts.append(f"Objective: {objective}")
+        if bloom_verb:
+            parts.append(f"Action: {bloom_verb}")
+        if bloom_level:
+            parts.append(f"Level: {bloom_level}")
+        if difficulty:
+            parts.append(f"Difficulty: {difficulty}")
+        inputs.append(" | ".join(parts))
+    return inputs
+
+
+def learning_objective_records(learning_objectives: List[Dict], vectors: List[List[float]],
+                               model: str = EMBEDDING_MODEL) -> List[Dict]:
+    """Pair learning objectives with their embedding vectors."""
+    return [
+        {
+            "objective": lo.get("objective", ""),
+            "bloom_level": lo.get("bloom_level", ""),
+            "bloom_verb": lo.get("bloom_verb", ""),
+            "difficulty": lo.get("difficulty", ""),
+            "estimated_time_minutes": lo.get("estimated_time_minutes"),
+            "measurable": lo.get("measurable"),
+            "embedding_model": model,
+            "embedding": vec,
+        }
+        for lo, vec in zip(learning_objectives, vectors)
+    ]
+
+
+def page_embedding_inputs(page, include_learning_objectives: bool = True) -> Tuple[List[str], List[List]]:
+    """
+    Collect the texts to embed for a page.
+
+    Returns:
+        (inputs, index_map) where index_map[i] is ["page", None],
+        ["section", section_index] or ["lo", objective_index].
+    """
+    inputs = []
+    index_map = []
+
+    full_text = (page.main_content or "").strip()
+    if full_text:
+        inputs.append(full_text)
+        index_map.append(["page", None])
+
+    for idx, section in enumerate(page.sections or []):
+        content = (section.get("content") or "").strip()
+        if not content:
+            continue
+        heading = (section.get("heading") or "").strip()
+        # Combine heading and content for richer section-level embeddings
+        inputs.append(f"{heading}\n\n{content}" if heading else content)
+        index_map.append(["section", idx])
+
+    if include_learning_objectives and page.ai_learning_objectives:
+        lo_texts = learning_objective_inputs(page.ai_learning_objectives, page_context=f"{page.title}")
+        for idx, text in enumerate(lo_texts):
+            inputs.append(text)
+            index_map.append(["lo", idx])
+
+    return inputs, index_map
+
+
+def assign_page_embeddings(page, index_map: List[List], vectors: List[List[float]], model: str = EMBEDDING_MODEL):
+    """
+    Store vectors on a page (without saving), following an index_map from page_embedding_inputs.
+
+    Sets every field in EMBEDDING_UPDATE_FIELDS; ``model`` is recorded with
+    section and learning-objective vectors.
+    """
+    from django.utils import timezone
+
+    if len(index_map) != len(vectors):
+        raise ValueError(f"Expected {len(index_map)} vectors, got {len(vectors)}")
+
+    sections = page.sections or []
+    page_embedding = []
+    section_embeddings = []
+    lo_vectors = []
+
+    for (kind, idx), vec in zip(index_map, vectors):
+        if kind == "page":
+            page_embedding = vec
+        elif kind == "section":
+            section = sections[idx] if idx < len(sections) else {}
+            section_embeddings.append({
+                "index": idx,
+                "heading": section.get("heading"),
+                "level": section.get("level"),
+                "word_count": section.get("word_count"),
+                "has_code": section.get("has_code"),
+                "has_list": section.get("has_list"),
+                "content": section.get("content"),
+                "embedding_model": model,
+                "embedding": vec,
+            })
+        elif kind == "lo":
+            lo_vectors.append((idx, vec))
+
+    learning_objectives = page.ai_learning_objectives or []
+    page.page_embedding = page_embedding
+    page.section_embeddings = section_embeddings
+    page.learning_objective_embeddings = learning_objective_records(
+        [learning_objectives[idx] for idx, _ in lo_vectors if idx < len(learning_objectives)],
+        [vec for idx, vec in lo_vectors if idx < len(learning_objectives)],
+        model,
+    )
+    page.updated_at = timezone.now()
+
+
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Token count of an embedding input (estimated from its length without tiktoken)."""
+    if tiktoken is not None:
+        return len(_get_encoding().encode(text, disallowed_special=()))
+    return len(text) // CHARS_PER_TOKEN_ESTIMATE + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int = MAX_TOKENS_PER_INPUT) -> Tuple[str, int]:
+    """Cut a text to the per-input token limit; returns (text, token count)."""
+    if tiktoken is not None:
+        encoding = _get_encoding()
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text, len(tokens)
+        return encoding.decode(tokens[:max_tokens]), max_tokens
+    max_chars = max_tokens * CHARS_PER_TOKEN_ESTIMATE
+    if len(text) > max_chars:
+        text = text[:max_chars]
+    return text, count_tokens(text)
+
+
+def pack_requests(
+    token_counts: List[int],
+    max_inputs: int = MAX_INPUTS_PER_REQUEST,
+    max_tokens: Optional[int] = MAX_TOKENS_PER_REQUEST,
+) -> List[List[int]]:
+    """
+    Group inputs into requests that respect the per-request limits.
+
+    Inputs keep their order (first fit); returns lists of input indexes.
+    ``max_tokens=None`` only limits the number of inputs.
+    """
+    if max_tokens is None:
+        max_tokens = float('inf')
+    requests = []
+    current = []
+    current_tokens = 0
+    for index, tokens in enumerate(token_counts):
+        if current and (len(current) >= max_inputs or current_tokens + tokens > max_tokens):
+            requests.append(current)
+            current = []
+            current_tokens = 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        requests.append(current)
+    return requests
+
+
+class BatchEmbedder:
+    """
+    Embed many pages with as few requests as possible.
+
+    Every page's inputs (page_embedding_inputs) are truncated to the
+    provider's per-input token limit and packed, across pages, into requests
+    bounded by its per-request limits (MAX_INPUTS_PER_REQUEST and
+    MAX_TOKENS_PER_REQUEST for OpenAI). A page only gets vectors if all its
+    inputs were embedded. Inputs are deduplicated by normalised text and
+    looked up in the embedding cache first, so only texts never seen before
+    are sent.
+
+    Args:
+        provider: EmbeddingProvider (see get_embedding_provider)
+        max_retries: Attempts per request on rate limits and transient errors
+        log: Optional callable receiving progress messages
+        cache: EmbeddingCache (default: one for the provider's model,
+            enabled per EMBEDDING_CACHE_ENABLED)
+    """
+
+    def __init__(self, provider, max_retries: int = 5, log: Optional[Callable] = None, cache=None):
+        if cache is None:
+            # Imported here: this module is also loaded where Django isn't set up
+            from crawler.embedding_cache import EmbeddingCache
+            cache = EmbeddingCache(model=provider.model)
+        self.provider = provider
+        self.model = provider.model
+        self.cache = cache
+        self.max_inputs = provider.max_inputs
+        self.max_tokens = provider.max_tokens
+        self.max_retries = max_retries
+        self.log = log or logger.info
+        self.stats = {
+            'pages': 0,
+            'failed_pages': 0,
+            'inputs': 0,
+            'tokens': 0,
+            'requests': 0,
+            'retries': 0,
+            'truncated': 0,
+        }
+        self.failed_page_ids = []
+
+    def embed_texts(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Embed texts in packed requests; returns one vector per text.
+
+        Each distinct text (after normalisation) is looked up in the cache and
+        embedded at most once. Texts in a request that failed after all
+        retries get None.
+        """
+        from crawler.embedding_cache import text_key
+
+        keys = [text_key(text) for text in texts]
+        unique = {}
+        for text, key in zip(texts, keys):
+            unique.setdefault(key, text)
+
+        found = self.cache.get_many(unique)
+        missing = [key for key in unique if key not in found]
+        max_input_tokens = self.provider.max_tokens_per_input
+        if max_input_tokens is None:
+            # The provider handles long input; estimated counts are enough for the stats
+            prepared = {key: (text, len(text) // CHARS_PER_TOKEN_ESTIMATE + 1) for key, text in unique.items()}
+        else:
+            prepared = {key: truncate_to_tokens(text, max_input_tokens) for key, text in unique.items()}
+        self.stats['truncated'] += sum(1 for key in missing if len(prepared[key][0]) < len(unique[key]))
+
+        embedded = {}
+        for indexes in pack_requests([prepared[key][1] for key in missing], self.max_inputs, self.max_tokens):
+            batch_keys = [missing[i] for i in indexes]
+            try:
+                vectors = self._create([prepared[key][0] for key in batch_keys])
+            except Exception as e:
+                logger.error(f"[Embeddings] Request with {len(batch_keys)} inputs failed: {e}")
+                continue
+            embedded.update(zip(batch_keys, vectors))
+            self.stats['inputs'] += len(batch_keys)
+            self.stats['tokens'] += sum(prepared[key][1] for key in batch_keys)
+        self.cache.set_many(embedded)
+
+        # Every text not sent to the API is a hit: cached, or a repeat within this call
+        self.cache.misses += len(missing)
+        self.cache.hits += len(texts) - len(missing)
+        self.cache.tokens_saved += sum(prepared[key][1] for key in keys) - sum(prepared[key][1] for key in missing)
+        self.stats.update(self.cache.summary())
+
+        found.update(embedded)
+        return [found.get(key) for key in keys]
+
+    def _create(self, inputs: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            try:
+                vectors = self.provider.embed(inputs)
+                self.stats['requests'] += 1
+                return vectors
+            except self.provider.transient_errors as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                self.stats['retries'] += 1
+                wait = min(2 ** attempt, 60)
+                logger.warning(f"[Embeddings] {e.__class__.__name__}, retrying in {wait}s "
+                               f"(attempt {attempt}/{self.max_retries})")
+                time.sleep(wait)
+
+    def embed_pages(self, pages, include_learning_objectives: bool = True) -> List:
+        """
+        Embed a list of pages and assign the vectors (without saving).
+
+        Returns the pages that received embeddings.
+        """
+        texts = []
+        page_inputs = []
+        for page in pages:
+            inputs, index_map = page_embedding_inputs(page, include_learning_objectives)
+            if not inputs:
+                continue
+            page_inputs.append((page, index_map, len(texts), len(inputs)))
+            texts.extend(inputs)
+
+        vectors = self.embed_texts(texts)
+
+        embedded = []
+        for page, index_map, start, count in page_inputs:
+            page_vectors = vectors[start:start + count]
+            if any(vec is None for vec in page_vectors):
+                self.stats['failed_pages'] += 1
+                self.failed_page_ids.append(page.id)
+                continue
+            assign_page_embeddings(page, index_map, page_vectors, self.model)
+            embedded.append(page)
+        self.stats['pages'] += len(embedded)
+        return embedded
+
+    def embed_queryset(self, queryset, chunk_size: int = EMBED_CHUNK_PAGES,
+                       include_learning_objectives: bool = True) -> Dict:
+        """
+        Embed and save every page of a queryset, chunk_size pages at a time.
+
+        Returns the stats dict; dashboard caches of the affected clients are
+        invalidated.
+        """
+        from crawler.models import CrawledPage
+        from dashboard.caching import bump_data_version
+
+        client_ids = set()
+        chunk = []
+
+        def flush():
+            embedded = self.embed_pages(chunk, include_learning_objectives)
+            CrawledPage.objects.bulk_update(embedded, EMBEDDING_UPDATE_FIELDS, batch_size=chunk_size)
+            client_ids.update(page.client_id for page in embedded)
+            self.log(
+                f"Embedded {self.stats['pages']} page(s) so far in {self.stats['requests']} request(s), "
+                f"{self.stats['failed_pages']} failed, {self.cache.hits} cached input(s)"
+            )
+            chunk.clear()
+
+        for page in queryset.iterator(chunk_size=chunk_size):
+            chunk.append(page)
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+
+        self.cache.prune()
+        for client_id in client_ids:
+            bump_data_version(client_id)
+        return self.stats
@@ -0,0 +1,161 @@
+"""
+Per-job structured log files.
+
+While a crawl runs, the Scrapy process attaches a ``JobLogHandler`` that
+writes every spider, Scrapy and pipeline record to
+``logs/jobs/job_<id>.jsonl`` as one JSON object per line. The dashboard
+reads these files from the end (``tail_lines``) instead of scanning the
+shared crawler.log, and streams new lines live (``follow``) using byte
+offsets as resumable cursors.
+"""
+
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+
+# Loggers the handler attaches to: the root logger catches Scrapy and the
+# spider; 'crawler' does not propagate, so it needs its own attachment.
+JOB_LOGGERS = ('', 'crawler')
+
+
+def job_log_dir():
+    return Path(settings.BASE_DIR) / 'logs' / 'jobs'
+
+
+def job_log_path(job_id):
+    """Path of the structured log file for a job."""
+    return job_log_dir() / f'job_{job_id}.jsonl'
+
+
+class JobLogHandler(logging.FileHandler):
+    """Write log records as JSON lines into a job's log file."""
+
+    def __init__(self, job_id, level=logging.INFO):
+        job_log_dir().mkdir(parents=True, exist_ok=True)
+        super().__init__(job_log_path(job_id), mode='a', encoding='utf-8')
+        self.job_id = job_id
+        self.setLevel(level)
+        self._last_record = None
+
+    def emit(self, record):
+        # The handler sits on several loggers; if one propagates into another
+        # the same record arrives twice
+        if record is self._last_record:
+            return
+        self._last_record = record
+        super().emit(record)
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc'] = logging.Formatter().formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def attach_job_log_handler(job_id):
+    """Start capturing log records for a job; returns the handler to detach later."""
+    handler = JobLogHandler(job_id)
+    for name in JOB_LOGGERS:
+        logging.getLogger(name).addHandler(handler)
+    return handler
+
+
+def detach_job_log_handler(handler):
+    """Stop capturing and close the job's log file."""
+    for name in JOB_LOGGERS:
+        logging.getLogger(name).removeHandler(handler)
+    handler.close()
+
+
+def format_entry(line):
+    """Render a JSON log line as display text; non-JSON lines are returned as-is."""
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return line
+    text = f"{entry.get('ts', '')} {entry.get('level', '')} [{entry.get('logger', '')}] {entry.get('message', '')}"
+    if entry.get('exc'):
+        text += f"\n{entry['exc']}"
+    return text
+
+
+def tail_lines(path, count=200, block_size=8192):
+    """
+    Return the last ``count`` lines of a file without reading all of it.
+
+    Reads fixed-size blocks backwards from the end until enough newlines
+    have been seen, so the cost depends on ``count``, not on file size.
+
+    Returns:
+        (lines, end_offset) where end_offset is the file size at read time,
+        usable as the starting cursor for ``follow``.
+    """
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        position = end
+        data = b''
+        while position > 0 and data.count(b'\n') <= count:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+
+    lines = data.decode('utf-8', errors='replace').splitlines()
+    return lines[-count:], end
+
+
+def follow(path, offset=0, poll_interval=0.5, idle_timeout=None, should_stop=None):
+    """
+    Yield (line, next_offset) for lines appended to a file after ``offset``.
+
+    Args:
+        path: File to follow; it may not exist yet
+        offset: Byte offset to resume from
+        poll_interval: Seconds between checks for new data
+        idle_timeout: Stop after this many seconds without new lines
+        should_stop: Optional callable checked while idle; stop when it returns True
+
+    Yields (None, offset) on every idle poll so callers can send keep-alives.
+    """
+    last_activity = time.monotonic()
+    partial = b''
+    while True:
+        got_data = False
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size < offset:
+                    # File was truncated or recreated: start over
+                    offset = 0
+                f.seek(offset)
+                chunk = f.read()
+            if chunk:
+                line_end = offset - len(partial)
+                offset += len(chunk)
+                partial += chunk
+                *complete, partial = partial.split(b'\n')
+                for raw in complete:
+                    got_data = True
+                    line_end += len(raw) + 1
+                    yield raw.decode('utf-8', errors='replace'), line_end
+
+        if got_data:
+            last_activity = time.monotonic()
+            continue
+
+        if should_stop and should_stop():
+            return
+        if idle_timeout and time.monotonic() - last_activity > idle_timeout:
+            return
+        yield None, offset - len(partial)
+        time.sleep(poll_interval)
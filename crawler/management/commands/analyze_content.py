@@ -7,14 +7,34 @@ Usage:
     python manage.py analyze_content --client-id 3 --force
     python manage.py analyze_content --page-id 123
     python manage.py analyze_content --dry-run --job-id 57  # cost estimation
+    python manage.py analyze_content --job-id 57 --concurrency 16 --spacy-workers 4 --spacy-processes
+    python manage.py analyze_content --job-id 57 --base-url http://127.0.0.1:8089/v1  # mock server
+    python manage.py analyze_content --client-id 3 --batch  # OpenAI Batch API (cheaper, up to 24h)
+    python manage.py analyze_content --batch-resume          # continue unfinished batches
+    python manage.py analyze_content --job-id 57 --force --no-cache  # ignore cached results
+    python manage.py analyze_content --job-id 57 --force --benchmark-spacy  # preprocessing docs/sec
+    python manage.py analyze_content --client-id 3 --rebuild-concept-index  # backfill crawler.concept_index
+
+Pages are analyzed concurrently by crawler.analysis_engine.AsyncAnalysisEngine,
+rate limited to the account's request/token budgets and saved in batches.
+Pages whose prompt inputs were analyzed before (by any job or client) copy
+the cached result from crawler.analysis_cache instead of calling the API.
+Saved results also refresh the pages' rows in the concept index
+(crawler.concept_index).
 """
 
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 from django.db.models import Q
 from decouple import config
 
 from crawler.models import CrawledPage
-from crawler.content_analyzer import ContentAnalyzer
+from crawler.content_analyzer import ContentAnalyzer, SKIP_DOC_TYPES, SPACY_BATCH_SIZE
+from crawler.analysis_engine import AsyncAnalysisEngine
+from crawler.analysis_cache import AnalysisCache
+from crawler.batch_api import BatchManager, resumable_batches
+from crawler.concept_index import rebuild_concept_index
+from dashboard.caching import bump_data_version
 
 
 class Command(BaseCommand):
@@ -51,11 +71,94 @@ class Command(BaseCommand):
             action="store_true",
             help="Show what would be analyzed and estimate costs without processing",
         )
+        parser.add_argument(
+            "--benchmark-spacy",
+            action="store_true",
+            help="Compare per-page and batched spaCy preprocessing speed on the selected pages "
+                 "(first 200 unless --limit); no API calls",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.ANALYSIS_CONCURRENCY,
+            help=f"Maximum LLM requests in flight (default: {settings.ANALYSIS_CONCURRENCY})",
+        )
+        parser.add_argument(
+            "--rpm",
+            type=int,
+            default=settings.ANALYSIS_RPM,
+            help="Starting requests-per-minute budget; adapts to rate-limit headers",
+        )
+        parser.add_argument(
+            "--tpm",
+            type=int,
+            default=settings.ANALYSIS_TPM,
+            help="Starting tokens-per-minute budget; adapts to rate-limit headers",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Pages loaded and saved per database batch (default: 50)",
+        )
+        parser.add_argument(
+            "--spacy-workers",
+            type=int,
+            default=1,
+            help="Workers running spaCy preprocessing ahead of the LLM calls (default: 1)",
+        )
+        parser.add_argument(
+            "--spacy-processes",
+            action="store_true",
+            help="Run spaCy preprocessing in worker processes instead of threads",
+        )
+        parser.add_argument(
+            "--base-url",
+            type=str,
+            default=settings.OPENAI_BASE_URL,
+            help="OpenAI-compatible API base URL (e.g. a local mock server)",
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Ignore cached analysis results (new results still refresh the cache)",
+        )
+        parser.add_argument(
+            "--batch",
+            action="store_true",
+            help="Submit through the OpenAI Batch API instead of interactive requests",
+        )
+        parser.add_argument(
+            "--batch-resume",
+            action="store_true",
+            help="Resume unfinished analysis batches (submit, poll and apply)",
+        )
+        parser.add_argument(
+            "--no-wait",
+            action="store_true",
+            help="With --batch/--batch-resume, do not wait for batches to finish",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=int,
+            default=60,
+            help="Seconds between batch status checks (default: 60)",
+        )
+        parser.add_argument(
+            "--rebuild-concept-index",
+            action="store_true",
+            help="Re-index the key concepts of already analyzed pages (selected by --page-id/--job-id/"
+                 "--client-id) without calling the API",
+        )
 
     def handle(self, *args, **options):
+        if options["rebuild_concept_index"]:
+            self._rebuild_concept_index(options)
+            return
+
         # Get API key
         api_key = config("OPENAI_API_KEY", default=None) or config("OPENAI_KEY", default=None)
-        if not api_key:
+        if not api_key and not options["benchmark_spacy"]:
             raise CommandError(
                 "OPENAI_API_KEY is not set. Please add it to your .env file."
             )
@@ -66,6 +169,17 @@ class Command(BaseCommand):
         limit = options.get("limit")
         force = options.get("force")
         dry_run = options.get("dry_run")
+        concurrency = max(options["concurrency"], 1)
+        cache = AnalysisCache(enabled=False) if options["no_cache"] else AnalysisCache()
+
+        if options["batch_resume"]:
+            batches = resumable_batches("analysis", job_id=job_id, client_id=client_id)
+            if not batches:
+                self.stdout.write("No unfinished analysis batches.")
+                return
+            self.stdout.write(f"Resuming {len(batches)} analysis batch(es)...")
+            self._run_batches(api_key, batches, options, cache)
+            return
 
         # Build queryset
         queryset = CrawledPage.objects.all()
@@ -88,8 +202,7 @@ class Command(BaseCommand):
         
         # Skip certain doc types to save costs
         # Note: 'unknown' is NOT skipped because AI analysis reclassifies pages
-        skip_types = ['navigation', 'landing', 'changelog']
-        queryset = queryset.exclude(doc_type__in=skip_types)
+        queryset = queryset.exclude(doc_type__in=SKIP_DOC_TYPES)
 
         if limit:
             queryset = queryset.order_by("id")[:limit]
@@ -101,7 +214,22 @@ class Command(BaseCommand):
 
         # Dry run: estimate costs
         if dry_run:
-            self._dry_run(queryset, total)
+            self._dry_run(queryset, total, concurrency)
+            return
+
+        if options["benchmark_spacy"]:
+            self._benchmark_spacy(queryset if limit else queryset.order_by("id")[:200], options["spacy_workers"])
+            return
+
+        if options["batch"]:
+            self.stdout.write(f"Preparing analysis batch requests for {total} page(s)...")
+            analyzer = ContentAnalyzer(openai_api_key=api_key, base_url=options["base_url"])
+            manager = BatchManager(
+                analyzer.openai_client, "analysis", analyzer=analyzer, log=self.stdout.write, cache=cache,
+            )
+            batches = manager.prepare(queryset, job_id=job_id, client_id=client_id)
+            self._write_cache_summary(cache)
+            self._run_batches(api_key, batches, options, cache)
             return
 
         self.stdout.write(
@@ -109,132 +237,47 @@ class Command(BaseCommand):
         )
         self.stdout.write(f"Using GPT-4o-mini (estimated cost: ${total * 0.00015:.4f})")
 
-        # Initialize analyzer
-        analyzer = ContentAnalyzer(openai_api_key=api_key)
+        # Initialize analyzer and engine
+        analyzer = ContentAnalyzer(openai_api_key=api_key, base_url=options["base_url"])
+        page_ids = list(queryset.values_list("id", flat=True))
+        done = [0]
 
-        # Process pages
-        success_count = 0
-        error_count = 0
-        
-        for idx, page in enumerate(queryset.iterator(), 1):
-            try:
-                self.stdout.write(
-                    f"\n[{idx}/{total}] Analyzing page {page.id}: {page.url[:80]}..."
-                )
-                
-                result = analyzer.analyze_page(
-                    page_id=page.id,
-                    url=page.url,
-                    title=page.title,
-                    main_content=page.main_content,
-                    sections=page.sections or [],
-                    doc_type=page.doc_type,
-                    existing_prerequisites=page.prerequisites or [],
-                    existing_learning_objectives=page.learning_objectives or [],
-                    has_code_examples=page.has_examples,
-                    has_images=bool(page.images),
-                    has_videos=page.has_videos,
-                    word_count=page.word_count or 0,
-                )
-                
-                # Save results - core fields
-                page.ai_topics = result["ai_topics"]
-                page.ai_learning_objectives = result["ai_learning_objectives"]
-                page.ai_prerequisite_chain = result["ai_prerequisite_chain"]
-                page.ai_analysis_metadata = result["ai_analysis_metadata"]
-                
-                # Save results - enhanced fields
-                page.ai_summary = result.get("ai_summary", "")
-                page.ai_audience_level = result.get("ai_audience_level", "")
-                page.ai_key_concepts = result.get("ai_key_concepts", [])
-                page.ai_doc_type = result.get("ai_doc_type", "")
-                page.ai_quality_indicators = result.get("ai_quality_indicators", {})
-                page.ai_related_topics = result.get("ai_related_topics", [])
-                
-                # Update original doc_type with AI classification if available
-                # This makes the AI classification visible in the main doc_type field
-                if page.ai_doc_type:
-                    # Map AI doc types to model choices (handle both formats)
-                    doc_type_mapping = {
-                        'api-reference': 'api_reference',
-                        'how-to': 'guide',  # Map how-to to guide
-                        'tutorial': 'tutorial',
-                        'reference': 'api_reference',
-                        'guide': 'guide',
-                        'concept': 'concept',
-                        'troubleshooting': 'troubleshooting',
-                        'quickstart': 'quickstart',
-                        'example': 'example',
-                        'faq': 'faq',
-                        'changelog': 'changelog',
-                    }
-                    mapped_type = doc_type_mapping.get(page.ai_doc_type.lower(), page.doc_type)
-                    if mapped_type != page.doc_type:
-                        page.doc_type = mapped_type
-                
-                # Merge with existing fields (optional enhancement)
-                enhanced_prereqs, enhanced_los = analyzer.merge_with_existing(
-                    ai_result=result,
-                    existing_prerequisites=page.prerequisites or [],
-                    existing_learning_objectives=page.learning_objectives or [],
-                )
-                page.prerequisites = enhanced_prereqs
-                page.learning_objectives = enhanced_los
-                page.has_prerequisites = len(enhanced_prereqs) > 0
-                page.has_learning_objectives = len(enhanced_los) > 0
-                
-                # Generate learning objective embeddings
-                if result["ai_learning_objectives"]:
-                    page_context = f"{page.title}"
-                    lo_embeddings = analyzer.generate_learning_objective_embeddings(
-                        learning_objectives=result["ai_learning_objectives"],
-                        page_context=page_context
-                    )
-                    page.learning_objective_embeddings = lo_embeddings
-                else:
-                    page.learning_objective_embeddings = []
-                
-                page.save(update_fields=[
-                    # Core AI fields
-                    'ai_topics',
-                    'ai_learning_objectives',
-                    'ai_prerequisite_chain',
-                    'ai_analysis_metadata',
-                    # Enhanced AI fields
-                    'ai_summary',
-                    'ai_audience_level',
-                    'ai_key_concepts',
-                    'ai_doc_type',
-                    'ai_quality_indicators',
-                    'ai_related_topics',
-                    # Merged fields
-                    'prerequisites',
-                    'learning_objectives',
-                    'has_prerequisites',
-                    'has_learning_objectives',
-                    # Learning objective embeddings
-                    'learning_objective_embeddings',
-                    # Update original doc_type with AI classification
-                    'doc_type',
-                ])
-                
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f"  ✓ {len(result['ai_topics'])} topics, "
-                        f"{len(result['ai_learning_objectives'])} LOs, "
-                        f"{len(result['ai_prerequisite_chain'])} prereqs, "
-                        f"{len(result.get('ai_key_concepts', []))} concepts "
-                        f"[{result.get('ai_audience_level', 'unknown')}]"
-                    )
-                )
-                success_count += 1
-                
-            except Exception as exc:
-                self.stderr.write(
-                    self.style.ERROR(f"  ✗ Error analyzing page {page.id}: {exc}")
+        def report(page, result, error):
+            done[0] += 1
+            prefix = f"[{done[0]}/{total}] Page {page.id}: {page.url[:80]}"
+            if error is not None:
+                self.stderr.write(self.style.ERROR(f"{prefix}\n  ✗ Error analyzing page {page.id}: {error}"))
+                return
+            self.stdout.write(prefix)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"  ✓ {len(result['ai_topics'])} topics, "
+                    f"{len(result['ai_learning_objectives'])} LOs, "
+                    f"{len(result['ai_prerequisite_chain'])} prereqs, "
+                    f"{len(result.get('ai_key_concepts', []))} concepts "
+                    f"[{result.get('ai_audience_level', 'unknown')}]"
                 )
-                error_count += 1
-                continue
+            )
+
+        engine = AsyncAnalysisEngine(
+            analyzer,
+            concurrency=concurrency,
+            rpm=options["rpm"],
+            tpm=options["tpm"],
+            batch_size=options["batch_size"],
+            spacy_workers=options["spacy_workers"],
+            spacy_processes=options["spacy_processes"],
+            on_page=report,
+            cache=cache,
+        )
+        stats = engine.run(page_ids)
+        success_count = stats["success"]
+        error_count = stats["errors"]
+        analyzed_client_ids = engine.client_ids
+
+        # Analysis can reclassify doc_type, so invalidate cached dashboard views
+        for analyzed_client_id in analyzed_client_ids:
+            bump_data_version(analyzed_client_id)
 
         # Summary
         self.stdout.write("\n" + "="*60)
@@ -243,11 +286,123 @@ class Command(BaseCommand):
                 f"Analysis completed: {success_count} successful, {error_count} errors"
             )
         )
-        if success_count > 0:
-            estimated_cost = success_count * 0.00015
+        elapsed = stats["elapsed_seconds"]
+        rate = success_count / elapsed * 60 if elapsed else 0
+        self.stdout.write(
+            f"Time: {elapsed:.1f}s ({rate:.1f} pages/min), "
+            f"tokens: {stats['prompt_tokens']} prompt + {stats['completion_tokens']} completion, "
+            f"rate limited: {stats['rate_limited']}, retries: {stats['retries']}"
+        )
+        if stats["skipped"]:
+            self.stdout.write(f"Skipped (doc type): {stats['skipped']}")
+        self._write_cache_summary(cache)
+        if stats["embedding_cache_hits"]:
+            self.stdout.write(
+                f"Learning-objective embeddings: {stats['embedding_cache_hits']} cached input(s) "
+                f"({stats['embedding_cache_hit_rate']:.0%}), ~${stats['embedding_cost_saved']:.4f} saved"
+            )
+        # Cache hits cost nothing
+        billed = success_count - min(cache.hits, success_count)
+        if billed > 0:
+            estimated_cost = billed * 0.00015
             self.stdout.write(f"Estimated cost: ${estimated_cost:.4f}")
 
-    def _dry_run(self, queryset, total):
+    def _rebuild_concept_index(self, options):
+        """Backfill the concept index from the pages' stored ai_key_concepts."""
+        queryset = CrawledPage.objects.all()
+        for option, field in (("page_id", "id"), ("job_id", "job_id"), ("client_id", "client_id")):
+            if options.get(option):
+                queryset = queryset.filter(**{field: options[option]})
+        stats = rebuild_concept_index(queryset)
+        self.stdout.write(
+            self.style.SUCCESS(f"Indexed {stats['concepts']} concepts from {stats['pages']} page(s)")
+        )
+
+    def _write_cache_summary(self, cache):
+        lookups = cache.hits + cache.misses
+        if lookups:
+            self.stdout.write(
+                f"Analysis cache: {cache.hits}/{lookups} hits ({cache.hit_rate:.0%}), "
+                f"{cache.stored} new entries"
+            )
+
+    def _run_batches(self, api_key, batches, options, cache):
+        analyzer = ContentAnalyzer(openai_api_key=api_key, base_url=options["base_url"])
+        manager = BatchManager(
+            analyzer.openai_client, "analysis", analyzer=analyzer, log=self.stdout.write, cache=cache,
+        )
+        running = manager.run(batches, wait=not options["no_wait"], poll_interval=options["poll_interval"])
+        if running:
+            return
+        # Batch-applied results carry no learning-objective embeddings; generate_embeddings
+        # picks up analyzed pages that lack them even without --force
+        filters = "".join(
+            f" --{name.replace('_', '-')} {options[name]}"
+            for name in ("page_id", "job_id", "client_id") if options.get(name)
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Batch processing finished. Run `python manage.py generate_embeddings"
+                f"{filters}` to embed the new learning objectives."
+            )
+        )
+
+    def _benchmark_spacy(self, queryset, spacy_workers):
+        """Time the old per-page preprocessing against batched nlp.pipe."""
+        import time
+
+        pages = [
+            (page.title, page.main_content or "", page.sections or [])
+            for page in queryset.only("title", "main_content", "sections")
+        ]
+        analyzer = ContentAnalyzer(openai_api_key="")
+        analyzer.spacy_nlp  # load the model outside the timings
+        self.stdout.write(f"Benchmarking spaCy preprocessing on {len(pages)} page(s)...")
+
+        def per_page():
+            # Previous behaviour: every text parsed twice, full pipeline
+            results = []
+            for title, main_content, sections in pages:
+                content = analyzer.prepare_content(title, main_content, sections)
+                results.append({
+                    "content": content,
+                    "topic_candidates": analyzer._extract_topic_candidates(content),
+                    "prerequisite_mentions": analyzer._extract_prerequisite_mentions(content),
+                })
+            return results
+
+        runs = [
+            ("per page, two parses", per_page),
+            (f"nlp.pipe (batch {SPACY_BATCH_SIZE})", lambda: analyzer.preprocess_many(pages)),
+        ]
+        if spacy_workers > 1:
+            runs.append((
+                f"nlp.pipe, {spacy_workers} processes",
+                lambda: analyzer.preprocess_many(pages, n_process=spacy_workers),
+            ))
+
+        baseline = None
+        for label, run in runs:
+            start = time.perf_counter()
+            results = run()
+            elapsed = time.perf_counter() - start
+            rate = len(pages) / elapsed if elapsed else 0
+            if baseline is None:
+                baseline, baseline_rate = results, rate
+                self.stdout.write(f"  {label:<28} {rate:8.1f} docs/sec")
+                continue
+            same = all(
+                set(a["topic_candidates"]) == set(b["topic_candidates"])
+                and set(a["prerequisite_mentions"]) == set(b["prerequisite_mentions"])
+                for a, b in zip(baseline, results)
+            )
+            self.stdout.write(
+                f"  {label:<28} {rate:8.1f} docs/sec "
+                f"({rate / baseline_rate if baseline_rate else 0:.1f}x, "
+                f"{'same results' if same else 'RESULTS DIFFER'})"
+            )
+
+    def _dry_run(self, queryset, total, concurrency):
         """Show what would be analyzed and estimate costs."""
         self.stdout.write(self.style.WARNING("DRY RUN MODE - No changes will be made"))
         self.stdout.write(f"\nPages to analyze: {total}")
@@ -265,7 +420,12 @@ class Command(BaseCommand):
         # Cost estimation
         estimated_cost = total * 0.00015
         self.stdout.write(f"\nEstimated cost: ${estimated_cost:.4f} (at $0.00015/page)")
-        self.stdout.write(f"Estimated time: {total * 2:.0f} seconds ({total * 2 / 60:.1f} minutes)")
+        # ~2s per page per request slot; actual throughput is capped by the rate limits
+        seconds = total * 2 / concurrency
+        self.stdout.write(
+            f"Estimated time: {seconds:.0f} seconds ({seconds / 60:.1f} minutes) "
+            f"at concurrency {concurrency}"
+        )
         
         self.stdout.write(
             self.style.SUCCESS(
@@ -11,6 +11,7 @@ from django.core.management.base import BaseCommand
 from django.db.models import Count
 from core.models import Client
 from crawler.models import CrawledPage
+from dashboard.caching import bump_data_version
 
 
 class Command(BaseCommand):
@@ -113,6 +114,9 @@ class Command(BaseCommand):
                 client_deleted += len(pages_to_delete)
                 client_kept += 1
 
+            if client_deleted and not dry_run:
+                bump_data_version(client.id)
+
             self.stdout.write(self.style.SUCCESS(f'\n{client.name} Summary:'))
             self.stdout.write(f'  Pages kept: {client_kept}')
             self.stdout.write(f'  Pages deleted: {client_deleted}')
@@ -1,17 +1,62 @@
 """
 Management command to export crawl data.
+
+Pages are streamed from the database with a server-side cursor and a
+values() projection, and written incrementally, so memory stays flat
+regardless of job size.
+
+Usage:
+    python manage.py export_crawl --job 57 --format jsonl --output pages.jsonl.gz
+    python manage.py export_crawl --job 57 --format csv --compress zstd --output pages.csv.zst
+    python manage.py export_crawl --job 57 --format parquet --output pages.parquet
+    python manage.py export_crawl --job 57 --format json  # legacy single JSON document to stdout
 """
 
 from django.core.management.base import BaseCommand, CommandError
 from core.models import CrawlJob
+from core.db_functions import JSONBArrayLength
 from crawler.models import CrawledPage
+import io
 import json
 import csv
+import gzip
 import sys
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+# Columns exported by the document formats (json, jsonl, parquet)
+DOCUMENT_FIELDS = [
+    'url', 'depth', 'title', 'main_content', 'meta_description', 'headers',
+    'code_blocks', 'internal_links', 'external_links', 'status_code',
+    'response_time', 'page_size', 'crawled_at', 'is_duplicate',
+]
+
+# Columns exported by the tabular format (csv); counts are computed in the database
+CSV_FIELDS = [
+    'url', 'depth', 'title', 'meta_description', 'status_code',
+    'response_time', 'page_size', 'word_count', 'code_blocks_count',
+    'internal_links_count', 'external_links_count', 'crawled_at',
+    'is_duplicate',
+]
+
+# JSON columns stored as serialized JSON strings in Parquet
+PARQUET_JSON_FIELDS = {'headers', 'code_blocks', 'internal_links', 'external_links'}
+
+COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.zst': 'zstd'}
+
 
 class Command(BaseCommand):
-    help = 'Export crawl data to JSON or CSV'
+    help = 'Export crawl data to JSON, JSONL, CSV or Parquet'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -23,134 +68,235 @@ class Command(BaseCommand):
         parser.add_argument(
             '--format',
             type=str,
-            choices=['json', 'csv'],
+            choices=['json', 'jsonl', 'csv', 'parquet'],
             default='json',
-            help='Export format (json or csv)'
+            help='Export format (json, jsonl, csv or parquet)'
         )
         parser.add_argument(
             '--output',
             type=str,
-            help='Output file path (default: stdout)'
+            help='Output file path (default: stdout; required for parquet)'
         )
         parser.add_argument(
             '--include-html',
             action='store_true',
             help='Include raw HTML in export'
         )
+        parser.add_argument(
+            '--compress',
+            type=str,
+            choices=['none', 'gzip', 'zstd'],
+            help='Compress json/jsonl/csv output, or set the Parquet codec '
+                 '(default: inferred from the .gz/.zst output extension)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows fetched per database round trip and per Parquet record batch (default: 1000)'
+        )
 
     def handle(self, *args, **options):
         job_id = options['job']
         format_type = options['format']
         output_file = options.get('output')
         include_html = options['include_html']
+        batch_size = options['batch_size']
+        compress = options.get('compress') or self._infer_compression(output_file)
 
         try:
-            job = CrawlJob.objects.get(id=job_id)
+            job = CrawlJob.objects.select_related('client').get(id=job_id)
         except CrawlJob.DoesNotExist:
             raise CommandError(f'Job {job_id} not found')
 
+        if format_type == 'parquet' and not output_file:
+            raise CommandError('--output is required for parquet exports')
+        if format_type == 'parquet' and pyarrow is None:
+            raise CommandError(
+                "Parquet export requires pyarrow. Install with: pip install pyarrow"
+            )
+        if compress == 'zstd' and format_type != 'parquet' and zstandard is None:
+            raise CommandError(
+                "zstd compression requires zstandard. Install with: pip install zstandard"
+            )
+
         # Get all pages for this job
         pages = CrawledPage.objects.filter(job=job).order_by('depth', 'url')
 
-        if not pages.exists():
+        total = pages.count()
+        if total == 0:
             self.stdout.write(self.style.WARNING('No pages found for this job'))
             return
 
-        self.stdout.write(f'Exporting {pages.count()} pages from job #{job_id}...')
+        # Keep progress messages out of the export when it goes to stdout
+        log = self.stdout if output_file else self.stderr
+        log.write(f'Exporting {total} pages from job #{job_id}...')
 
-        # Prepare output
-        if output_file:
-            output = open(output_file, 'w', encoding='utf-8')
+        if format_type == 'parquet':
+            self.export_parquet(pages, output_file, include_html, compress, batch_size)
         else:
-            output = sys.stdout
+            output = self._open_output(output_file, compress)
+            try:
+                if format_type == 'json':
+                    self.export_json(job, pages, output, include_html, batch_size)
+                elif format_type == 'jsonl':
+                    self.export_jsonl(pages, output, include_html, batch_size)
+                else:
+                    self.export_csv(pages, output, include_html, batch_size)
+            finally:
+                if output is sys.stdout:
+                    output.flush()
+                else:
+                    output.close()
 
-        try:
-            if format_type == 'json':
-                self.export_json(job, pages, output, include_html)
-            else:
-                self.export_csv(job, pages, output, include_html)
-
-            if output_file:
-                self.stdout.write(
-                    self.style.SUCCESS(f'Export completed: {output_file}')
-                )
-        finally:
-            if output_file:
-                output.close()
-
-    def export_json(self, job, pages, output, include_html):
-        """Export data as JSON."""
-        data = {
-            'job': {
-                'id': job.id,
-                'client': job.client.name,
-                'target_url': job.target_url,
-                'status': job.status,
-                'started_at': job.started_at.isoformat() if job.started_at else None,
-                'completed_at': job.completed_at.isoformat() if job.completed_at else None,
-                'stats': job.stats,
-            },
-            'pages': []
-        }
+        if output_file:
+            self.stdout.write(
+                self.style.SUCCESS(f'Export completed: {output_file}')
+            )
 
-        for page in pages:
-            page_data = {
-                'url': page.url,
-                'depth': page.depth,
-                'title': page.title,
-                'main_content': page.main_content,
-                'meta_description': page.meta_description,
-                'headers': page.headers,
-                'code_blocks': page.code_blocks,
-                'internal_links': page.internal_links,
-                'external_links': page.external_links,
-                'status_code': page.status_code,
-                'response_time': page.response_time,
-                'page_size': page.page_size,
-                'crawled_at': page.crawled_at.isoformat(),
-                'is_duplicate': page.is_duplicate,
-            }
-
-            if include_html and page.raw_html:
-                page_data['raw_html'] = page.raw_html
-
-            data['pages'].append(page_data)
-
-        json.dump(data, output, indent=2, ensure_ascii=False)
-
-    def export_csv(self, job, pages, output, include_html):
-        """Export data as CSV."""
-        fieldnames = [
+    # ------------------------------------------------------------
+    # Row sources
+    # ------------------------------------------------------------
+
+    def iter_document_rows(self, pages, include_html, batch_size):
+        """Stream page dicts with only the exported columns."""
+        fields = DOCUMENT_FIELDS + (['raw_html'] if include_html else [])
+        for row in pages.values(*fields).iterator(chunk_size=batch_size):
+            if include_html and not row['raw_html']:
+                del row['raw_html']
+            yield row
+
+    def iter_json_rows(self, pages, include_html, batch_size):
+        """Stream document rows with crawled_at as a full-precision ISO string, as in CSV."""
+        for row in self.iter_document_rows(pages, include_html, batch_size):
+            row['crawled_at'] = row['crawled_at'].isoformat()
+            yield row
+
+    def iter_csv_rows(self, pages, include_html, batch_size):
+        """Stream flat CSV rows, with JSON array lengths computed by Postgres."""
+        fields = [
             'url', 'depth', 'title', 'meta_description', 'status_code',
-            'response_time', 'page_size', 'word_count', 'code_blocks_count',
-            'internal_links_count', 'external_links_count', 'crawled_at',
-            'is_duplicate'
+            'response_time', 'page_size', 'word_count', 'crawled_at', 'is_duplicate',
         ]
-
         if include_html:
-            fieldnames.append('raw_html')
+            fields.append('raw_html')
+        rows = pages.annotate(
+            code_blocks_count=JSONBArrayLength('code_blocks'),
+            internal_links_count=JSONBArrayLength('internal_links'),
+            external_links_count=JSONBArrayLength('external_links'),
+        ).values(*fields, 'code_blocks_count', 'internal_links_count', 'external_links_count')
+        for row in rows.iterator(chunk_size=batch_size):
+            row['crawled_at'] = row['crawled_at'].isoformat()
+            if include_html:
+                row['raw_html'] = row['raw_html'] or ''
+            yield row
+
+    # ------------------------------------------------------------
+    # Writers
+    # ------------------------------------------------------------
+
+    def export_json(self, job, pages, output, include_html, batch_size):
+        """Export data as a single JSON document, writing one page at a time."""
+        job_data = {
+            'id': job.id,
+            'client': job.client.name,
+            'target_url': job.target_url,
+            'status': job.status,
+            'started_at': job.started_at.isoformat() if job.started_at else None,
+            'completed_at': job.completed_at.isoformat() if job.completed_at else None,
+            'stats': job.stats,
+        }
+
+        output.write('{\n  "job": ')
+        output.write(self._indent(json.dumps(job_data, indent=2, ensure_ascii=False)))
+        output.write(',\n  "pages": [')
+        for idx, row in enumerate(self.iter_json_rows(pages, include_html, batch_size)):
+            output.write(',\n    ' if idx else '\n    ')
+            page_json = json.dumps(row, indent=2, ensure_ascii=False)
+            output.write(self._indent(page_json, 4))
+        output.write('\n  ]\n}\n')
+
+    def export_jsonl(self, pages, output, include_html, batch_size):
+        """Export data as JSON Lines, one page per line."""
+        for row in self.iter_json_rows(pages, include_html, batch_size):
+            output.write(json.dumps(row, ensure_ascii=False))
+            output.write('\n')
+
+    def export_csv(self, pages, output, include_html, batch_size):
+        """Export data as CSV."""
+        fieldnames = CSV_FIELDS + (['raw_html'] if include_html else [])
 
         writer = csv.DictWriter(output, fieldnames=fieldnames)
         writer.writeheader()
 
-        for page in pages:
-            row = {
-                'url': page.url,
-                'depth': page.depth,
-                'title': page.title,
-                'meta_description': page.meta_description,
-                'status_code': page.status_code,
-                'response_time': page.response_time,
-                'page_size': page.page_size,
-                'word_count': page.get_word_count(),
-                'code_blocks_count': page.get_code_block_count(),
-                'internal_links_count': page.get_internal_link_count(),
-                'external_links_count': page.get_external_link_count(),
-                'crawled_at': page.crawled_at.isoformat(),
-                'is_duplicate': page.is_duplicate,
-            }
+        for row in self.iter_csv_rows(pages, include_html, batch_size):
+            writer.writerow(row)
 
-            if include_html:
-                row['raw_html'] = page.raw_html or ''
+    def export_parquet(self, pages, output_file, include_html, compress, batch_size):
+        """Export data as Parquet, one record batch per database chunk."""
+        columns = [
+            ('url', pyarrow.string()),
+            ('depth', pyarrow.int32()),
+            ('title', pyarrow.string()),
+            ('main_content', pyarrow.string()),
+            ('meta_description', pyarrow.string()),
+            ('headers', pyarrow.string()),
+            ('code_blocks', pyarrow.string()),
+            ('internal_links', pyarrow.string()),
+            ('external_links', pyarrow.string()),
+            ('status_code', pyarrow.int32()),
+            ('response_time', pyarrow.float64()),
+            ('page_size', pyarrow.int64()),
+            ('crawled_at', pyarrow.timestamp('us', tz='UTC')),
+            ('is_duplicate', pyarrow.bool_()),
+        ]
+        if include_html:
+            columns.append(('raw_html', pyarrow.string()))
+        schema = pyarrow.schema(columns)
 
-            writer.writerow(row)
+        codec = compress if compress in ('gzip', 'zstd') else 'snappy'
+        writer = pyarrow.parquet.ParquetWriter(output_file, schema, compression=codec)
+        try:
+            batch = {name: [] for name in schema.names}
+            for row in self.iter_document_rows(pages, include_html, batch_size):
+                for name in schema.names:
+                    value = row.get(name)
+                    if name in PARQUET_JSON_FIELDS:
+                        value = json.dumps(value, ensure_ascii=False)
+                    batch[name].append(value)
+                if len(batch['url']) >= batch_size:
+                    writer.write_batch(pyarrow.RecordBatch.from_pydict(batch, schema=schema))
+                    batch = {name: [] for name in schema.names}
+            if batch['url']:
+                writer.write_batch(pyarrow.RecordBatch.from_pydict(batch, schema=schema))
+        finally:
+            writer.close()
+
+    # ------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------
+
+    def _infer_compression(self, output_file):
+        if output_file:
+            for extension, compress in COMPRESSION_EXTENSIONS.items():
+                if output_file.endswith(extension):
+                    return compress
+        return 'none'
+
+    def _open_output(self, output_file, compress):
+        """Open a text stream for the export, wrapping it in a compressor if requested."""
+        if compress == 'none':
+            return open(output_file, 'w', encoding='utf-8', newline='') if output_file else sys.stdout
+
+        if compress == 'gzip':
+            raw = gzip.open(output_file, 'wb') if output_file else gzip.GzipFile(fileobj=sys.stdout.buffer, mode='wb')
+        else:
+            target = open(output_file, 'wb') if output_file else sys.stdout.buffer
+            # closefd=False keeps stdout open once the zstd frame is finished
+            raw = zstandard.ZstdCompressor().stream_writer(target, closefd=bool(output_file))
+
+        return io.TextIOWrapper(raw, encoding='utf-8', newline='')
+
+    def _indent(self, text, spaces=2):
+        """Indent continuation lines of a JSON fragment nested inside the document."""
+        return text.replace('\n', '\n' + ' ' * spaces)
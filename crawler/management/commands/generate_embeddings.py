@@ -1,9 +1,15 @@
 """
-Generate OpenAI embeddings (text-embedding-3-small) for crawled pages.
+Generate embeddings for crawled pages (OpenAI text-embedding-3-small by
+default, or a local provider, see crawler.embedding_providers).
 
 Embeds:
 - One vector for the full page (`page.page_embedding`)
 - One vector per semantic section (`page.section_embeddings`), based on `page.sections`
+- One vector per AI learning objective (`page.learning_objective_embeddings`)
+
+Texts from many pages are packed into each request (up to the endpoint's
+per-request input and token limits), so a job needs a few requests per
+thousand pages rather than one per page.
 
 Usage examples:
 
@@ -17,26 +23,33 @@ Usage examples:
     python manage.py generate_embeddings --client-id 3
 
     # Force re-generation even if embeddings already exist
+    # (without --force, pages are picked up when they have no page embedding or
+    # have AI learning objectives without embeddings)
     python manage.py generate_embeddings --job-id 56 --force
+
+    # Overnight backfill through the OpenAI Batch API (cheaper, up to 24h)
+    python manage.py generate_embeddings --client-id 3 --batch
+    python manage.py generate_embeddings --batch --no-wait      # submit and exit
+    python manage.py generate_embeddings --batch-resume         # continue unfinished batches
+
+    # Offline, on all local cores (no API key needed)
+    python manage.py generate_embeddings --job-id 56 --provider hashing
+    python manage.py generate_embeddings --job-id 56 --provider sentence-transformers
 """
 
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 from decouple import config
 
 from crawler.models import CrawledPage
-
-try:
-    # New-style OpenAI client
-    from openai import OpenAI
-except ImportError:
-    OpenAI = None
-
-
-EMBEDDING_MODEL = "text-embedding-3-small"
+from crawler.embeddings import EMBED_CHUNK_PAGES, BatchEmbedder
+from crawler.embedding_cache import EmbeddingCache
+from crawler.embedding_providers import PROVIDERS, get_embedding_provider
+from crawler.batch_api import BatchManager, resumable_batches
 
 
 class Command(BaseCommand):
-    help = "Generate OpenAI embeddings for crawled pages (full-page and per-section)."
+    help = "Generate embeddings for crawled pages (full-page, per-section and learning objectives)."
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -64,27 +77,82 @@ class Command(BaseCommand):
             action="store_true",
             help="Recompute embeddings even if they already exist",
         )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=EMBED_CHUNK_PAGES,
+            help=f"Pages loaded, embedded and saved per round (default: {EMBED_CHUNK_PAGES})",
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Embed every text even if a cached vector exists (results are not cached either)",
+        )
+        parser.add_argument(
+            "--batch",
+            action="store_true",
+            help="Submit through the OpenAI Batch API instead of interactive requests",
+        )
+        parser.add_argument(
+            "--batch-resume",
+            action="store_true",
+            help="Resume unfinished embedding batches (submit, poll and apply)",
+        )
+        parser.add_argument(
+            "--no-wait",
+            action="store_true",
+            help="With --batch/--batch-resume, do not wait for batches to finish",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=int,
+            default=60,
+            help="Seconds between batch status checks (default: 60)",
+        )
+        parser.add_argument(
+            "--provider",
+            choices=PROVIDERS,
+            default=settings.EMBEDDING_PROVIDER,
+            help=f"Embedding provider (default: {settings.EMBEDDING_PROVIDER}); local providers need no API key",
+        )
+        parser.add_argument(
+            "--base-url",
+            type=str,
+            default=settings.OPENAI_BASE_URL,
+            help="OpenAI-compatible API base URL (e.g. a local mock server)",
+        )
 
     def handle(self, *args, **options):
-        if OpenAI is None:
-            raise CommandError(
-                "The 'openai' package is not installed. "
-                "Add `openai` to requirements.txt and `pip install -r requirements.txt`."
-            )
-
-        api_key = config("OPENAI_API_KEY", default=None)
-        if not api_key:
-            raise CommandError(
-                "OPENAI_API_KEY is not set. Please add it to your .env file."
+        use_batch_api = options["batch"] or options["batch_resume"]
+        if use_batch_api and options["provider"] != "openai":
+            raise CommandError("--batch and --batch-resume need the openai provider.")
+
+        try:
+            provider = get_embedding_provider(
+                options["provider"],
+                api_key=config("OPENAI_API_KEY", default=None),
+                base_url=options["base_url"],
             )
-
-        client = OpenAI(api_key=api_key)
+        except ValueError as e:
+            raise CommandError(str(e))
+        client = getattr(provider, "client", None)
 
         page_id = options.get("page_id")
         job_id = options.get("job_id")
         client_id = options.get("client_id")
         limit = options.get("limit")
         force = options.get("force")
+        cache = EmbeddingCache(enabled=False, model=provider.model) if options["no_cache"] \
+            else EmbeddingCache(model=provider.model)
+
+        if options["batch_resume"]:
+            batches = resumable_batches("embeddings", job_id=job_id, client_id=client_id)
+            if not batches:
+                self.stdout.write("No unfinished embedding batches.")
+                return
+            self.stdout.write(f"Resuming {len(batches)} embedding batch(es)...")
+            self._run_batches(client, batches, options, cache)
+            return
 
         queryset = CrawledPage.objects.all()
         if page_id:
@@ -98,10 +166,12 @@ class Command(BaseCommand):
         queryset = queryset.exclude(main_content__isnull=True).exclude(main_content="")
 
         if not force:
-            # Skip pages that already have embeddings
+            # Skip pages that already have embeddings, except pages whose AI learning
+            # objectives have none yet (analyzed through the Batch API, or re-analyzed)
             from django.db.models import Q
             queryset = queryset.filter(
                 Q(page_embedding__isnull=True) | Q(page_embedding=[])
+                | (~Q(ai_learning_objectives=[]) & Q(learning_objective_embeddings=[]))
             )
 
         if limit:
@@ -112,131 +182,47 @@ class Command(BaseCommand):
             self.stdout.write("No pages to embed (check filters or use --force).")
             return
 
-        self.stdout.write(f"Generating embeddings for {total} page(s)...")
-
-        for page in queryset.iterator():
-            try:
-                self._embed_page(client, page)
-            except Exception as exc:
-                self.stderr.write(
-                    f"[page {page.id}] Error generating embeddings: {exc}"
-                )
-
-        self.stdout.write(self.style.SUCCESS("Embedding generation completed."))
-
-    # ------------------------------------------------------------
-    # Internal helpers
-    # ------------------------------------------------------------
-
-    def _embed_page(self, client, page: CrawledPage):
-        # Prepare texts: full page + each section
-        inputs = []
-        index_map = []
-
-        full_text = (page.main_content or "").strip()
-        if full_text:
-            inputs.append(full_text)
-            index_map.append(("page", None))
-
-        sections = page.sections or []
-        for idx, section in enumerate(sections):
-            content = (section.get("content") or "").strip()
-            if not content:
-                continue
-            heading = (section.get("heading") or "").strip()
-            # Combine heading and content for richer section-level embeddings
-            text = f"{heading}\n\n{content}" if heading else content
-            inputs.append(text)
-            index_map.append(("section", idx))
-
-        if not inputs:
-            # Nothing to embed
+        if options["batch"]:
+            self.stdout.write(f"Preparing embedding batch requests for {total} page(s)...")
+            manager = BatchManager(client, "embeddings", log=self.stdout.write, cache=cache)
+            batches = manager.prepare(queryset, job_id=job_id, client_id=client_id)
+            self._write_cache_summary(cache)
+            self._run_batches(client, batches, options, cache)
             return
 
-        self.stdout.write(
-            f"[page {page.id}] Requesting {len(inputs)} embeddings from {EMBEDDING_MODEL}..."
-        )
+        self.stdout.write(f"Generating embeddings for {total} page(s) with {provider.model}...")
 
-        response = client.embeddings.create(model=EMBEDDING_MODEL, input=inputs)
-        vectors = [d.embedding for d in response.data]
-
-        page_embedding = []
-        section_embeddings = []
-
-        for (kind, idx), vec in zip(index_map, vectors):
-            if kind == "page":
-                page_embedding = vec
-            elif kind == "section":
-                section = (page.sections or [])[idx]
-                section_entry = {
-                    "index": idx,
-                    "heading": section.get("heading"),
-                    "level": section.get("level"),
-                    "word_count": section.get("word_count"),
-                    "has_code": section.get("has_code"),
-                    "has_list": section.get("has_list"),
-                    "content": section.get("content"),
-                    "embedding_model": EMBEDDING_MODEL,
-                    "embedding": vec,
-                }
-                section_embeddings.append(section_entry)
-
-        # Generate learning objective embeddings if page has AI-extracted LOs
-        learning_objective_embeddings = []
-        if page.ai_learning_objectives:
-            lo_inputs = []
-            for lo in page.ai_learning_objectives:
-                objective = lo.get("objective", "")
-                bloom_level = lo.get("bloom_level", "")
-                bloom_verb = lo.get("bloom_verb", "")
-                difficulty = lo.get("difficulty", "")
-                
-                # Create rich text for embedding
-                parts = [f"Context: {page.title}"]
-                parts.append(f"Objective: {objective}")
-                if bloom_verb:
-                    parts.append(f"Action: {bloom_verb}")
-                if bloom_level:
-                    parts.append(f"Level: {bloom_level}")
-                if difficulty:
-                    parts.append(f"Difficulty: {difficulty}")
-                
-                lo_inputs.append(" | ".join(parts))
-            
-            if lo_inputs:
-                self.stdout.write(
-                    f"[page {page.id}] Generating {len(lo_inputs)} learning objective embeddings..."
-                )
-                lo_response = client.embeddings.create(model=EMBEDDING_MODEL, input=lo_inputs)
-                lo_vectors = [d.embedding for d in lo_response.data]
-                
-                for lo, vec in zip(page.ai_learning_objectives, lo_vectors):
-                    learning_objective_embeddings.append({
-                        "objective": lo.get("objective", ""),
-                        "bloom_level": lo.get("bloom_level", ""),
-                        "bloom_verb": lo.get("bloom_verb", ""),
-                        "difficulty": lo.get("difficulty", ""),
-                        "estimated_time_minutes": lo.get("estimated_time_minutes"),
-                        "measurable": lo.get("measurable"),
-                        "embedding_model": EMBEDDING_MODEL,
-                        "embedding": vec,
-                    })
-        
-        # Persist to page
-        page.page_embedding = page_embedding
-        page.section_embeddings = section_embeddings
-        page.learning_objective_embeddings = learning_objective_embeddings
-        page.save(update_fields=[
-            "page_embedding", 
-            "section_embeddings", 
-            "learning_objective_embeddings"
-        ])
+        embedder = BatchEmbedder(provider, log=self.stdout.write, cache=cache)
+        stats = embedder.embed_queryset(queryset, chunk_size=max(options["chunk_size"], 1))
 
         self.stdout.write(
             self.style.SUCCESS(
-                f"[page {page.id}] ✓ Saved {len(section_embeddings)} section + "
-                f"{len(learning_objective_embeddings)} LO embeddings (+ full-page)"
+                f"Embedding generation completed: {stats['pages']} page(s), {stats['inputs']} texts, "
+                f"~{stats['tokens']} tokens in {stats['requests']} request(s)"
             )
         )
+        self._write_cache_summary(cache)
+        if stats["truncated"]:
+            self.stdout.write(f"Truncated to the model's input limit: {stats['truncated']} text(s)")
+        if stats["failed_pages"]:
+            self.stderr.write(
+                f"{stats['failed_pages']} page(s) failed; re-run the command to retry them"
+            )
 
+    # ------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------
+
+    def _write_cache_summary(self, cache):
+        lookups = cache.hits + cache.misses
+        if cache.enabled and lookups:
+            self.stdout.write(
+                f"Embedding cache: {cache.hits}/{lookups} texts cached ({cache.hit_rate:.0%}), "
+                f"~{cache.tokens_saved} tokens / ${cache.cost_saved:.4f} saved"
+            )
 
+    def _run_batches(self, client, batches, options, cache):
+        manager = BatchManager(client, "embeddings", log=self.stdout.write, cache=cache)
+        running = manager.run(batches, wait=not options["no_wait"], poll_interval=options["poll_interval"])
+        if not running:
+            self.stdout.write(self.style.SUCCESS("Batch processing finished."))
@@ -0,0 +1,347 @@
+"""
+Management command to run a local mock of the OpenAI API.
+
+Serves canned chat completion and embedding responses with realistic
+rate-limit headers, simulated latency, an enforced requests-per-minute
+limit (429 with retry-after) and optional random failures. Use it to
+exercise the concurrent analysis engine without spending API credits.
+
+The file and batch endpoints (/files, /files/<id>/content, /batches) are
+kept in memory; a submitted batch moves through validating and in_progress
+and completes after --batch-delay seconds, with --error-rate of its
+requests reported in the error file.
+
+Usage:
+    python manage.py mock_openai_server --port 8089 --rpm 300 --latency 1.5
+    python manage.py analyze_content --job-id 57 --base-url http://127.0.0.1:8089/v1
+    python manage.py generate_embeddings --job-id 57 --batch --poll-interval 2 --base-url http://127.0.0.1:8089/v1
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+MOCK_ANALYSIS = {
+    "summary": "Mock summary of the page for local testing.",
+    "doc_type": "guide",
+    "audience_level": "intermediate",
+    "topics": [
+        {"name": "Mock Topic", "relevance": 0.9, "category": "configuration",
+         "parent_topic": None, "child_topics": [], "related_topics": []},
+    ],
+    "learning_objectives": [
+        {"objective": "Configure the mock feature", "bloom_level": "apply",
+         "bloom_verb": "configure", "difficulty": "intermediate",
+         "estimated_time_minutes": 10, "measurable": True},
+    ],
+    "prerequisite_chain": [
+        {"concept": "Mock basics", "type": "knowledge", "importance": "recommended",
+         "description": "Familiarity with mock services"},
+    ],
+    "key_concepts": [{"term": "Mock", "definition": "A stand-in service", "is_new": True}],
+    "related_topics": ["testing"],
+    "quality_indicators": {
+        "completeness_score": 0.8, "completeness_notes": "", "needs_code_examples": False,
+        "needs_visuals": False, "needs_troubleshooting": False, "outdated_signals": False,
+        "suggested_improvements": [],
+    },
+}
+
+
+class Command(BaseCommand):
+    help = 'Run a local OpenAI-compatible mock server for analysis and embedding testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', type=str, default='127.0.0.1', help='Bind address')
+        parser.add_argument('--port', type=int, default=8089, help='Port (default: 8089)')
+        parser.add_argument('--rpm', type=int, default=500, help='Requests per minute before returning 429')
+        parser.add_argument('--tpm', type=int, default=200000, help='Token limit reported in headers')
+        parser.add_argument('--latency', type=float, default=1.0, help='Mean response latency in seconds')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests failing with a 500')
+        parser.add_argument('--dimensions', type=int, default=1536, help='Embedding dimensions')
+        parser.add_argument('--batch-delay', type=float, default=5.0, help='Seconds until a submitted batch completes')
+
+    def handle(self, *args, **options):
+        state = {
+            'options': options,
+            'window': deque(),
+            'lock': threading.Lock(),
+            'counts': {'ok': 0, 'rate_limited': 0, 'errors': 0},
+            'files': {},
+            'batches': {},
+        }
+
+        handler = type('MockOpenAIHandler', (MockOpenAIHandler,), {'state': state})
+        server = ThreadingHTTPServer((options['host'], options['port']), handler)
+        self.stdout.write(self.style.SUCCESS(
+            f"Mock OpenAI server on http://{options['host']}:{options['port']}/v1 "
+            f"(rpm={options['rpm']}, latency={options['latency']}s, error_rate={options['error_rate']})"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            counts = state['counts']
+            self.stdout.write(
+                f"\nServed {counts['ok']} ok, {counts['rate_limited']} rate limited, {counts['errors']} errors"
+            )
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split('?')[0].rstrip('/')
+        parts = path.split('/')
+        if path.endswith('/content') and '/files/' in path:
+            stored = self.state['files'].get(parts[-2])
+            if stored is None:
+                return self._send(404, {'error': {'message': 'No such file'}})
+            return self._send_bytes(200, stored['data'], 'application/octet-stream')
+        if '/batches/' in path:
+            batch = self.state['batches'].get(parts[-1])
+            if batch is None:
+                return self._send(404, {'error': {'message': 'No such batch'}})
+            return self._send(200, batch)
+        if path.endswith('/batches'):
+            batches = sorted(self.state['batches'].values(), key=lambda b: b['created_at'], reverse=True)
+            return self._send(200, {'object': 'list', 'data': batches, 'has_more': False})
+        self._send(404, {'error': {'message': f'Unknown endpoint {self.path}'}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length)
+        path = self.path.split('?')[0].rstrip('/')
+
+        if path.endswith('/files'):
+            return self._upload_file(raw)
+
+        try:
+            body = json.loads(raw or b'{}')
+        except ValueError:
+            return self._send(400, {'error': {'message': 'Invalid JSON body'}})
+
+        if path.endswith('/batches'):
+            return self._create_batch(body)
+
+        options = self.state['options']
+        remaining = self._take_request_slot()
+        if remaining is None:
+            self.state['counts']['rate_limited'] += 1
+            return self._send(429, {'error': {'message': 'Rate limit reached', 'type': 'requests'}},
+                              {'retry-after': '1'})
+
+        time.sleep(max(random.gauss(options['latency'], options['latency'] / 4), 0))
+
+        if random.random() < options['error_rate']:
+            self.state['counts']['errors'] += 1
+            return self._send(500, {'error': {'message': 'Mock server error'}})
+
+        payload = self._respond(path, body)
+        if payload is None:
+            return self._send(404, {'error': {'message': f'Unknown endpoint {self.path}'}})
+
+        self.state['counts']['ok'] += 1
+        self._send(200, payload, {
+            'x-ratelimit-limit-requests': str(options['rpm']),
+            'x-ratelimit-remaining-requests': str(remaining),
+            'x-ratelimit-reset-requests': '60s',
+            'x-ratelimit-limit-tokens': str(options['tpm']),
+            'x-ratelimit-remaining-tokens': str(options['tpm']),
+            'x-ratelimit-reset-tokens': '0s',
+        })
+
+    def _respond(self, path, body):
+        if path.endswith('/chat/completions'):
+            return mock_chat_completion(body)
+        if path.endswith('/embeddings'):
+            return mock_embeddings(body, self.state['options']['dimensions'])
+        return None
+
+    def _take_request_slot(self):
+        """Sliding one-minute window; returns remaining requests, or None when over the limit."""
+        now = time.monotonic()
+        with self.state['lock']:
+            window = self.state['window']
+            while window and now - window[0] > 60:
+                window.popleft()
+            if len(window) >= self.state['options']['rpm']:
+                return None
+            window.append(now)
+            return self.state['options']['rpm'] - len(window)
+
+    # ------------------------------------------------------------
+    # Files and batches
+    # ------------------------------------------------------------
+
+    def _upload_file(self, raw):
+        message = BytesParser(policy=default_policy).parsebytes(
+            b'Content-Type: ' + self.headers.get('Content-Type', '').encode() + b'\r\n\r\n' + raw
+        )
+        fields = {}
+        filename = 'upload.jsonl'
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            fields[name] = part.get_payload(decode=True)
+            if name == 'file':
+                filename = part.get_filename() or filename
+        if 'file' not in fields:
+            return self._send(400, {'error': {'message': 'Missing file'}})
+
+        file_obj = self._store_file(fields['file'], filename, (fields.get('purpose') or b'batch').decode())
+        self._send(200, file_obj)
+
+    def _store_file(self, data, filename, purpose):
+        file_id = f'file-mock-{uuid.uuid4().hex[:12]}'
+        file_obj = {
+            'id': file_id,
+            'object': 'file',
+            'bytes': len(data),
+            'created_at': int(time.time()),
+            'filename': filename,
+            'purpose': purpose,
+            'status': 'processed',
+        }
+        self.state['files'][file_id] = {**file_obj, 'data': data}
+        return file_obj
+
+    def _create_batch(self, body):
+        input_file = self.state['files'].get(body.get('input_file_id'))
+        if input_file is None:
+            return self._send(400, {'error': {'message': 'Unknown input_file_id'}})
+
+        lines = [line for line in input_file['data'].splitlines() if line.strip()]
+        batch = {
+            'id': f'batch_mock_{uuid.uuid4().hex[:12]}',
+            'object': 'batch',
+            'endpoint': body.get('endpoint'),
+            'input_file_id': input_file['id'],
+            'completion_window': body.get('completion_window', '24h'),
+            'status': 'validating',
+            'output_file_id': None,
+            'error_file_id': None,
+            'created_at': int(time.time()),
+            'metadata': body.get('metadata') or {},
+            'errors': None,
+            'request_counts': {'total': len(lines), 'completed': 0, 'failed': 0},
+        }
+        self.state['batches'][batch['id']] = batch
+        threading.Thread(target=self._process_batch, args=(batch, lines), daemon=True).start()
+        self._send(200, batch)
+
+    def _process_batch(self, batch, lines):
+        delay = self.state['options']['batch_delay']
+        time.sleep(delay / 2)
+        batch['status'] = 'in_progress'
+
+        output = []
+        errors = []
+        for line in lines:
+            request = json.loads(line)
+            custom_id = request.get('custom_id')
+            if random.random() < self.state['options']['error_rate']:
+                errors.append({
+                    'id': f'batch_req_{uuid.uuid4().hex[:12]}',
+                    'custom_id': custom_id,
+                    'response': {'status_code': 500, 'body': {'error': {'message': 'Mock server error'}}},
+                    'error': None,
+                })
+                batch['request_counts']['failed'] += 1
+                continue
+            body = self._respond(request.get('url', '').rstrip('/'), request.get('body') or {})
+            output.append({
+                'id': f'batch_req_{uuid.uuid4().hex[:12]}',
+                'custom_id': custom_id,
+                'response': {'status_code': 200, 'request_id': uuid.uuid4().hex, 'body': body},
+                'error': None,
+            })
+            batch['request_counts']['completed'] += 1
+
+        time.sleep(delay / 2)
+        if output:
+            batch['output_file_id'] = self._store_file(
+                ''.join(json.dumps(record) + '\n' for record in output).encode(), 'output.jsonl', 'batch_output',
+            )['id']
+        if errors:
+            batch['error_file_id'] = self._store_file(
+                ''.join(json.dumps(record) + '\n' for record in errors).encode(), 'errors.jsonl', 'batch_output',
+            )['id']
+        batch['status'] = 'completed'
+        batch['completed_at'] = int(time.time())
+
+    def _send_bytes(self, status, data, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def mock_chat_completion(body):
+    prompt_chars = sum(len(m.get('content') or '') for m in body.get('messages', []))
+    content = json.dumps(MOCK_ANALYSIS)
+    prompt_tokens = prompt_chars // 4
+    completion_tokens = len(content) // 4
+    return {
+        'id': f'chatcmpl-mock-{random.getrandbits(32):08x}',
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': body.get('model', 'gpt-4o-mini'),
+        'choices': [{
+            'index': 0,
+            'message': {'role': 'assistant', 'content': content},
+            'finish_reason': 'stop',
+        }],
+        'usage': {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def mock_embeddings(body, dimensions):
+    inputs = body.get('input') or []
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    data = []
+    for index, text in enumerate(inputs):
+        # Deterministic per input so repeated runs produce the same vectors
+        rng = random.Random(hashlib.md5(str(text).encode()).hexdigest())
+        data.append({
+            'object': 'embedding',
+            'index': index,
+            'embedding': [rng.uniform(-1, 1) for _ in range(dimensions)],
+        })
+    tokens = sum(len(str(text)) for text in inputs) // 4
+    return {
+        'object': 'list',
+        'data': data,
+        'model': body.get('model', 'text-embedding-3-small'),
+        'usage': {'prompt_tokens': tokens, 'total_tokens': tokens},
+    }
@@ -144,6 +144,7 @@ class Command(BaseCommand):
                         "has_diagrams",
                         "has_troubleshooting",
                         "content_type_diversity",
+                        "updated_at",
                     ]
                 )
                 updated += 1
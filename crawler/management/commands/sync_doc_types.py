@@ -85,7 +85,7 @@ class Command(BaseCommand):
             if mapped_type != page.doc_type:
                 if not dry_run:
                     page.doc_type = mapped_type
-                    page.save(update_fields=['doc_type'])
+                    page.save(update_fields=['doc_type', 'updated_at'])
                     update_count += 1
                     self.stdout.write(
                         f"  Page {page.id}: '{page.doc_type}' -> '{mapped_type}'"
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crawler', '0012_add_learning_objective_embeddings'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='crawledpage',
+            index=models.Index(fields=['job', 'updated_at'], name='crawler_cra_job_id_01c841_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crawledpage',
+            index=models.Index(fields=['client', 'updated_at'], name='crawler_cra_client__599fac_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_rename_unigue_to_unique_content_pages'),
+        ('crawler', '0013_crawledpage_updated_at_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OpenAIBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('analysis', 'Content Analysis'), ('embeddings', 'Embeddings')], max_length=20)),
+                ('status', models.CharField(choices=[('prepared', 'Prepared'), ('submitted', 'Submitted'), ('completed', 'Completed'), ('applied', 'Applied'), ('failed', 'Failed')], default='prepared', max_length=20)),
+                ('input_path', models.CharField(max_length=500)),
+                ('request_count', models.IntegerField(default=0)),
+                ('request_metadata', models.JSONField(blank=True, default=dict)),
+                ('input_file_id', models.CharField(blank=True, max_length=100)),
+                ('batch_id', models.CharField(blank=True, db_index=True, max_length=100)),
+                ('remote_status', models.CharField(blank=True, max_length=30)),
+                ('output_file_id', models.CharField(blank=True, max_length=100)),
+                ('error_file_id', models.CharField(blank=True, max_length=100)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('failed_count', models.IntegerField(default=0)),
+                ('applied_count', models.IntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('applied_at', models.DateTimeField(blank=True, null=True)),
+                ('client', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='openai_batches', to='core.client')),
+                ('job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='openai_batches', to='core.crawljob')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['kind', 'status'], name='crawler_ope_kind_5a1d74_idx')],
+            },
+        ),
+    ]
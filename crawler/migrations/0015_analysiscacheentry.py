@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 15:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crawler', '0014_openaibatch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('model', models.CharField(max_length=50)),
+                ('prompt_version', models.CharField(max_length=20)),
+                ('llm_result', models.JSONField()),
+                ('stats', models.JSONField(blank=True, default=dict)),
+                ('hit_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'Analysis cache entries',
+                'indexes': [models.Index(fields=['last_used_at'], name='crawler_ana_last_us_616c48_idx')],
+                'unique_together': {('content_hash', 'model', 'prompt_version')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-19 16:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crawler', '0015_analysiscacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmbeddingCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text_hash', models.CharField(max_length=64)),
+                ('model', models.CharField(max_length=100)),
+                ('embedding', models.JSONField()),
+                ('hit_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'Embedding cache entries',
+                'indexes': [models.Index(fields=['last_used_at'], name='crawler_emb_last_us_f8b0bc_idx')],
+                'unique_together': {('text_hash', 'model')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_rename_unigue_to_unique_content_pages'),
+        ('crawler', '0016_embeddingcacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageConcept',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=255)),
+                ('display_term', models.CharField(max_length=255)),
+                ('is_new', models.BooleanField(null=True)),
+                ('importance', models.CharField(blank=True, default='', max_length=20)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='page_concepts', to='core.client')),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='concepts', to='crawler.crawledpage')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['client', 'term'], name='crawler_pag_client__ac4a9a_idx'), models.Index(fields=['client', 'is_new'], name='crawler_pag_client__51a93c_idx')],
+                'unique_together': {('page', 'term')},
+            },
+        ),
+    ]
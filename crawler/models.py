@@ -3,6 +3,7 @@ Crawler models for storing crawled page data.
 """
 
 from django.db import models
+from django.utils import timezone
 from core.models import CrawlJob
 import hashlib
 
@@ -294,6 +295,9 @@ class CrawledPage(models.Model):
             models.Index(fields=['job', 'is_orphan_page']),
             models.Index(fields=['job', 'has_deprecation_warning']),
             models.Index(fields=['job', 'sections_count']),
+            # Incremental export syncs (If-Modified-Since on updated_at)
+            models.Index(fields=['job', 'updated_at']),
+            models.Index(fields=['client', 'updated_at']),
         ]
     
     def calculate_content_hash(self):
@@ -355,3 +359,141 @@ class CrawlError(models.Model):
 
     def __str__(self):
         return f"{self.error_type}: {self.url}"
+
+
+class OpenAIBatch(models.Model):
+    """
+    State of one OpenAI Batch API job (bulk content analysis or embeddings).
+
+    Persisted at every step (prepared, uploaded, submitted, completed,
+    applied) so an interrupted run can be resumed without re-uploading or
+    re-submitting work.
+    """
+    KIND_CHOICES = [
+        ('analysis', 'Content Analysis'),
+        ('embeddings', 'Embeddings'),
+    ]
+    STATUS_CHOICES = [
+        ('prepared', 'Prepared'),
+        ('submitted', 'Submitted'),
+        ('completed', 'Completed'),
+        ('applied', 'Applied'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='prepared')
+    client = models.ForeignKey('core.Client', on_delete=models.SET_NULL, null=True, blank=True, related_name='openai_batches')
+    job = models.ForeignKey(CrawlJob, on_delete=models.SET_NULL, null=True, blank=True, related_name='openai_batches')
+
+    # Local request file and per-request context needed to apply results (keyed by custom_id)
+    input_path = models.CharField(max_length=500)
+    request_count = models.IntegerField(default=0)
+    request_metadata = models.JSONField(default=dict, blank=True)
+
+    # Remote identifiers and progress
+    input_file_id = models.CharField(max_length=100, blank=True)
+    batch_id = models.CharField(max_length=100, blank=True, db_index=True)
+    remote_status = models.CharField(max_length=30, blank=True)
+    output_file_id = models.CharField(max_length=100, blank=True)
+    error_file_id = models.CharField(max_length=100, blank=True)
+    completed_count = models.IntegerField(default=0)
+    failed_count = models.IntegerField(default=0)
+    applied_count = models.IntegerField(default=0)
+    error_message = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    applied_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['kind', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} batch #{self.id} ({self.status}, {self.request_count} requests)"
+
+
+class AnalysisCacheEntry(models.Model):
+    """
+    Cached LLM analysis result, addressed by the prompt sent to the model.
+
+    Shared across clients and jobs: pages whose prompt inputs are
+    identical (unchanged re-crawls, duplicate URLs, shared docs) reuse the
+    same response instead of paying for another call. See
+    crawler.analysis_cache.
+    """
+    content_hash = models.CharField(max_length=64)  # SHA-256 of the prompt inputs (analysis_cache.prompt_key)
+    model = models.CharField(max_length=50)
+    prompt_version = models.CharField(max_length=20)
+
+    # Parsed model response and the preprocessing figures recorded with it
+    llm_result = models.JSONField()
+    stats = models.JSONField(default=dict, blank=True)
+
+    hit_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ['content_hash', 'model', 'prompt_version']
+        indexes = [
+            models.Index(fields=['last_used_at']),
+        ]
+        verbose_name_plural = 'Analysis cache entries'
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({self.model}, prompt v{self.prompt_version})"
+
+
+class EmbeddingCacheEntry(models.Model):
+    """
+    Cached embedding vector for a normalised text, shared across pages,
+    jobs and clients. See crawler.embedding_cache.
+    """
+    text_hash = models.CharField(max_length=64)  # SHA-256 of the normalised text
+    model = models.CharField(max_length=100)
+    embedding = models.JSONField()
+
+    hit_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ['text_hash', 'model']
+        indexes = [
+            models.Index(fields=['last_used_at']),
+        ]
+        verbose_name_plural = 'Embedding cache entries'
+
+    def __str__(self):
+        return f"{self.text_hash[:12]} ({self.model})"
+
+
+class PageConcept(models.Model):
+    """
+    One key concept of an analyzed page (from ai_key_concepts), indexed by
+    normalised term. A page's rows are replaced whenever its analysis is
+    saved. See crawler.concept_index.
+    """
+    page = models.ForeignKey(CrawledPage, on_delete=models.CASCADE, related_name='concepts')
+    client = models.ForeignKey('core.Client', on_delete=models.CASCADE, related_name='page_concepts')
+    term = models.CharField(max_length=255)  # Lowercased, whitespace collapsed
+    display_term = models.CharField(max_length=255)  # As written in the analysis
+    # Introduced on this page (True), assumed known (False) or not stated (None)
+    is_new = models.BooleanField(null=True)
+    importance = models.CharField(max_length=20, blank=True, default='')
+
+    class Meta:
+        unique_together = ['page', 'term']
+        indexes = [
+            models.Index(fields=['client', 'term']),
+            models.Index(fields=['client', 'is_new']),
+        ]
+
+    def __str__(self):
+        return f"{self.term} (page {self.page_id})"
@@ -6,6 +6,7 @@ import os
 import sys
 import django
 import logging
+import threading
 from twisted.internet import threads
 
 # Setup Django
@@ -17,9 +18,16 @@ from crawler.models import CrawledPage, CrawlError
 from core.models import CrawlJob
 from crawler.language_detector import is_english
 from crawler.tasks import capture_page_screenshot_task
+from dashboard.caching import bump_data_version
+from crawler.job_logs import attach_job_log_handler, detach_job_log_handler
+from crawler.progress import ProgressPublisher
 
 logger = logging.getLogger('crawler')
 
+# Pages per embeddings task when a job has generate_embeddings enabled; the
+# task packs all of their texts into a few requests
+EMBEDDING_BATCH_PAGES = 100
+
 
 class DjangoStoragePipeline:
     """
@@ -31,6 +39,10 @@ class DjangoStoragePipeline:
         self.seen_content_hashes = set()
         self.seen_urls = set()
         self.job = None
+        self.job_log_handler = None
+        self.progress = None
+        self.embedding_page_ids = []
+        self.embedding_lock = threading.Lock()
 
     def _open_spider_sync(self, spider):
         """Synchronous helper for open_spider."""
@@ -55,12 +67,24 @@ class DjangoStoragePipeline:
                 logger.info(f"Loaded {len(self.seen_content_hashes)} existing content hashes")
                 logger.info(f"Loaded {len(self.seen_urls)} existing URLs")
 
+                # Live progress counters, seeded from what the job already has
+                self.progress = ProgressPublisher(
+                    self.job.id,
+                    pages=self.job.pages_crawled,
+                    unique=self.job.unique_content_pages,
+                    errors=CrawlError.objects.filter(job=self.job).count(),
+                )
+                self.progress.maybe_publish(force=True)
+
             except CrawlJob.DoesNotExist:
                 logger.error(f"Job {spider.job_id} not found")
                 self.job = None
 
     def open_spider(self, spider):
         """Initialize pipeline when spider opens."""
+        # Capture spider, Scrapy and pipeline logs into the job's own log file
+        if getattr(spider, 'job_id', None):
+            self.job_log_handler = attach_job_log_handler(spider.job_id)
         return threads.deferToThread(self._open_spider_sync, spider)
 
     def _close_spider_sync(self, spider):
@@ -70,10 +94,22 @@ class DjangoStoragePipeline:
             if self.job.status == 'running':
                 self.job.mark_completed()
                 logger.info(f"Job {self.job.id} completed successfully with {self.job.pages_crawled} pages")
+            bump_data_version(self.job.client_id)
+            if self.progress:
+                self.progress.finish(job_status=self.job.status)
+            self._flush_embeddings()
 
     def close_spider(self, spider):
         """Finalize pipeline when spider closes."""
-        return threads.deferToThread(self._close_spider_sync, spider)
+        deferred = threads.deferToThread(self._close_spider_sync, spider)
+        deferred.addBoth(self._detach_job_log)
+        return deferred
+
+    def _detach_job_log(self, result):
+        if self.job_log_handler:
+            detach_job_log_handler(self.job_log_handler)
+            self.job_log_handler = None
+        return result
 
     def _process_item_sync(self, item, spider):
         """Synchronous helper for process_item."""
@@ -176,6 +212,11 @@ class DjangoStoragePipeline:
                 self.job.save(update_fields=['pages_crawled'])
                 logger.info(f"Updated existing page: {page.url} (ID: {page.id})")
 
+            if self.progress:
+                # Mirrors the job counters: only new, non-duplicate pages count as unique
+                self.progress.record_page(duplicate=not (created and not is_duplicate))
+                self.progress.maybe_publish()
+
             # Schedule asynchronous screenshot capture via Celery if enabled
             try:
                 if self.job.config.get('screenshots') and not page.screenshot_path:
@@ -184,25 +225,48 @@ class DjangoStoragePipeline:
             except Exception as e:
                 logger.error(f"Error enqueueing screenshot task for page {page.id}: {e}", exc_info=True)
 
-            # Schedule embeddings generation if configured
-            try:
-                if self.job.config.get('generate_embeddings'):
-                    from crawler.tasks import generate_page_embeddings_task
-
-                    generate_page_embeddings_task.delay(page.id)
-                    logger.info(f"Enqueued embeddings task for page {page.id} ({page.url})")
-            except Exception as e:
-                logger.error(f"Error enqueueing embeddings task for page {page.id}: {e}", exc_info=True)
+            # Schedule embeddings generation if configured (batched across pages)
+            if self.job.config.get('generate_embeddings'):
+                with self.embedding_lock:
+                    self.embedding_page_ids.append(page.id)
+                    full = len(self.embedding_page_ids) >= EMBEDDING_BATCH_PAGES
+                if full:
+                    self._flush_embeddings()
 
         except Exception as e:
             logger.error(f"Error saving page {item['url']}: {str(e)}", exc_info=True)
 
         return item
 
+    def _flush_embeddings(self):
+        """Enqueue one embeddings task for the pages collected so far."""
+        with self.embedding_lock:
+            page_ids, self.embedding_page_ids = self.embedding_page_ids, []
+        if not page_ids:
+            return
+        try:
+            from crawler.tasks import generate_embeddings_batch_task
+
+            generate_embeddings_batch_task.delay(page_ids)
+            logger.info(f"Enqueued embeddings task for {len(page_ids)} pages")
+        except Exception as e:
+            logger.error(f"Error enqueueing embeddings task for {len(page_ids)} pages: {e}", exc_info=True)
+
     def process_item(self, item, spider):
         """Process each crawled item."""
+        if self.progress:
+            # Read scheduler stats here, on the reactor thread
+            self.progress.set_queue_depth(self._queue_depth(spider))
         return threads.deferToThread(self._process_item_sync, item, spider)
 
+    @staticmethod
+    def _queue_depth(spider):
+        """Requests waiting in the scheduler, from Scrapy's stats counters."""
+        stats = getattr(getattr(spider, 'crawler', None), 'stats', None)
+        if stats is None:
+            return 0
+        return stats.get_value('scheduler/enqueued', 0) - stats.get_value('scheduler/dequeued', 0)
+
     def _save_error_sync(self, item, spider):
         """Save crawl errors to the database."""
         try:
@@ -213,6 +277,9 @@ class DjangoStoragePipeline:
                 error_message=item['error_message'],
             )
             logger.info(f"Saved error: {error.url}")
+            if self.progress:
+                self.progress.record_error()
+                self.progress.maybe_publish()
 
         except Exception as e:
             logger.error(f"Error saving error record: {str(e)}")
@@ -0,0 +1,224 @@
+"""
+Push-based crawl progress.
+
+The Scrapy pipeline keeps in-memory counters for the running job and
+publishes a snapshot at most once per ``CRAWLER_PROGRESS_INTERVAL`` seconds.
+The dashboard subscribes and fans the snapshots out to viewers over
+server-sent events, so watching a crawl costs no database queries.
+
+Two transports are supported (``CRAWLER_PROGRESS_BACKEND``):
+
+* ``redis``: snapshots are published on a per-job pub/sub channel, and the
+  latest one is also stored under a key so new viewers get it immediately.
+* ``cache``: a local stand-in for development without Redis; the latest
+  snapshot is written to the Django cache and subscribers poll that key.
+  Across processes this needs a shared cache backend.
+"""
+
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger('crawler')
+
+# Snapshots outlive the crawl briefly so late viewers still see final numbers
+SNAPSHOT_TTL = 60 * 60
+
+FINISHED = 'finished'
+
+
+def progress_channel(job_id):
+    return f'crawler:progress:{job_id}'
+
+
+def snapshot_key(job_id):
+    return f'crawler:progress:{job_id}:latest'
+
+
+def _use_redis():
+    return settings.CRAWLER_PROGRESS_BACKEND == 'redis' and redis is not None
+
+
+_redis_client = None
+
+
+def _get_redis():
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(settings.REDIS_URL)
+    return _redis_client
+
+
+class ProgressPublisher:
+    """
+    In-memory progress counters for one crawl job, published with throttling.
+
+    Counters are updated from pipeline worker threads, so all access goes
+    through a lock. Publishing never raises: progress is best-effort and
+    must not interfere with saving pages.
+    """
+
+    def __init__(self, job_id, pages=0, unique=0, errors=0, interval=None):
+        self.job_id = job_id
+        self.interval = settings.CRAWLER_PROGRESS_INTERVAL if interval is None else interval
+        self.pages = pages
+        self.unique = unique
+        self.errors = errors
+        self.queue_depth = 0
+        self.seq = 0
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._initial_pages = pages
+        self._last_published = 0.0
+
+    def record_page(self, duplicate=False):
+        with self._lock:
+            self.pages += 1
+            if not duplicate:
+                self.unique += 1
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def set_queue_depth(self, depth):
+        self.queue_depth = max(int(depth or 0), 0)
+
+    def snapshot(self, status='running'):
+        elapsed = time.monotonic() - self._started
+        pages_this_run = self.pages - self._initial_pages
+        return {
+            'job_id': self.job_id,
+            'seq': self.seq,
+            'status': status,
+            'page_count': self.pages,
+            'unique_count': self.unique,
+            'duplicate_count': self.pages - self.unique,
+            'error_count': self.errors,
+            'queue_depth': self.queue_depth,
+            'pages_per_sec': round(pages_this_run / elapsed, 2) if elapsed > 0 else 0.0,
+            'ts': time.time(),
+        }
+
+    def maybe_publish(self, force=False, status='running', job_status=None):
+        """Publish a snapshot if the interval has passed (or ``force``); returns True if sent."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_published < self.interval:
+                return False
+            self._last_published = now
+            self.seq += 1
+            data = self.snapshot(status)
+        if job_status:
+            data['job_status'] = job_status
+
+        try:
+            publish(self.job_id, data)
+        except Exception as e:
+            logger.warning(f"[Progress] Could not publish progress for job {self.job_id}: {e}")
+            return False
+        return True
+
+    def finish(self, job_status=None):
+        """Publish the final snapshot; subscribers stop after receiving it."""
+        return self.maybe_publish(force=True, status=FINISHED, job_status=job_status)
+
+
+def publish(job_id, data):
+    """Send one progress snapshot to subscribers of a job."""
+    message = json.dumps(data)
+    if _use_redis():
+        client = _get_redis()
+        pipe = client.pipeline(transaction=False)
+        pipe.set(snapshot_key(job_id), message, ex=SNAPSHOT_TTL)
+        pipe.publish(progress_channel(job_id), message)
+        pipe.execute()
+    else:
+        cache.set(snapshot_key(job_id), message, SNAPSHOT_TTL)
+
+
+def clear(job_id):
+    """
+    Drop a job's stored snapshot before it is (re)started.
+
+    A restarted job keeps its id, so the previous run's 'finished' snapshot
+    would otherwise be the first thing new viewers get. Never raises.
+    """
+    try:
+        if _use_redis():
+            _get_redis().delete(snapshot_key(job_id))
+        else:
+            cache.delete(snapshot_key(job_id))
+    except Exception as e:
+        logger.warning(f"[Progress] Could not clear progress for job {job_id}: {e}")
+
+
+def latest(job_id):
+    """Return the most recent snapshot for a job, or None."""
+    if _use_redis():
+        message = _get_redis().get(snapshot_key(job_id))
+    else:
+        message = cache.get(snapshot_key(job_id))
+    return json.loads(message) if message else None
+
+
+def subscribe(job_id, poll_interval=1.0, idle_timeout=None):
+    """
+    Yield progress snapshots for a job as they are published.
+
+    The latest stored snapshot is yielded first. ``None`` is yielded on every
+    idle poll so callers can send keep-alives or check liveness. Iteration
+    stops after a snapshot with status 'finished', or after ``idle_timeout``
+    seconds without a new snapshot.
+    """
+    last_seq = None
+    last_activity = time.monotonic()
+
+    # Subscribe before reading the stored snapshot so nothing published in
+    # between is missed
+    pubsub = None
+    if _use_redis():
+        pubsub = _get_redis().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(progress_channel(job_id))
+
+    try:
+        current = latest(job_id)
+        if current:
+            last_seq = current.get('seq')
+            yield current
+            if current.get('status') == FINISHED:
+                return
+
+        while True:
+            snapshot = None
+            if pubsub is not None:
+                message = pubsub.get_message(timeout=poll_interval)
+                if message and message.get('type') == 'message':
+                    snapshot = json.loads(message['data'])
+            else:
+                time.sleep(poll_interval)
+                snapshot = latest(job_id)
+
+            if snapshot and snapshot.get('seq') != last_seq:
+                last_seq = snapshot.get('seq')
+                last_activity = time.monotonic()
+                yield snapshot
+                if snapshot.get('status') == FINISHED:
+                    return
+                continue
+
+            if idle_timeout and time.monotonic() - last_activity > idle_timeout:
+                return
+            yield None
+    finally:
+        if pubsub is not None:
+            pubsub.close()
@@ -10,6 +10,7 @@ import os
 from scrapy.utils.project import get_project_settings
 from scrapy.crawler import CrawlerProcess
 from crawler.models import CrawlJob
+from crawler import progress
 
 logger = logging.getLogger('crawler')
 
@@ -33,8 +34,13 @@ def start_crawl_task(self, job_id):
         # Get the job
         job = CrawlJob.objects.get(id=job_id)
 
-        # Update job status
+        # Update job status; the previous run's final progress snapshot no longer applies
         job.mark_started()
+        progress.clear(job_id)
+
+        # List the job in the client's cached page filters before it has pages
+        from dashboard.caching import bump_data_version
+        bump_data_version(job.client_id)
 
         # Get configuration
         target_url = job.target_url
@@ -120,6 +126,9 @@ def start_crawl_task(self, job_id):
         if job.status == 'running':
             job.mark_completed()
 
+        from dashboard.caching import bump_data_version
+        bump_data_version(job.client_id)
+
         logger.info(f"Crawl completed for job {job_id}")
 
         # Send webhook notification if configured
@@ -251,8 +260,13 @@ def cleanup_old_crawls(days=30):
     count = old_jobs.count()
     logger.info(f"Cleaning up {count} crawls older than {days} days")
 
+    client_ids = set(old_jobs.values_list('client_id', flat=True))
     old_jobs.delete()
 
+    from dashboard.caching import bump_data_version
+    for client_id in client_ids:
+        bump_data_version(client_id)
+
     return {'deleted': count}
 
 
@@ -323,7 +337,7 @@ def capture_page_screenshot_task(page_id):
         
         # Update database AFTER exiting Playwright context
         page.screenshot_path = relative_path
-        page.save(update_fields=['screenshot_path'])
+        page.save(update_fields=['screenshot_path', 'updated_at'])
         
         logger.info(f"Screenshot captured successfully: {relative_path}")
         
@@ -344,25 +358,42 @@ def capture_page_screenshot_task(page_id):
         return {'success': False, 'error': error_msg}
 
 
+def _embedding_provider():
+    """
+    Embedding provider for embedding tasks (EMBEDDING_PROVIDER).
+
+    Returns (provider, None), or (None, error message) if it cannot be set
+    up, e.g. no OpenAI API key.
+    """
+    from crawler.embedding_providers import get_embedding_provider
+
+    try:
+        return get_embedding_provider(), None
+    except ValueError as e:
+        return None, str(e)
+
+
 @shared_task(bind=True, time_limit=300, max_retries=3, default_retry_delay=60)
 def generate_page_embeddings_task(self, page_id, force=False):
     """
-    Generate OpenAI embeddings for a single crawled page.
+    Generate embeddings for a single crawled page.
 
-    Uses the OpenAI text-embedding-3-small model to compute:
+    Uses the configured EMBEDDING_PROVIDER (OpenAI text-embedding-3-small by
+    default) to compute, in one request:
     - A full-page embedding (stored in `page.page_embedding`)
     - One embedding per section (stored in `page.section_embeddings`)
+    - One embedding per AI learning objective (`page.learning_objective_embeddings`)
     
     Retries up to 3 times on transient failures (rate limits, network errors).
+    For many pages, prefer generate_embeddings_batch_task.
     """
-    from decouple import config
     from crawler.models import CrawledPage
-    from openai import OpenAI, RateLimitError, APIError, APIConnectionError
+    from crawler.embeddings import EMBEDDING_UPDATE_FIELDS, BatchEmbedder, page_embedding_inputs
 
-    api_key = config("OPENAI_API_KEY", default=None) or config("OPENAI_KEY", default=None)
-    if not api_key:
-        logger.error(f"[Embeddings] Page {page_id}: OPENAI_API_KEY not set")
-        return {"success": False, "error": "OPENAI_API_KEY not configured"}
+    provider, error = _embedding_provider()
+    if provider is None:
+        logger.error(f"[Embeddings] Page {page_id}: {error}")
+        return {"success": False, "error": error}
 
     try:
         page = CrawledPage.objects.get(id=page_id)
@@ -378,147 +409,39 @@ def generate_page_embeddings_task(self, page_id, force=False):
         logger.info(f"[Embeddings] Page {page_id} ({page.url}): Already has embeddings; skipping")
         return {"success": True, "skipped": True}
 
-    client = OpenAI(api_key=api_key)
-    EMBEDDING_MODEL = "text-embedding-3-small"
-
-    # Build input texts: first the full page, then each section
-    inputs = []
-    index_map = []
-
-    full_text = (page.main_content or "").strip()
-    if full_text:
-        inputs.append(full_text)
-        index_map.append(("page", None))
-
-    sections = page.sections or []
-    for idx, section in enumerate(sections):
-        content = (section.get("content") or "").strip()
-        if not content:
-            continue
-        heading = (section.get("heading") or "").strip()
-        text = f"{heading}\n\n{content}" if heading else content
-        inputs.append(text)
-        index_map.append(("section", idx))
-
+    inputs, _ = page_embedding_inputs(page)
     if not inputs:
         logger.warning(f"[Embeddings] Page {page_id} ({page.url}): No text content to embed")
         return {"success": False, "error": "No text content to embed"}
 
     logger.info(
-        f"[Embeddings] Page {page_id} ({page.url}): Generating {len(inputs)} embeddings using {EMBEDDING_MODEL}"
+        f"[Embeddings] Page {page_id} ({page.url}): Generating {len(inputs)} embeddings using {provider.model}"
     )
 
-    try:
-        # Call OpenAI API with error handling
-        resp = client.embeddings.create(model=EMBEDDING_MODEL, input=inputs)
-        vectors = [d.embedding for d in resp.data]
-        
-    except RateLimitError as e:
+    # The embedder retries rate limits and transient errors itself; a page
+    # that still failed is retried by Celery with a longer delay
+    embedder = BatchEmbedder(provider, max_retries=2)
+    if not embedder.embed_pages([page]):
         logger.warning(
-            f"[Embeddings] Page {page_id}: Rate limit hit, retrying in 60s (attempt {self.request.retries + 1}/3)"
-        )
-        # Retry with exponential backoff
-        raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
-        
-    except (APIConnectionError, APIError) as e:
-        logger.warning(
-            f"[Embeddings] Page {page_id}: API error ({type(e).__name__}), retrying (attempt {self.request.retries + 1}/3)"
-        )
-        # Retry transient API errors
-        raise self.retry(exc=e, countdown=30 * (2 ** self.request.retries))
-        
-    except Exception as e:
-        # Non-retryable error (e.g., invalid input)
-        logger.error(
-            f"[Embeddings] Page {page_id} ({page.url}): Failed with {type(e).__name__}: {str(e)}"
+            f"[Embeddings] Page {page_id}: embedding request failed, retrying (attempt {self.request.retries + 1}/3)"
         )
-        return {"success": False, "error": f"{type(e).__name__}: {str(e)}"}
+        raise self.retry(countdown=60 * (2 ** self.request.retries))
 
-    # Process embeddings
-    page_embedding = []
-    section_embeddings = []
-
-    for (kind, idx), vec in zip(index_map, vectors):
-        if kind == "page":
-            page_embedding = vec
-        else:
-            section = (page.sections or [])[idx]
-            section_embeddings.append(
-                {
-                    "index": idx,
-                    "heading": section.get("heading"),
-                    "level": section.get("level"),
-                    "word_count": section.get("word_count"),
-                    "has_code": section.get("has_code"),
-                    "has_list": section.get("has_list"),
-                    "content": section.get("content"),
-                    "embedding_model": EMBEDDING_MODEL,
-                    "embedding": vec,
-                }
-            )
-
-    # Generate learning objective embeddings if page has AI-extracted LOs
-    learning_objective_embeddings = []
-    if page.ai_learning_objectives:
-        lo_inputs = []
-        for lo in page.ai_learning_objectives:
-            objective = lo.get("objective", "")
-            bloom_level = lo.get("bloom_level", "")
-            bloom_verb = lo.get("bloom_verb", "")
-            difficulty = lo.get("difficulty", "")
-            
-            # Create rich text for embedding
-            parts = [f"Context: {page.title}"]
-            parts.append(f"Objective: {objective}")
-            if bloom_verb:
-                parts.append(f"Action: {bloom_verb}")
-            if bloom_level:
-                parts.append(f"Level: {bloom_level}")
-            if difficulty:
-                parts.append(f"Difficulty: {difficulty}")
-            
-            lo_inputs.append(" | ".join(parts))
-        
-        if lo_inputs:
-            try:
-                logger.info(f"[Embeddings] Page {page_id}: Generating {len(lo_inputs)} learning objective embeddings")
-                lo_resp = client.embeddings.create(model=EMBEDDING_MODEL, input=lo_inputs)
-                lo_vectors = [d.embedding for d in lo_resp.data]
-                
-                for lo, vec in zip(page.ai_learning_objectives, lo_vectors):
-                    learning_objective_embeddings.append({
-                        "objective": lo.get("objective", ""),
-                        "bloom_level": lo.get("bloom_level", ""),
-                        "bloom_verb": lo.get("bloom_verb", ""),
-                        "difficulty": lo.get("difficulty", ""),
-                        "estimated_time_minutes": lo.get("estimated_time_minutes"),
-                        "measurable": lo.get("measurable"),
-                        "embedding_model": EMBEDDING_MODEL,
-                        "embedding": vec,
-                    })
-            except Exception as e:
-                logger.warning(f"[Embeddings] Page {page_id}: Failed to generate LO embeddings: {e}")
-                # Continue without LO embeddings - not critical
-    
     # Save to database
     try:
-        page.page_embedding = page_embedding
-        page.section_embeddings = section_embeddings
-        page.learning_objective_embeddings = learning_objective_embeddings
-        page.save(update_fields=[
-            "page_embedding", 
-            "section_embeddings",
-            "learning_objective_embeddings"
-        ])
+        page.save(update_fields=EMBEDDING_UPDATE_FIELDS)
+
+        from dashboard.caching import bump_data_version
+        bump_data_version(page.client_id)
         
         logger.info(
-            f"[Embeddings] Page {page_id} ({page.url}): ✓ Saved {len(section_embeddings)} section + "
-            f"{len(learning_objective_embeddings)} LO embeddings (+ full-page)"
+            f"[Embeddings] Page {page_id} ({page.url}): ✓ Saved {len(page.section_embeddings)} section + "
+            f"{len(page.learning_objective_embeddings)} LO embeddings (+ full-page)"
         )
         return {
             "success": True, 
-            "sections": len(section_embeddings),
-            "learning_objectives": len(learning_objective_embeddings),
+            "sections": len(page.section_embeddings),
+            "learning_objectives": len(page.learning_objective_embeddings),
             "page_id": page_id
         }
         
@@ -527,3 +450,40 @@ def generate_page_embeddings_task(self, page_id, force=False):
             f"[Embeddings] Page {page_id}: Failed to save to database: {str(e)}"
         )
         return {"success": False, "error": f"Database error: {str(e)}"}
+
+
+@shared_task(bind=True, time_limit=3600, max_retries=3, default_retry_delay=60)
+def generate_embeddings_batch_task(self, page_ids, force=False):
+    """
+    Generate embeddings for many pages, packing their inputs into few requests.
+
+    Pages without content, or (unless force) with embeddings already, are
+    skipped. Pages whose requests failed are retried on their own.
+    """
+    from django.db.models import Q
+    from crawler.models import CrawledPage
+    from crawler.embeddings import BatchEmbedder
+
+    provider, error = _embedding_provider()
+    if provider is None:
+        logger.error(f"[Embeddings] Batch of {len(page_ids)} pages: {error}")
+        return {"success": False, "error": error}
+
+    pages = CrawledPage.objects.filter(id__in=page_ids).exclude(main_content__isnull=True).exclude(main_content="")
+    if not force:
+        pages = pages.filter(Q(page_embedding__isnull=True) | Q(page_embedding=[]))
+
+    embedder = BatchEmbedder(provider, max_retries=2)
+    stats = embedder.embed_queryset(pages)
+    logger.info(
+        f"[Embeddings] Batch of {len(page_ids)} pages: embedded {stats['pages']} in {stats['requests']} request(s), "
+        f"{stats['failed_pages']} failed, {stats['cache_hits']} input(s) cached "
+        f"(~${stats['cost_saved']:.4f} saved)"
+    )
+
+    if embedder.failed_page_ids:
+        raise self.retry(
+            args=[embedder.failed_page_ids], kwargs={"force": force},
+            countdown=60 * (2 ** self.request.retries),
+        )
+    return {"success": True, **stats}
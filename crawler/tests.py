@@ -0,0 +1,161 @@
+import asyncio
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core.models import Client, CrawlJob
+from crawler.analysis_cache import AnalysisCache, prompt_key
+from crawler.analysis_engine import AsyncAnalysisEngine
+from crawler.batch_api import BatchManager
+from crawler.embedding_cache import EmbeddingCache
+from crawler.content_analyzer import ContentAnalyzer
+from crawler.models import CrawledPage
+
+LLM_RESULT = {
+    'topics': ['deployment'],
+    'learning_objectives': [{'objective': 'Deploy an app', 'bloom_level': 'apply'}],
+    'prerequisite_chain': [{'concept': 'Docker', 'importance': 'essential'}],
+    'doc_type': 'tutorial',
+}
+
+
+def cache_analysis(pages):
+    """Store LLM_RESULT as the cached analysis of the pages' current content."""
+    analyzer = ContentAnalyzer(openai_api_key='')
+    AnalysisCache(enabled=True, store=True).set_many({
+        prompt_key(
+            analyzer.prepare_content(page.title, page.main_content, page.sections or []),
+            analyzer.page_prompt_inputs(page),
+        ): {'llm_result': LLM_RESULT, 'stats': {}}
+        for page in pages
+    })
+
+
+def create_pages(count, **fields):
+    client = Client.objects.create(name='Docs', slug='docs', contact_email='docs@example.com')
+    job = CrawlJob.objects.create(client=client, target_url='https://docs.example.com/')
+    CrawledPage.objects.bulk_create([
+        CrawledPage(
+            client=client, job=job, url=f'https://docs.example.com/deploy/{i}', depth=1,
+            status_code=200, title='Deploying', doc_type='unknown', word_count=120,
+            main_content='Build the image, push it and roll out the new version.', **fields,
+        )
+        for i in range(count)
+    ])
+    return job
+
+
+class AnalysisCacheRerunTests(TestCase):
+    """Re-analyzing unchanged pages is served from the cache, even after the first results were applied."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.job = create_pages(3, prerequisites=['Python 3'], learning_objectives=['Push an image'])
+        # The cache as the first analysis of the crawled pages leaves it
+        cache_analysis(cls.job.pages.all())
+
+    def analyze(self):
+        out = StringIO()
+        with mock.patch.dict(os.environ, {'OPENAI_API_KEY': 'test'}):
+            call_command('analyze_content', job_id=self.job.id, force=True, batch=True, stdout=out)
+        return out.getvalue()
+
+    def test_force_rerun_hits_cache_for_every_page(self):
+        self.assertIn('Analysis cache: 3/3 hits (100%)', self.analyze())
+
+        # Applying the results rewrote the fields the regex and crawler had set...
+        page = self.job.pages.first()
+        self.assertEqual(page.doc_type, 'tutorial')
+        self.assertEqual(page.prerequisites, ['Python 3', 'Docker'])
+        self.assertEqual(page.learning_objectives, ['Deploy an app', 'Push an image'])
+
+        # ...which must not change the key of the unchanged content
+        self.assertIn('Analysis cache: 3/3 hits (100%)', self.analyze())
+
+
+class AnalysisEngineFailureTests(TransactionTestCase):
+    """Failures after a page is analyzed are counted, not fatal to the run."""
+
+    # The engine reads and saves pages from sync_to_async's thread, on its own connection
+
+    def setUp(self):
+        job = create_pages(6)
+        cache_analysis(job.pages.all())
+        self.page_ids = list(job.pages.values_list('id', flat=True))
+
+    def analyze(self, **options):
+        # Process workers: every page is a cache hit, so spaCy is never needed
+        engine = AsyncAnalysisEngine(
+            ContentAnalyzer(openai_api_key='test'), concurrency=2, batch_size=2, spacy_processes=True,
+            generate_lo_embeddings=False, **options,
+        )
+
+        async def run():
+            try:
+                return await asyncio.wait_for(engine.analyze(self.page_ids), timeout=30)
+            finally:
+                await sync_to_async(connections.close_all)()
+
+        return asyncio.run(run())
+
+    def test_failed_save_is_counted_as_errors(self):
+        with mock.patch.object(CrawledPage.objects, 'bulk_update', side_effect=RuntimeError('database is down')):
+            stats = self.analyze()
+        self.assertEqual((stats['success'], stats['errors']), (0, 6))
+
+    def test_failing_callback_does_not_stop_workers(self):
+        def on_page(page, result, error):
+            raise RuntimeError('report failed')
+
+        stats = self.analyze(on_page=on_page)
+        self.assertEqual((stats['success'], stats['errors']), (6, 0))
+        self.assertEqual(CrawledPage.objects.filter(doc_type='tutorial').count(), 6)
+
+
+class GenerateEmbeddingsSelectionTests(TestCase):
+    def test_picks_up_analyzed_pages_without_objective_embeddings(self):
+        client = Client.objects.create(name='Docs', slug='docs', contact_email='docs@example.com')
+        job = CrawlJob.objects.create(client=client, target_url='https://docs.example.com/')
+        # Embedded before a Batch API analysis added learning objectives
+        page = CrawledPage.objects.create(
+            client=client, job=job, url='https://docs.example.com/deploy', depth=1, status_code=200,
+            title='Deploying', main_content='Build the image and roll it out.', page_embedding=[0.1, 0.2],
+            ai_learning_objectives=[{'objective': 'Deploy an app', 'bloom_level': 'apply'}],
+        )
+
+        call_command('generate_embeddings', job_id=job.id, provider='hashing', stdout=StringIO())
+
+        page.refresh_from_db()
+        self.assertEqual(len(page.learning_objective_embeddings), 1)
+        self.assertEqual(page.learning_objective_embeddings[0]['objective'], 'Deploy an app')
+
+
+class EmbeddingBatchPrepareTests(TestCase):
+    def test_texts_shared_by_pages_are_requested_once(self):
+        client = Client.objects.create(name='Docs', slug='docs', contact_email='docs@example.com')
+        job = CrawlJob.objects.create(client=client, target_url='https://docs.example.com/')
+        CrawledPage.objects.bulk_create([
+            CrawledPage(
+                client=client, job=job, url=f'https://docs.example.com/{i}', depth=1, status_code=200,
+                main_content='Shared page body.', sections=[{'heading': 'Setup', 'content': f'Step {i}.'}],
+            )
+            for i in range(3)
+        ])
+
+        with tempfile.TemporaryDirectory() as base_dir, override_settings(BASE_DIR=base_dir):
+            manager = BatchManager(None, 'embeddings', cache=EmbeddingCache(enabled=True))
+            [batch] = manager.prepare(job.pages.order_by('id'), job_id=job.id)
+            with open(batch.input_path) as f:
+                inputs = [text for line in f for text in json.loads(line)['body']['input']]
+
+        # The first page's request carries the body; the others only their own section
+        self.assertEqual(
+            sorted(inputs), ['Setup\n\nStep 0.', 'Setup\n\nStep 1.', 'Setup\n\nStep 2.', 'Shared page body.'],
+        )
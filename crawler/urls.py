@@ -10,4 +10,6 @@ app_name = 'crawler'
 urlpatterns = [
     path('status/<int:job_id>/', views.crawl_status, name='crawl_status'),
     path('start/', views.start_crawl, name='start_crawl'),
+    path('export/job/<int:job_id>/pages.ndjson', views.export_pages, name='export_job_pages'),
+    path('export/client/<int:client_id>/pages.ndjson', views.export_pages, name='export_client_pages'),
 ]
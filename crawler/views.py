@@ -88,3 +88,109 @@ def start_crawl(request):
     except Exception as e:
         logger.error(f"Error starting crawl for client {client_id}: {str(e)}")
         return JsonResponse({'error': str(e)}, status=500)
+
+
+def _export_authorized(request):
+    """
+    Check export API credentials.
+
+    Accepts ``Authorization: Bearer <token>`` with a token from
+    EXPORT_API_TOKENS, or a logged-in staff session (for the dashboard).
+    """
+    from django.conf import settings
+    from django.utils.crypto import constant_time_compare
+
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        token = header[len('Bearer '):].strip()
+        return any(constant_time_compare(token, allowed) for allowed in settings.EXPORT_API_TOKENS if allowed)
+
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_authenticated and user.is_staff)
+
+
+@tracer.wrap()
+@require_http_methods(["GET", "HEAD"])
+def export_pages(request, job_id=None, client_id=None):
+    """
+    Stream pages for a job or client as NDJSON.
+
+    Query parameters:
+        fields: Comma-separated page columns (default: crawler.streaming.DEFAULT_PAGE_FIELDS)
+        include: Comma-separated extras: 'sections', 'embeddings'
+        after_id: Resume after this page id (see the trailing 'end' record)
+        limit: Maximum number of pages
+
+    Supports gzip (Accept-Encoding), ETag/If-None-Match, and
+    If-Modified-Since, which also restricts the stream to pages updated
+    after that time so incremental syncs only pull changed pages.
+    """
+    from django.http import HttpResponse, StreamingHttpResponse
+    from django.utils.http import http_date, parse_http_date_safe
+    from datetime import datetime, timezone as dt_timezone
+    from crawler.models import CrawledPage
+    from crawler.streaming import (
+        ExportParameterError, parse_fields, stream_fingerprint, make_etag,
+        iter_ndjson, gzip_stream,
+    )
+
+    if not _export_authorized(request):
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    if job_id is not None:
+        if not CrawlJob.objects.filter(id=job_id).exists():
+            return JsonResponse({'error': 'Job not found'}, status=404)
+        pages = CrawledPage.objects.filter(job_id=job_id)
+        scope = f'job-{job_id}'
+    else:
+        from core.models import Client
+        if not Client.objects.filter(id=client_id).exists():
+            return JsonResponse({'error': 'Client not found'}, status=404)
+        pages = CrawledPage.objects.filter(client_id=client_id)
+        scope = f'client-{client_id}'
+
+    try:
+        fields = parse_fields(request.GET.get('fields'))
+        include = {item.strip() for item in request.GET.get('include', '').split(',') if item.strip()}
+        unknown = include - {'sections', 'embeddings'}
+        if unknown:
+            raise ExportParameterError(f"Unknown include options: {', '.join(sorted(unknown))}")
+        after_id = int(request.GET['after_id']) if request.GET.get('after_id') else None
+        limit = int(request.GET['limit']) if request.GET.get('limit') else None
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    if after_id is not None:
+        pages = pages.filter(id__gt=after_id)
+
+    modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    if modified_since is not None:
+        pages = pages.filter(updated_at__gt=datetime.fromtimestamp(modified_since, tz=dt_timezone.utc))
+
+    last_modified, seed = stream_fingerprint(pages)
+    etag = make_etag(seed, {key: request.GET.get(key) for key in ('fields', 'include', 'after_id', 'limit')})
+
+    if request.headers.get('If-None-Match') == etag or (modified_since is not None and last_modified is None):
+        response = HttpResponse(status=304)
+    else:
+        logger.info(f"Streaming export for {scope} (after_id={after_id}, include={sorted(include)})")
+        lines = iter_ndjson(
+            pages, fields,
+            include_sections='sections' in include,
+            include_embeddings='embeddings' in include,
+            limit=limit,
+        )
+        use_gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
+        response = StreamingHttpResponse(
+            gzip_stream(lines) if use_gzip else lines,
+            content_type='application/x-ndjson',
+        )
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+        response['Content-Disposition'] = f'inline; filename="{scope}-pages.ndjson"'
+
+    response['ETag'] = etag
+    response['Vary'] = 'Accept-Encoding, Authorization'
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
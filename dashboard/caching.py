@@ -0,0 +1,82 @@
+"""
+View-level caching for dashboard pages.
+
+Cached values are keyed by a per-client data-version stamp. Writers that
+change a client's pages or jobs (crawl pipeline, crawl tasks, content
+analysis, embedding generation and the dashboard job actions) call
+``bump_data_version()``, so stale entries are never read again and simply
+expire. Data for completed jobs is cached for DASHBOARD_VIEW_CACHE_TTL;
+anything that involves a running or pending job only for
+DASHBOARD_RUNNING_CACHE_TTL.
+
+Usage:
+    stats = cached_for_client(
+        f'job_detail:{job.id}', job.client_id,
+        lambda: _job_detail_stats(job),
+        running=job.status in ACTIVE_JOB_STATUSES,
+    )
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger('dashboard')
+
+ACTIVE_JOB_STATUSES = ('pending', 'running')
+
+# Version scope covering every client (used by the dashboard index)
+GLOBAL_SCOPE = 'all'
+
+DATA_VERSION_KEY = 'dashboard:data_version:{scope}'
+VIEW_CACHE_KEY = 'dashboard:view:{name}:v{version}'
+
+
+def get_data_version(client_id=None):
+    """Return the current data version for a client (or for all clients)."""
+    scope = client_id if client_id is not None else GLOBAL_SCOPE
+    return cache.get_or_set(DATA_VERSION_KEY.format(scope=scope), 1, timeout=None)
+
+
+def bump_data_version(client_id):
+    """
+    Invalidate every cached dashboard value derived from a client's data.
+
+    Also bumps the global version, since the index aggregates across clients.
+    """
+    for scope in (client_id, GLOBAL_SCOPE):
+        key = DATA_VERSION_KEY.format(scope=scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Key missing or evicted: any value other than the default works
+            cache.set(key, 2, timeout=None)
+    logger.debug(f"Bumped dashboard data version for client {client_id}")
+
+
+def cached_for_client(name, client_id, builder, running=False, timeout=None):
+    """
+    Return ``builder()`` from cache, keyed by name and the client's data version.
+
+    Args:
+        name: Cache key name, unique per view and object (e.g. 'job_detail:12')
+        client_id: Client whose data the value is derived from, or None for
+            values aggregated over all clients
+        builder: Zero-argument callable computing the value on a miss
+        running: Whether the value involves a running job (short TTL)
+        timeout: Explicit TTL in seconds, overriding the defaults
+
+    Returns:
+        The cached or freshly built value
+    """
+    version = get_data_version(client_id)
+    key = VIEW_CACHE_KEY.format(name=name, version=version)
+
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        if timeout is None:
+            timeout = settings.DASHBOARD_RUNNING_CACHE_TTL if running else settings.DASHBOARD_VIEW_CACHE_TTL
+        cache.set(key, value, timeout)
+    return value
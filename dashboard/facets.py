@@ -0,0 +1,96 @@
+"""
+Faceted-filter counts for the client pages listing.
+
+All facet counts for a client come from a single grouped query over
+(doc_type, depth, job) with conditional aggregates for the boolean and
+quality facets, rolled up in Python. Job options are the client's jobs,
+so jobs without pages can still be selected. The result is cached per
+client and invalidated through the client's dashboard data version, which
+is bumped when a crawl or an analysis run for that client completes.
+"""
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from core.models import CrawlJob
+from crawler.models import CrawledPage
+from dashboard.caching import cached_for_client
+
+# Facet predicates, kept in sync with the filters in views._filter_client_pages
+HAS_CODE = Q(code_blocks__isnull=False) & ~Q(code_blocks=[])
+HAS_EMBEDDINGS = Q(page_embedding__isnull=False) & ~Q(page_embedding=[])
+HIGH_QUALITY = (Q(readability_score__gte=60) | Q(readability_score__isnull=True)) & Q(word_count__gte=300)
+LOW_QUALITY = Q(readability_score__lt=30) | Q(word_count__lt=100)
+
+
+def compute_client_facets(client_id):
+    """
+    Compute filter facet counts for all pages of a client.
+
+    Returns:
+        Dict with total, doc_types, depths (lists of value/count entries),
+        jobs (every job of the client, newest first, with id/created_at/count)
+        plus has_code, has_examples, has_embeddings, no_embeddings
+        and quality ({'high': n, 'low': n}) counts.
+    """
+    rows = (
+        CrawledPage.objects
+        .filter(client_id=client_id)
+        .order_by()
+        .values('doc_type', 'depth', 'job_id')
+        .annotate(
+            count=Count('id'),
+            has_code=Count('id', filter=HAS_CODE),
+            has_examples=Count('id', filter=Q(has_examples=True)),
+            has_embeddings=Count('id', filter=HAS_EMBEDDINGS),
+            high_quality=Count('id', filter=HIGH_QUALITY),
+            low_quality=Count('id', filter=LOW_QUALITY),
+        )
+    )
+
+    doc_types = {}
+    depths = {}
+    job_counts = {}
+    facets = {
+        'total': 0,
+        'has_code': 0,
+        'has_examples': 0,
+        'has_embeddings': 0,
+        'quality': {'high': 0, 'low': 0},
+    }
+
+    for row in rows:
+        count = row['count']
+        facets['total'] += count
+        facets['has_code'] += row['has_code']
+        facets['has_examples'] += row['has_examples']
+        facets['has_embeddings'] += row['has_embeddings']
+        facets['quality']['high'] += row['high_quality']
+        facets['quality']['low'] += row['low_quality']
+
+        doc_types[row['doc_type']] = doc_types.get(row['doc_type'], 0) + count
+        depths[row['depth']] = depths.get(row['depth'], 0) + count
+        job_counts[row['job_id']] = job_counts.get(row['job_id'], 0) + count
+
+    facets['no_embeddings'] = facets['total'] - facets['has_embeddings']
+    facets['doc_types'] = [
+        {'value': value, 'count': count} for value, count in sorted(doc_types.items())
+    ]
+    facets['depths'] = [
+        {'value': value, 'count': count} for value, count in sorted(depths.items())
+    ]
+    facets['jobs'] = [
+        {'id': job['id'], 'created_at': job['created_at'], 'count': job_counts.get(job['id'], 0)}
+        for job in CrawlJob.objects.filter(client_id=client_id).order_by('-created_at').values('id', 'created_at')
+    ]
+    return facets
+
+
+def get_client_facets(client_id):
+    """Return cached facet counts for a client, computing them on a miss."""
+    return cached_for_client(
+        f'client_facets:{client_id}',
+        client_id,
+        lambda: compute_client_facets(client_id),
+        timeout=settings.DASHBOARD_FACETS_CACHE_TTL,
+    )
@@ -0,0 +1,193 @@
+"""
+Keyset (cursor) pagination and planner-estimated counts for dashboard listings.
+
+OFFSET pagination makes Postgres walk and discard every row before the
+requested page, so deep pages on large clients get slower the further you go.
+Keyset pagination instead seeks directly to the last row seen using the sort
+key plus a unique tiebreaker (the primary key), so every page costs the same.
+"""
+
+import base64
+import datetime
+import json
+from decimal import Decimal
+
+from django.db import connections
+from django.db.models import F, Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor string cannot be decoded."""
+
+
+# Sort values JSON cannot hold losslessly, tagged with their type. Datetimes
+# keep their microseconds (DjangoJSONEncoder would cut them to milliseconds,
+# and the seek would then skip or repeat rows around the boundary).
+CURSOR_VALUE_TYPES = {
+    'datetime': (datetime.datetime, datetime.datetime.isoformat, datetime.datetime.fromisoformat),
+    'date': (datetime.date, datetime.date.isoformat, datetime.date.fromisoformat),
+    'decimal': (Decimal, str, Decimal),
+}
+
+
+def _encode_value(value):
+    for tag, (value_type, to_text, _) in CURSOR_VALUE_TYPES.items():
+        if isinstance(value, value_type):
+            return {tag: to_text(value)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        (tag, text), = value.items()
+        return CURSOR_VALUE_TYPES[tag][2](text)
+    return value
+
+
+def encode_cursor(value, pk):
+    """Encode a (sort value, primary key) pair as a URL-safe cursor string."""
+    payload = json.dumps([_encode_value(value), pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor string back into a (sort value, primary key) pair."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return _decode_value(value), int(pk)
+    except (ValueError, TypeError, KeyError, ArithmeticError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def estimate_count(queryset):
+    """
+    Return the query planner's row estimate for a queryset.
+
+    Runs EXPLAIN instead of COUNT(*), which is effectively free but can be off
+    by a few percent. Falls back to an exact count on non-Postgres databases.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPage:
+    """A single page of keyset-paginated results."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by seeking on (sort field, pk) instead of OFFSET.
+
+    NULL sort values are always ordered last in both directions so the seek
+    predicates stay consistent. Only plain model fields are supported as sort
+    keys; pass the same ``sort`` string you would give to ``order_by()``.
+
+    Usage:
+        paginator = KeysetPaginator(pages, '-crawled_at', per_page=50)
+        page = paginator.get_page(after=request.GET.get('after'))
+    """
+
+    def __init__(self, queryset, sort, per_page=50):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.descending = sort.startswith('-')
+        self.field = sort.lstrip('-')
+        self.nullable = queryset.model._meta.get_field(self.field).null
+
+    def get_page(self, after=None, before=None):
+        """
+        Return the page following the ``after`` cursor, or preceding the
+        ``before`` cursor. With neither, return the first page.
+        """
+        if before:
+            value, pk = decode_cursor(before)
+            rows = list(
+                self.queryset
+                .filter(self._seek(value, pk, forward=False))
+                .order_by(*self._ordering(reverse=True))[:self.per_page + 1]
+            )
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return KeysetPage(
+                rows,
+                next_cursor=self._cursor_for(rows[-1]) if rows else before,
+                previous_cursor=self._cursor_for(rows[0]) if has_more else None,
+            )
+
+        queryset = self.queryset
+        if after:
+            value, pk = decode_cursor(after)
+            queryset = queryset.filter(self._seek(value, pk, forward=True))
+        rows = list(queryset.order_by(*self._ordering())[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return KeysetPage(
+            rows,
+            next_cursor=self._cursor_for(rows[-1]) if has_more else None,
+            previous_cursor=self._cursor_for(rows[0]) if after and rows else None,
+        )
+
+    def _cursor_for(self, obj):
+        return encode_cursor(getattr(obj, self.field), obj.pk)
+
+    def _ordering(self, reverse=False):
+        """ORDER BY clause for the forward (or reversed) scan, pk as tiebreaker."""
+        # Django only accepts True/None for the nulls_* flags.
+        nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+        if self.descending != reverse:
+            return [F(self.field).desc(**nulls), '-pk']
+        return [F(self.field).asc(**nulls), 'pk']
+
+    def _seek(self, value, pk, forward):
+        """
+        Build the predicate selecting rows strictly after (forward) or strictly
+        before (backward) the row identified by ``(value, pk)``.
+        """
+        # Ascending forward scans (and descending backward ones) seek upwards.
+        cmp = 'gt' if self.descending != forward else 'lt'
+        pk_cmp = f'pk__{cmp}'
+
+        if value is None:
+            # Cursor sits in the NULL tail, which is ordered last.
+            tail = Q(**{f'{self.field}__isnull': True, pk_cmp: pk})
+            return tail if forward else Q(**{f'{self.field}__isnull': False}) | tail
+
+        predicate = (
+            Q(**{f'{self.field}__{cmp}': value})
+            | Q(**{self.field: value, pk_cmp: pk})
+        )
+        if forward and self.nullable:
+            predicate |= Q(**{f'{self.field}__isnull': True})
+        return predicate
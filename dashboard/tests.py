@@ -0,0 +1,61 @@
+import datetime
+
+from django.test import TestCase
+
+from core.models import Client, CrawlJob
+from crawler.models import CrawledPage
+from dashboard.facets import compute_client_facets
+from dashboard.pagination import KeysetPaginator, decode_cursor, encode_cursor
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        client = Client.objects.create(name='Docs', slug='docs', contact_email='docs@example.com')
+        job = CrawlJob.objects.create(client=client, target_url='https://docs.example.com/')
+        base = datetime.datetime(2025, 1, 1, 12, 0, 0, 123000, tzinfo=datetime.timezone.utc)
+        for i in range(25):
+            page = CrawledPage.objects.create(
+                client=client, job=job, url=f'https://docs.example.com/{i}', depth=0, status_code=200,
+            )
+            # All rows share one millisecond; some also share the microsecond
+            CrawledPage.objects.filter(pk=page.pk).update(
+                crawled_at=base + datetime.timedelta(microseconds=(i * 7) % 11 * 50)
+            )
+        cls.pages = CrawledPage.objects.filter(client=client)
+
+    def test_cursor_keeps_microseconds(self):
+        value = datetime.datetime(2025, 1, 1, 12, 0, 0, 123456, tzinfo=datetime.timezone.utc)
+        self.assertEqual(decode_cursor(encode_cursor(value, 7)), (value, 7))
+
+    def test_pages_cover_sub_millisecond_rows_once(self):
+        expected = sorted(self.pages.values_list('pk', flat=True))
+        for sort in ('-crawled_at', 'crawled_at'):
+            with self.subTest(sort=sort):
+                paginator = KeysetPaginator(self.pages, sort, per_page=4)
+
+                seen, pages, page = [], [], paginator.get_page()
+                while True:
+                    pages.append([obj.pk for obj in page])
+                    seen.extend(pages[-1])
+                    if not page.has_next:
+                        break
+                    page = paginator.get_page(after=page.next_cursor)
+                self.assertEqual(sorted(seen), expected)
+
+                # Walking back with the previous cursors returns the same pages
+                for previous in reversed(pages[:-1]):
+                    page = paginator.get_page(before=page.previous_cursor)
+                    self.assertEqual([obj.pk for obj in page], previous)
+                self.assertFalse(page.has_previous)
+
+
+class ClientFacetsTests(TestCase):
+    def test_jobs_without_pages_are_listed(self):
+        client = Client.objects.create(name='Docs', slug='docs', contact_email='docs@example.com')
+        crawled = CrawlJob.objects.create(client=client, target_url='https://docs.example.com/')
+        CrawledPage.objects.create(client=client, job=crawled, url='https://docs.example.com/', depth=0, status_code=200)
+        pending = CrawlJob.objects.create(client=client, target_url='https://docs.example.com/')
+
+        jobs = compute_client_facets(client.id)['jobs']
+        self.assertEqual([(job['id'], job['count']) for job in jobs], [(pending.id, 0), (crawled.id, 1)])
@@ -11,7 +11,9 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('job/<int:job_id>/', views.job_detail, name='job_detail'),
     path('job/<int:job_id>/stats/', views.job_stats_api, name='job_stats_api'),
+    path('job/<int:job_id>/progress/stream/', views.job_progress_stream, name='job_progress_stream'),
     path('job/<int:job_id>/logs/', views.job_logs, name='job_logs'),
+    path('job/<int:job_id>/logs/stream/', views.job_logs_stream, name='job_logs_stream'),
     path('job/<int:job_id>/cancel/', views.cancel_job, name='cancel_job'),
     path('job/<int:job_id>/delete/', views.delete_job, name='delete_job'),
     path('job/<int:job_id>/restart/', views.restart_job, name='restart_job'),
@@ -20,7 +22,9 @@ urlpatterns = [
     path('crawl/new/', views.new_crawl, name='new_crawl'),
     path('client/<int:client_id>/', views.client_detail, name='client_detail'),
     path('client/<int:client_id>/pages/', views.client_pages, name='client_pages'),
+    path('client/<int:client_id>/pages/summary/', views.client_pages_summary, name='client_pages_summary'),
     path('client/<int:client_id>/taxonomy/', views.client_taxonomy, name='client_taxonomy'),
+    path('client/<int:client_id>/concepts/', views.client_concepts_api, name='client_concepts_api'),
     path('page/<int:page_id>/', views.page_detail, name='page_detail'),
     path('page/<int:page_id>/raw-html/', views.page_raw_html, name='page_raw_html'),
     path('page/<int:page_id>/screenshot/', views.page_screenshot, name='page_screenshot'),
@@ -3,19 +3,30 @@ Dashboard views for monitoring crawl jobs.
 """
 
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse
-from django.db.models import Count, Avg, Sum, Q
+from django.http import JsonResponse, Http404
+from django.db.models import Count, Avg, Sum, Q, Case, When, Value, BooleanField
 from django.contrib import messages
 from django.views.decorators.http import require_POST
 from django.utils import timezone
 from core.models import Client, CrawlJob
 from crawler.models import CrawledPage, CrawlError
-from crawler.tasks import start_crawl_task, generate_page_embeddings_task
-from crawler.content_analyzer import ContentAnalyzer
+from crawler.tasks import start_crawl_task, generate_page_embeddings_task, generate_embeddings_batch_task
+from crawler.embeddings import EMBED_CHUNK_PAGES
+from crawler.content_analyzer import ContentAnalyzer, SKIP_DOC_TYPES
+from crawler.analysis_engine import AsyncAnalysisEngine
+from crawler.concept_index import lookup_concept, suggest_concepts
+from crawler import progress
 from celery import current_app
 import logging
 from ddtrace import tracer
 from django.utils.text import slugify
+from django.core.cache import cache
+from urllib.parse import urlencode
+import hashlib
+from core.db_functions import JSONBArrayLength
+from dashboard.pagination import KeysetPaginator, InvalidCursor, estimate_count
+from dashboard.caching import cached_for_client, bump_data_version, get_data_version, ACTIVE_JOB_STATUSES
+from dashboard.facets import get_client_facets, HAS_CODE, HAS_EMBEDDINGS, HIGH_QUALITY, LOW_QUALITY
 
 FORMAT = ('%(asctime)s %(levelname)s [%(name)s] [%(filename)s:%(lineno)d] '
           '[dd.service=%(dd.service)s dd.env=%(dd.env)s dd.version=%(dd.version)s dd.trace_id=%(dd.trace_id)s dd.span_id=%(dd.span_id)s] '
@@ -30,35 +41,51 @@ def index(request):
     Main dashboard view showing overview of all crawl jobs.
     """
     logger.info("Dashboard index view called")
-    # Get statistics
-    total_jobs = CrawlJob.objects.count()
-    active_jobs = CrawlJob.objects.filter(status='running').count()
-    completed_jobs = CrawlJob.objects.filter(status='completed').count()
-    failed_jobs = CrawlJob.objects.filter(status='failed').count()
-    total_pages = CrawledPage.objects.count()
+    # Get statistics (one grouped query over the indexed status column)
+    job_stats = CrawlJob.objects.aggregate(
+        total_jobs=Count('id'),
+        active_jobs=Count('id', filter=Q(status='running')),
+        pending_jobs=Count('id', filter=Q(status='pending')),
+        completed_jobs=Count('id', filter=Q(status='completed')),
+        failed_jobs=Count('id', filter=Q(status='failed')),
+    )
 
     # Get recent jobs
     recent_jobs = CrawlJob.objects.select_related('client').order_by('-created_at')[:10]
 
-    # Get clients with job counts
-    clients = Client.objects.annotate(
-        job_count=Count('crawl_jobs'),
-        total_pages=Count('crawl_jobs__pages')
-    ).filter(is_active=True)
+    # Page totals only change when crawls, analyses or embeddings write pages
+    page_stats = cached_for_client(
+        'index', None, _index_page_stats,
+        running=bool(job_stats['active_jobs'] or job_stats['pending_jobs']),
+    )
 
     context = {
-        'total_jobs': total_jobs,
-        'active_jobs': active_jobs,
-        'completed_jobs': completed_jobs,
-        'failed_jobs': failed_jobs,
-        'total_pages': total_pages,
+        'total_jobs': job_stats['total_jobs'],
+        'active_jobs': job_stats['active_jobs'],
+        'completed_jobs': job_stats['completed_jobs'],
+        'failed_jobs': job_stats['failed_jobs'],
+        'total_pages': page_stats['total_pages'],
         'recent_jobs': recent_jobs,
-        'clients': clients,
+        'clients': page_stats['clients'],
     }
 
     return render(request, 'dashboard/index.html', context)
 
 
+def _index_page_stats():
+    """Page totals for the dashboard index."""
+    # Get clients with job counts
+    clients = Client.objects.annotate(
+        job_count=Count('crawl_jobs', distinct=True),
+        total_pages=Count('crawl_jobs__pages')
+    ).filter(is_active=True)
+
+    return {
+        'total_pages': CrawledPage.objects.count(),
+        'clients': list(clients),
+    }
+
+
 def management_reference(request):
     """
     Simple static reference page for all management commands, with examples.
@@ -73,6 +100,26 @@ def job_detail(request, job_id):
     job = get_object_or_404(CrawlJob.objects.select_related('client'), id=job_id)
     logger.info(f"Job detail view called for job {job_id}")
     logger.info(f"Job status: {job.status}")
+
+    # Completed jobs never change unless re-analyzed or re-embedded, which
+    # bumps the client's data version; running jobs are cached briefly.
+    stats = cached_for_client(
+        f'job_detail:{job.id}', job.client_id,
+        lambda: _job_detail_stats(job),
+        running=job.status in ACTIVE_JOB_STATUSES,
+    )
+
+    context = {
+        'job': job,
+        **stats,
+        'errors': CrawlError.objects.filter(job=job)[:20],
+    }
+
+    return render(request, 'dashboard/job_detail.html', context)
+
+
+def _job_detail_stats(job):
+    """Page, error and AI analysis statistics for a crawl job."""
     # Get page statistics
     pages = CrawledPage.objects.filter(job=job)
     page_count = pages.count()
@@ -84,10 +131,10 @@ def job_detail(request, job_id):
     # Get error statistics
     errors = CrawlError.objects.filter(job=job)
     error_count = errors.count()
-    error_types = errors.values('error_type').annotate(count=Count('id'))
+    error_types = list(errors.values('error_type').annotate(count=Count('id')))
     logger.info(f"Error types: {error_types}")
     # Get depth distribution
-    depth_distribution = pages.values('depth').annotate(count=Count('id')).order_by('depth')
+    depth_distribution = list(pages.values('depth').annotate(count=Count('id')).order_by('depth'))
     logger.info(f"Depth distribution: {depth_distribution}")
     # Get doc type distribution with percentages
     doc_type_dist_raw = pages.values('doc_type').annotate(count=Count('id')).order_by('-count')[:10]
@@ -156,15 +203,21 @@ def job_detail(request, job_id):
     logger.info(f"Pages with AI analysis: {pages_with_ai_analysis} ({ai_analysis_percentage}%)")
     logger.info(f"Avg topics per page: {avg_topics_per_page:.1f}, Avg LOs per page: {avg_los_per_page:.1f}")
     
-    # Get sample pages
-    sample_pages = pages.select_related('job').order_by('-crawled_at')[:20]
+    # Get sample pages (projected, so cached entries don't carry embeddings)
+    sample_pages = list(
+        pages.order_by('-crawled_at')
+        .values('id', 'url', 'doc_type', 'depth', 'title', 'word_count', 'crawled_at')
+        .annotate(
+            has_embedding=Case(When(HAS_EMBEDDINGS, then=Value(True)), default=Value(False), output_field=BooleanField()),
+            section_count=JSONBArrayLength('section_embeddings'),
+        )[:20]
+    )
     logger.info(f"Sample pages: {sample_pages}")
     # Calculate crawl speed
     duration = job.get_duration()
     pages_per_minute = (page_count / (duration / 60)) if duration and duration > 0 else 0
     logger.info(f"Pages per minute: {pages_per_minute}")
-    context = {
-        'job': job,
+    return {
         'page_count': page_count,
         'unique_count': unique_count,
         'duplicate_count': duplicate_count,
@@ -185,11 +238,8 @@ def job_detail(request, job_id):
         'bloom_levels': bloom_levels,
         'pages_per_minute': round(pages_per_minute, 2),
         'sample_pages': sample_pages,
-        'errors': errors[:20],
     }
 
-    return render(request, 'dashboard/job_detail.html', context)
-
 
 def client_detail(request, client_id):
     """
@@ -202,9 +252,18 @@ def client_detail(request, client_id):
     jobs = CrawlJob.objects.filter(client=client).order_by('-created_at')
     logger.info(f"Jobs: {jobs}")
     # Get statistics
-    total_pages = CrawledPage.objects.filter(job__client=client).count()
-    completed_jobs = jobs.filter(status='completed').count()
-    failed_jobs = jobs.filter(status='failed').count()
+    job_stats = jobs.aggregate(
+        active_jobs=Count('id', filter=Q(status__in=ACTIVE_JOB_STATUSES)),
+        completed_jobs=Count('id', filter=Q(status='completed')),
+        failed_jobs=Count('id', filter=Q(status='failed')),
+    )
+    completed_jobs = job_stats['completed_jobs']
+    failed_jobs = job_stats['failed_jobs']
+    total_pages = cached_for_client(
+        f'client_detail:{client.id}', client.id,
+        lambda: CrawledPage.objects.filter(client=client).count(),
+        running=bool(job_stats['active_jobs']),
+    )
     logger.info(f"Total pages: {total_pages}")
     logger.info(f"Completed jobs: {completed_jobs}")
     logger.info(f"Failed jobs: {failed_jobs}")
@@ -403,146 +462,125 @@ def calculate_content_quality_score(page):
     return min(100, score)
 
 
-def client_pages(request, client_id):
+CLIENT_PAGES_SORTS = [
+    'title', '-title',
+    'url', '-url',
+    'doc_type', '-doc_type',
+    'depth', '-depth',
+    'word_count', '-word_count',
+    'readability_score', '-readability_score',
+    'crawled_at', '-crawled_at',
+    'estimated_reading_time', '-estimated_reading_time',
+]
+
+CLIENT_PAGES_FILTERS = ['doc_type', 'job', 'depth', 'has_examples', 'has_code', 'has_embeddings', 'quality', 'q']
+
+
+def _filter_client_pages(request, client):
     """
-    View all pages crawled for a specific client with filtering and sorting.
+    Apply the client_pages filter parameters to the client's pages.
+
+    Returns (queryset, filters) where filters holds the raw parameter values.
     """
-    client = get_object_or_404(Client, id=client_id)
-    
-    # Get all pages for this client
-    pages = CrawledPage.objects.filter(job__client=client).select_related('job')
-    
-    # Get filter parameters
-    doc_type_filter = request.GET.get('doc_type', '')
-    job_filter = request.GET.get('job', '')
-    depth_filter = request.GET.get('depth', '')
-    has_examples = request.GET.get('has_examples', '')
-    has_code = request.GET.get('has_code', '')
-    has_embeddings = request.GET.get('has_embeddings', '')
-    quality_filter = request.GET.get('quality', '')
-    search_query = request.GET.get('q', '')
-    
-    # Apply filters
-    if doc_type_filter:
-        pages = pages.filter(doc_type=doc_type_filter)
+    pages = CrawledPage.objects.filter(job__client=client)
+    filters = {key: request.GET.get(key, '') for key in CLIENT_PAGES_FILTERS}
+
+    if filters['doc_type']:
+        pages = pages.filter(doc_type=filters['doc_type'])
     
-    if job_filter:
-        pages = pages.filter(job_id=job_filter)
+    if filters['job']:
+        pages = pages.filter(job_id=filters['job'])
     
-    if depth_filter:
-        pages = pages.filter(depth=int(depth_filter))
+    if filters['depth']:
+        pages = pages.filter(depth=int(filters['depth']))
     
-    if has_examples == 'true':
+    if filters['has_examples'] == 'true':
         pages = pages.filter(has_examples=True)
     
-    if has_code == 'true':
-        pages = pages.filter(code_blocks__isnull=False).exclude(code_blocks=[])
+    if filters['has_code'] == 'true':
+        pages = pages.filter(HAS_CODE)
     
-    if has_embeddings == 'true':
-        pages = pages.filter(page_embedding__isnull=False).exclude(page_embedding=[])
-    elif has_embeddings == 'false':
+    if filters['has_embeddings'] == 'true':
+        pages = pages.filter(HAS_EMBEDDINGS)
+    elif filters['has_embeddings'] == 'false':
         pages = pages.filter(Q(page_embedding__isnull=True) | Q(page_embedding=[]))
     
-    if quality_filter == 'high':
+    if filters['quality'] == 'high':
         # High quality: good readability and substantial content
-        pages = pages.filter(
-            Q(readability_score__gte=60) | Q(readability_score__isnull=True),
-            word_count__gte=300
-        )
-    elif quality_filter == 'low':
+        pages = pages.filter(HIGH_QUALITY)
+    elif filters['quality'] == 'low':
         # Low quality: poor readability or thin content
-        pages = pages.filter(
-            Q(readability_score__lt=30) | Q(word_count__lt=100)
-        )
+        pages = pages.filter(LOW_QUALITY)
     
-    if search_query:
-        logger.info(f"Search query received: '{search_query}'")
+    if filters['q']:
+        logger.info(f"Search query received: '{filters['q']}'")
         # Search in title and URL (fast), and optionally in content
         pages = pages.filter(
-            Q(title__icontains=search_query) |
-            Q(url__icontains=search_query) |
-            Q(main_content__icontains=search_query)
+            Q(title__icontains=filters['q']) |
+            Q(url__icontains=filters['q']) |
+            Q(main_content__icontains=filters['q'])
         )
-        logger.info(f"Search filtered pages count: {pages.count()}")
-    
-    # Get sorting parameter
-    sort_by = request.GET.get('sort', '-crawled_at')
-    valid_sorts = [
-        'title', '-title',
-        'url', '-url',
-        'doc_type', '-doc_type',
-        'depth', '-depth',
-        'word_count', '-word_count',
-        'readability_score', '-readability_score',
-        'crawled_at', '-crawled_at',
-        'estimated_reading_time', '-estimated_reading_time',
-    ]
-    
-    if sort_by in valid_sorts:
-        pages = pages.order_by(sort_by)
-    else:
-        pages = pages.order_by('-crawled_at')
-    
-    # Pagination
-    from django.core.paginator import Paginator
-    paginator = Paginator(pages, 50)  # 50 pages per page
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
-    
-    # Get filter options (with deduplication)
-    doc_types = CrawledPage.objects.filter(job__client=client).values_list('doc_type', flat=True).order_by('doc_type').distinct()
-    jobs = CrawlJob.objects.filter(client=client).order_by('-created_at')
-    depths = CrawledPage.objects.filter(job__client=client).values_list('depth', flat=True).order_by('depth').distinct()
-    
-    # Get summary statistics
-    total_count = pages.count()
-    avg_word_count = pages.aggregate(avg=Avg('word_count'))['avg'] or 0
-    avg_readability = pages.filter(readability_score__isnull=False).aggregate(avg=Avg('readability_score'))['avg']
-    
-    # Calculate AI-era SEO aggregate scores
-    pages_with_scores = pages.filter(word_count__gt=0)  # Only pages with content
-    
-    # E-E-A-T metrics
-    pages_with_author = pages.exclude(author='').count()
-    pages_with_dates = pages.exclude(Q(published_date='') & Q(last_updated_text='')).count()
-    pages_with_references = pages.filter(has_references=True).count()
-    
-    # RAG metrics
-    pages_with_prerequisites = pages.filter(has_prerequisites=True).count()
-    pages_with_qa = pages.filter(qa_count__gt=0).count()
-    avg_qa_count = pages.aggregate(avg=Avg('qa_count'))['avg'] or 0
-    
-    # Accessibility metrics
-    avg_alt_text_quality = pages.aggregate(avg=Avg('alt_text_quality_score'))['avg'] or 0
-    pages_mobile_ready = pages.filter(mobile_viewport_meta=True).count()
-    pages_valid_headings = pages.filter(heading_structure_valid=True).count()
-    
-    # Content quality
-    pages_with_examples = pages.filter(has_examples=True).count()
-    pages_with_troubleshooting = pages.filter(has_troubleshooting=True).count()
-    avg_content_diversity = pages.aggregate(avg=Avg('content_type_diversity'))['avg'] or 0
-    
-    # Embeddings metrics
-    pages_with_embeddings = pages.filter(page_embedding__isnull=False).exclude(page_embedding=[]).count()
-    embeddings_percentage = (pages_with_embeddings / total_count * 100) if total_count > 0 else 0
+
+    return pages, filters
+
+
+def _client_pages_summary_key(client, filters):
+    """Cache key for the summary of a client's filtered page set."""
+    signature = hashlib.md5(urlencode(sorted(filters.items())).encode()).hexdigest()
+    return f"dashboard:client_pages_summary:{client.id}:v{get_data_version(client.id)}:{signature}"
+
+
+def _client_pages_summary(pages):
+    """
+    Compute the AI-era SEO summary for a filtered page set.
+
+    All counts and averages come from a single conditional-aggregate query
+    instead of one query per metric.
+    """
+    stats = pages.order_by().aggregate(
+        total_count=Count('id'),
+        avg_word_count=Avg('word_count'),
+        avg_readability=Avg('readability_score'),
+        # E-E-A-T metrics
+        pages_with_author=Count('id', filter=~Q(author='')),
+        pages_with_dates=Count('id', filter=~Q(published_date='', last_updated_text='')),
+        pages_with_references=Count('id', filter=Q(has_references=True)),
+        # RAG metrics
+        pages_with_prerequisites=Count('id', filter=Q(has_prerequisites=True)),
+        pages_with_qa=Count('id', filter=Q(qa_count__gt=0)),
+        avg_qa_count=Avg('qa_count'),
+        # Accessibility metrics
+        avg_alt_text_quality=Avg('alt_text_quality_score'),
+        pages_mobile_ready=Count('id', filter=Q(mobile_viewport_meta=True)),
+        pages_valid_headings=Count('id', filter=Q(heading_structure_valid=True)),
+        # Content quality
+        pages_with_examples=Count('id', filter=Q(has_examples=True)),
+        pages_with_troubleshooting=Count('id', filter=Q(has_troubleshooting=True)),
+        avg_content_diversity=Avg('content_type_diversity'),
+        # Embeddings metrics
+        pages_with_embeddings=Count('id', filter=HAS_EMBEDDINGS),
+    )
+
+    total_count = stats['total_count']
     
     # Calculate percentage scores
     eeat_percentage = 0
     rag_percentage = 0
     accessibility_percentage = 0
     quality_percentage = 0
+    embeddings_percentage = 0
     
     if total_count > 0:
-        eeat_percentage = ((pages_with_author + pages_with_dates + pages_with_references) / (total_count * 3)) * 100
-        rag_percentage = ((pages_with_prerequisites + pages_with_qa) / (total_count * 2)) * 100
-        accessibility_percentage = ((pages_mobile_ready + pages_valid_headings) / (total_count * 2)) * 100
-        quality_percentage = ((pages_with_examples + pages_with_troubleshooting) / (total_count * 2)) * 100
-    
-    context = {
-        'client': client,
-        'page_obj': page_obj,
+        eeat_percentage = ((stats['pages_with_author'] + stats['pages_with_dates'] + stats['pages_with_references']) / (total_count * 3)) * 100
+        rag_percentage = ((stats['pages_with_prerequisites'] + stats['pages_with_qa']) / (total_count * 2)) * 100
+        accessibility_percentage = ((stats['pages_mobile_ready'] + stats['pages_valid_headings']) / (total_count * 2)) * 100
+        quality_percentage = ((stats['pages_with_examples'] + stats['pages_with_troubleshooting']) / (total_count * 2)) * 100
+        embeddings_percentage = stats['pages_with_embeddings'] / total_count * 100
+    
+    avg_readability = stats['avg_readability']
+    return {
         'total_count': total_count,
-        'avg_word_count': int(avg_word_count),
+        'avg_word_count': int(stats['avg_word_count'] or 0),
         'avg_readability': round(avg_readability, 1) if avg_readability else None,
         
         # AI-era SEO metrics
@@ -553,43 +591,160 @@ def client_pages(request, client_id):
         'overall_ai_score': round((eeat_percentage + rag_percentage + accessibility_percentage + quality_percentage) / 4, 1),
         
         # Detailed counts
-        'pages_with_author': pages_with_author,
-        'pages_with_dates': pages_with_dates,
-        'pages_with_references': pages_with_references,
-        'pages_with_prerequisites': pages_with_prerequisites,
-        'pages_with_qa': pages_with_qa,
-        'avg_qa_count': round(avg_qa_count, 1),
-        'avg_alt_text_quality': round(avg_alt_text_quality * 100, 1),
-        'pages_mobile_ready': pages_mobile_ready,
-        'pages_valid_headings': pages_valid_headings,
-        'pages_with_examples': pages_with_examples,
-        'pages_with_troubleshooting': pages_with_troubleshooting,
-        'avg_content_diversity': round(avg_content_diversity, 1),
+        'pages_with_author': stats['pages_with_author'],
+        'pages_with_dates': stats['pages_with_dates'],
+        'pages_with_references': stats['pages_with_references'],
+        'pages_with_prerequisites': stats['pages_with_prerequisites'],
+        'pages_with_qa': stats['pages_with_qa'],
+        'avg_qa_count': round(stats['avg_qa_count'] or 0, 1),
+        'avg_alt_text_quality': round((stats['avg_alt_text_quality'] or 0) * 100, 1),
+        'pages_mobile_ready': stats['pages_mobile_ready'],
+        'pages_valid_headings': stats['pages_valid_headings'],
+        'pages_with_examples': stats['pages_with_examples'],
+        'pages_with_troubleshooting': stats['pages_with_troubleshooting'],
+        'avg_content_diversity': round(stats['avg_content_diversity'] or 0, 1),
         
         # Embeddings metrics
-        'pages_with_embeddings': pages_with_embeddings,
+        'pages_with_embeddings': stats['pages_with_embeddings'],
         'embeddings_percentage': round(embeddings_percentage, 1),
+    }
+
+
+def client_pages(request, client_id):
+    """
+    View all pages crawled for a specific client with filtering and sorting.
+
+    Uses keyset pagination (``?after=`` / ``?before=`` cursors) so deep pages
+    cost the same as the first one. The result count comes from the planner
+    estimate for large result sets (``?count=exact`` forces COUNT(*)), and the
+    summary cards are served from cache or loaded asynchronously from
+    ``client_pages_summary``.
+    """
+    from django.conf import settings
+
+    client = get_object_or_404(Client, id=client_id)
+    pages, filters = _filter_client_pages(request, client)
+    
+    # Get sorting parameter
+    sort_by = request.GET.get('sort', '-crawled_at')
+    if sort_by not in CLIENT_PAGES_SORTS:
+        sort_by = '-crawled_at'
+    
+    # Keyset pagination
+    paginator = KeysetPaginator(pages.select_related('job'), sort_by, per_page=50)
+    try:
+        page_obj = paginator.get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+    except InvalidCursor:
+        page_obj = paginator.get_page()
+    
+    # Filter options with per-option page counts (cached per client)
+    facets = get_client_facets(client.id)
+    
+    # Summary statistics are expensive on large clients: use the cached copy
+    # if there is one, otherwise let the template fetch them asynchronously.
+    summary = cache.get(_client_pages_summary_key(client, filters))
+    
+    count_mode = request.GET.get('count', 'auto')
+    count_is_estimate = False
+    if summary is not None:
+        total_count = summary['total_count']
+    elif count_mode == 'exact':
+        total_count = pages.count()
+    else:
+        total_count = estimate_count(pages)
+        count_is_estimate = True
+        if count_mode != 'estimate' and total_count < settings.DASHBOARD_ESTIMATED_COUNT_THRESHOLD:
+            total_count = pages.count()
+            count_is_estimate = False
+    
+    filter_querystring = urlencode({key: value for key, value in filters.items() if value})
+    base_querystring = urlencode(
+        [(key, value) for key, value in request.GET.items() if key not in ('after', 'before', 'page')]
+    )
+    
+    context = {
+        'client': client,
+        'page_obj': page_obj,
+        'total_count': total_count,
+        'count_is_estimate': count_is_estimate,
+        'summary': summary,
+        'filter_querystring': filter_querystring,
+        'base_querystring': base_querystring,
         
         # Filter options
-        'doc_types': doc_types,
-        'jobs': jobs,
-        'depths': depths,
+        'facets': facets,
         
         # Current filters
-        'current_doc_type': doc_type_filter,
-        'current_job': job_filter,
-        'current_depth': depth_filter,
-        'current_has_examples': has_examples,
-        'current_has_code': has_code,
-        'current_has_embeddings': has_embeddings,
-        'current_quality': quality_filter,
-        'current_search': search_query,
+        'current_doc_type': filters['doc_type'],
+        'current_job': filters['job'],
+        'current_depth': filters['depth'],
+        'current_has_examples': filters['has_examples'],
+        'current_has_code': filters['has_code'],
+        'current_has_embeddings': filters['has_embeddings'],
+        'current_quality': filters['quality'],
+        'current_search': filters['q'],
         'current_sort': sort_by,
     }
     
     return render(request, 'dashboard/client_pages.html', context)
 
 
+def client_pages_summary(request, client_id):
+    """
+    API endpoint returning the summary statistics for a filtered client page set.
+
+    Results are cached per client and filter combination for
+    DASHBOARD_SUMMARY_CACHE_TTL seconds.
+    """
+    from django.conf import settings
+
+    client = get_object_or_404(Client, id=client_id)
+    pages, filters = _filter_client_pages(request, client)
+
+    cache_key = _client_pages_summary_key(client, filters)
+    summary = cache.get(cache_key)
+    if summary is None:
+        summary = _client_pages_summary(pages)
+        cache.set(cache_key, summary, settings.DASHBOARD_SUMMARY_CACHE_TTL)
+
+    return JsonResponse(summary)
+
+
+# Pages listed per group by the concept API (default and ceiling for ?limit=)
+CONCEPT_API_DEFAULT_LIMIT = 50
+CONCEPT_API_MAX_LIMIT = 500
+
+
+def client_concepts_api(request, client_id):
+    """
+    API endpoint for the concept index (crawler.concept_index).
+
+    ``?q=<term>`` returns the pages that introduce the concept (is_new),
+    assume it, or only mention it. ``?prefix=<text>`` returns indexed terms
+    starting with the text, most used first. Both parameters can be combined.
+    """
+    client = get_object_or_404(Client, id=client_id)
+    term = request.GET.get('q', '')
+    prefix = request.GET.get('prefix', '')
+    if not term.strip() and not prefix.strip():
+        return JsonResponse({'error': 'Pass ?q=<term> or ?prefix=<text>'}, status=400)
+    try:
+        limit = int(request.GET.get('limit', CONCEPT_API_DEFAULT_LIMIT))
+    except ValueError:
+        limit = CONCEPT_API_DEFAULT_LIMIT
+    limit = max(1, min(limit, CONCEPT_API_MAX_LIMIT))
+
+    data = {'client_id': client.id}
+    if term.strip():
+        data['concept'] = lookup_concept(client.id, term, limit=limit)
+    if prefix.strip():
+        data['suggestions'] = suggest_concepts(client.id, prefix, limit=limit)
+    return JsonResponse(data)
+
+
 def new_crawl(request):
     """
     Form to create and start a new crawl job.
@@ -717,6 +872,7 @@ def delete_job(request, job_id):
     
     # Delete the job (cascades to pages)
     job.delete()
+    bump_data_version(client_id)
     
     messages.success(request, f'Job #{job_id} and all associated data have been deleted.')
     return redirect('dashboard:client_detail', client_id=client_id)
@@ -743,6 +899,9 @@ def restart_job(request, job_id):
         
         job.save()
         
+        # Viewers must not get the last run's 'finished' snapshot while the job is pending
+        progress.clear(job.id)
+        
         # Start the crawl task
         task = start_crawl_task.delay(job.id)
         job.celery_task_id = task.id
@@ -791,14 +950,16 @@ def generate_job_embeddings(request, job_id):
             )
         return redirect('dashboard:job_detail', job_id=job_id)
     
-    # Enqueue Celery tasks for each page
-    for page in pages:
-        generate_page_embeddings_task.delay(page.id, force=force)
+    # Enqueue one Celery task per chunk of pages; each packs its pages'
+    # texts into a few embeddings requests
+    page_ids = list(pages.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(page_ids), EMBED_CHUNK_PAGES):
+        generate_embeddings_batch_task.delay(page_ids[start:start + EMBED_CHUNK_PAGES], force=force)
     
     messages.success(
         request,
-        f'Embedding generation started for {count} page(s) in job #{job_id}. '
-        f'This will take approximately {count * 2} seconds. '
+        f'Embedding generation started for {count} page(s) in job #{job_id}, '
+        f'in {-(-count // EMBED_CHUNK_PAGES)} batch task(s). '
         'Refresh this page or check individual pages to see progress.'
     )
     
@@ -813,6 +974,7 @@ def analyze_job_content(request, job_id):
     Analyzes pages to extract topics, learning objectives, and prerequisite chains.
     """
     from decouple import config
+    from django.conf import settings
     from django.db.models import Q
     
     job = get_object_or_404(CrawlJob, id=job_id)
@@ -832,8 +994,7 @@ def analyze_job_content(request, job_id):
     
     # Skip certain doc types to save costs
     # Note: 'unknown' is NOT skipped because AI analysis reclassifies pages
-    skip_types = ['navigation', 'landing', 'changelog']
-    queryset = queryset.exclude(doc_type__in=skip_types)
+    queryset = queryset.exclude(doc_type__in=SKIP_DOC_TYPES)
     
     if not force:
         queryset = queryset.filter(
@@ -855,7 +1016,7 @@ def analyze_job_content(request, job_id):
     
     # Estimate cost
     estimated_cost = count * 0.00015
-    estimated_time_minutes = (count * 2) / 60
+    estimated_time_minutes = (count * 2) / settings.ANALYSIS_CONCURRENCY / 60
     
     messages.info(
         request,
@@ -868,66 +1029,30 @@ def analyze_job_content(request, job_id):
     # TODO: In the future, this should be a Celery task for better async handling
     # For now, we'll process synchronously with a limit to avoid timeouts
     
-    analyzer = ContentAnalyzer(openai_api_key=api_key)
-    success_count = 0
-    error_count = 0
+    analyzer = ContentAnalyzer(openai_api_key=api_key, base_url=settings.OPENAI_BASE_URL)
     
-    # Process pages (limit to 50 to avoid timeout)
+    # Process pages concurrently (limit to 50 to avoid timeout)
     batch_limit = min(count, 50)
-    for page in queryset[:batch_limit]:
-        try:
-            result = analyzer.analyze_page(
-                page_id=page.id,
-                url=page.url,
-                title=page.title,
-                main_content=page.main_content,
-                sections=page.sections or [],
-                doc_type=page.doc_type,
-                existing_prerequisites=page.prerequisites or [],
-                existing_learning_objectives=page.learning_objectives or [],
-            )
-            
-            # Save results
-            page.ai_topics = result["ai_topics"]
-            page.ai_learning_objectives = result["ai_learning_objectives"]
-            page.ai_prerequisite_chain = result["ai_prerequisite_chain"]
-            page.ai_analysis_metadata = result["ai_analysis_metadata"]
-            
-            # Merge with existing fields
-            enhanced_prereqs, enhanced_los = analyzer.merge_with_existing(
-                ai_result=result,
-                existing_prerequisites=page.prerequisites or [],
-                existing_learning_objectives=page.learning_objectives or [],
-            )
-            page.prerequisites = enhanced_prereqs
-            page.learning_objectives = enhanced_los
-            page.has_prerequisites = len(enhanced_prereqs) > 0
-            page.has_learning_objectives = len(enhanced_los) > 0
-            
-            page.save(update_fields=[
-                'ai_topics',
-                'ai_learning_objectives',
-                'ai_prerequisite_chain',
-                'ai_analysis_metadata',
-                'prerequisites',
-                'learning_objectives',
-                'has_prerequisites',
-                'has_learning_objectives',
-            ])
-            
-            success_count += 1
-            
-        except Exception as exc:
-            logger.error(f"Error analyzing page {page.id}: {exc}")
-            error_count += 1
-            continue
+    page_ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_limit])
+    engine = AsyncAnalysisEngine(
+        analyzer,
+        concurrency=settings.ANALYSIS_CONCURRENCY,
+        rpm=settings.ANALYSIS_RPM,
+        tpm=settings.ANALYSIS_TPM,
+    )
+    stats = engine.run(page_ids)
+    success_count = stats['success']
+    error_count = stats['errors']
     
     if success_count > 0:
-        actual_cost = success_count * 0.00015
+        bump_data_version(job.client_id)
+        # Pages served from the analysis cache cost nothing
+        cache_hits = stats['cache_hits']
+        actual_cost = max(success_count - cache_hits, 0) * 0.00015
         messages.success(
             request,
             f'AI analysis completed: {success_count} pages analyzed '
-            f'(${actual_cost:.4f} cost). '
+            f'({cache_hits} from cache, ${actual_cost:.4f} cost). '
             f'{error_count} errors.'
         )
     else:
@@ -946,45 +1071,160 @@ def analyze_job_content(request, job_id):
 
 def job_logs(request, job_id):
     """
-    Stream or display logs for a specific job.
+    Show the most recent log entries for a crawl job.
+
+    Reads the job's own structured log file from the end; jobs crawled before
+    per-job logs existed fall back to the tail of the shared crawler.log.
     """
     from django.conf import settings
     from pathlib import Path
+    from crawler.job_logs import job_log_path, tail_lines, format_entry
     
     job = get_object_or_404(CrawlJob, id=job_id)
     
-    # Read recent log entries
-    log_file = Path(settings.BASE_DIR) / 'logs' / 'crawler.log'
-    
     logs = []
-    if log_file.exists():
-        try:
-            with open(log_file, 'r') as f:
-                # Read last 200 lines
-                all_lines = f.readlines()
-                recent_lines = all_lines[-200:]
-                
-                # Filter for this job ID
-                for line in recent_lines:
-                    if f'job {job_id}' in line.lower() or f'job_{job_id}' in line.lower() or f'job:{job_id}' in line.lower():
-                        logs.append(line.strip())
-        except Exception as e:
-            logs.append(f"Error reading logs: {str(e)}")
+    log_offset = 0
+    job_log_file = job_log_path(job_id)
+    shared_log_file = Path(settings.BASE_DIR) / 'logs' / 'crawler.log'
+    
+    try:
+        if job_log_file.exists():
+            lines, log_offset = tail_lines(job_log_file, 200)
+            logs = [format_entry(line) for line in lines]
+        elif shared_log_file.exists():
+            # Legacy jobs: filter the tail of the shared log for this job ID
+            lines, _ = tail_lines(shared_log_file, 5000)
+            markers = (f'job {job_id}', f'job_{job_id}', f'job:{job_id}')
+            logs = [line.strip() for line in lines if any(marker in line.lower() for marker in markers)][-200:]
+    except Exception as e:
+        logs.append(f"Error reading logs: {str(e)}")
     
     # If no logs found, show a message
     if not logs:
         logs.append(f"No log entries found for job {job_id} yet. Logs will appear here as the crawl progresses.")
     
     if request.headers.get('Accept') == 'application/json' or request.GET.get('format') == 'json':
-        return JsonResponse({'logs': logs, 'count': len(logs)})
+        return JsonResponse({'logs': logs, 'count': len(logs), 'offset': log_offset})
     
     context = {
         'job': job,
         'logs': logs,
+        'log_offset': log_offset,
     }
     return render(request, 'dashboard/job_logs.html', context)
 
 
+def job_logs_stream(request, job_id):
+    """
+    Server-sent events stream of new log lines for a crawl job.
+
+    Each event carries one formatted line, with the byte offset after it as
+    the event id, so a reconnecting EventSource resumes where it left off
+    (Last-Event-ID). The stream ends with a 'done' event once the job is no
+    longer running and no new lines have arrived. Each connection is closed
+    after DASHBOARD_STREAM_MAX_SECONDS so it does not hold a worker for the
+    whole crawl; the browser then reconnects from the last event id.
+    """
+    from django.conf import settings
+    from django.http import StreamingHttpResponse
+    from crawler.job_logs import job_log_path, follow, format_entry
+    import time
+    
+    job = get_object_or_404(CrawlJob, id=job_id)
+    
+    try:
+        offset = int(request.headers.get('Last-Event-ID') or request.GET.get('offset') or 0)
+    except ValueError:
+        offset = 0
+    
+    status_cache = {'checked_at': 0.0, 'finished': job.status not in ACTIVE_JOB_STATUSES}
+    
+    def job_finished():
+        # Re-check job status at most every 5 seconds while idle
+        now = time.monotonic()
+        if not status_cache['finished'] and now - status_cache['checked_at'] >= 5:
+            status_cache['checked_at'] = now
+            status = CrawlJob.objects.filter(id=job_id).values_list('status', flat=True).first()
+            status_cache['finished'] = status not in ACTIVE_JOB_STATUSES
+        return status_cache['finished']
+    
+    def events():
+        yield 'retry: 3000\n\n'
+        last_keepalive = time.monotonic()
+        deadline = last_keepalive + settings.DASHBOARD_STREAM_MAX_SECONDS
+        for line, next_offset in follow(job_log_path(job_id), offset, should_stop=job_finished, idle_timeout=15 * 60):
+            if time.monotonic() >= deadline:
+                # End without 'done': EventSource reconnects with Last-Event-ID
+                return
+            if line is None:
+                if time.monotonic() - last_keepalive >= 15:
+                    last_keepalive = time.monotonic()
+                    yield ': keep-alive\n\n'
+                continue
+            data = '\ndata: '.join(format_entry(line).splitlines() or [''])
+            yield f'id: {next_offset}\ndata: {data}\n\n'
+        yield 'event: done\ndata: {}\n\n'
+    
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def job_progress_stream(request, job_id):
+    """
+    Server-sent events stream of live progress counters for a crawl job.
+
+    Snapshots are pushed by the crawl pipeline (see crawler.progress), so
+    each tick costs no database queries. Job status is only looked up when
+    no snapshot has arrived for a while, to end the stream if the crawl
+    process died without publishing its final snapshot. Like the log stream,
+    each connection is closed after DASHBOARD_STREAM_MAX_SECONDS and the
+    browser reconnects.
+    """
+    from django.conf import settings
+    from django.http import StreamingHttpResponse
+    from crawler.progress import subscribe
+    import json
+    import time
+    
+    job = get_object_or_404(CrawlJob, id=job_id)
+    job_active = job.status in ACTIVE_JOB_STATUSES
+    
+    def events():
+        yield 'retry: 3000\n\n'
+        if not job_active:
+            yield 'event: done\ndata: {}\n\n'
+            return
+        last_event = time.monotonic()
+        last_keepalive = time.monotonic()
+        deadline = last_event + settings.DASHBOARD_STREAM_MAX_SECONDS
+        for snapshot in subscribe(job_id, idle_timeout=30 * 60):
+            now = time.monotonic()
+            if now >= deadline:
+                # End without 'done' so EventSource reconnects
+                return
+            if snapshot is None:
+                if now - last_keepalive >= 15:
+                    last_keepalive = now
+                    yield ': keep-alive\n\n'
+                if now - last_event >= 60:
+                    last_event = now
+                    status = CrawlJob.objects.filter(id=job_id).values_list('status', flat=True).first()
+                    if status not in ACTIVE_JOB_STATUSES:
+                        break
+                continue
+            last_event = now
+            snapshot['pages_per_minute'] = round(snapshot.get('pages_per_sec', 0) * 60, 2)
+            yield f"id: {snapshot.get('seq', '')}\ndata: {json.dumps(snapshot)}\n\n"
+        yield 'event: done\ndata: {}\n\n'
+    
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 def page_raw_html(request, page_id):
     """
     Display the raw HTML of a crawled page.
@@ -1095,11 +1335,35 @@ def page_json(request, page_id):
     """
     Display the complete JSON representation of a page including all metadata and content.
     """
-    from django.http import JsonResponse
+    from django.http import HttpResponse
+    
+    page_meta = CrawledPage.objects.filter(id=page_id).values('client_id', 'job__status').first()
+    if page_meta is None:
+        raise Http404('No CrawledPage matches the given query.')
+    
+    # Serializing the full page (raw HTML, embeddings) is the expensive part,
+    # so the rendered JSON is cached until the client's data changes
+    cached = cached_for_client(
+        f'page_json:{page_id}', page_meta['client_id'],
+        lambda: _page_json_data(page_id),
+        running=page_meta['job__status'] in ACTIVE_JOB_STATUSES,
+    )
+    
+    # Check if request wants HTML view or pure JSON
+    if request.GET.get('format') == 'raw':
+        # Return pure JSON for API usage
+        return HttpResponse(cached['json_data'], content_type='application/json')
+    else:
+        # Return HTML page with pretty-printed JSON
+        return render(request, 'dashboard/page_json.html', cached)
+
+
+def _page_json_data(page_id):
+    """Build the page_json template context: page identity plus serialized JSON."""
     from django.core.serializers.json import DjangoJSONEncoder
     import json
     
-    page = get_object_or_404(CrawledPage, id=page_id)
+    page = get_object_or_404(CrawledPage.objects.select_related('job', 'client'), id=page_id)
     
     # Build comprehensive JSON representation
     page_data = {
@@ -1300,17 +1564,18 @@ def page_json(request, page_id):
         },
     }
     
-    # Check if request wants HTML view or pure JSON
-    if request.GET.get('format') == 'raw':
-        # Return pure JSON for API usage
-        return JsonResponse(page_data, json_dumps_params={'indent': 2}, encoder=DjangoJSONEncoder)
-    else:
-        # Return HTML page with pretty-printed JSON
-        context = {
-            'page': page,
-            'json_data': json.dumps(page_data, indent=2, cls=DjangoJSONEncoder),
-        }
-        return render(request, 'dashboard/page_json.html', context)
+    return {
+        'page': {'id': page.id, 'title': page.title, 'url': page.url},
+        'json_data': json.dumps(page_data, indent=2, cls=DjangoJSONEncoder),
+    }
+
+
+def _load_taxonomy_file(path):
+    """Parse a taxonomy JSON file."""
+    import json
+
+    with open(path, 'r') as f:
+        return json.load(f)
 
 
 def client_taxonomy(request, client_id):
@@ -1324,7 +1589,6 @@ def client_taxonomy(request, client_id):
     """
     from django.conf import settings
     from pathlib import Path
-    import json
     import glob
     
     client = get_object_or_404(Client, id=client_id)
@@ -1352,8 +1616,13 @@ def client_taxonomy(request, client_id):
         # Load the most recent taxonomy file
         taxonomy_file_path = taxonomy_files[0]
         try:
-            with open(taxonomy_file_path, 'r') as f:
-                taxonomy_data = json.load(f)
+            # Taxonomy files are immutable once written, so the parsed JSON is
+            # cached under the file name and modification time
+            mtime = taxonomy_file_path.stat().st_mtime_ns
+            taxonomy_data = cached_for_client(
+                f'client_taxonomy:{client.id}:{taxonomy_file_path.name}:{mtime}', client.id,
+                lambda: _load_taxonomy_file(taxonomy_file_path),
+            )
             logger.info(f"Loaded taxonomy from {taxonomy_file_path}")
         except Exception as e:
             logger.error(f"Error loading taxonomy file {taxonomy_file_path}: {e}")